@@ -1,33 +1,119 @@
+import hashlib
+import json
+import os
+import threading
 import time
-import requests
-from config import CLIENT_ID, CLIENT_SECRET
+from contextlib import contextmanager
+from config import CLIENT_ID, CLIENT_SECRET, TOKEN_CACHE_FILE
+from http_client import get_session, default_timeout
+
+try:
+    import fcntl
+except ImportError:  # Windows：沒有 flock，磁碟快取退化為無鎖（最壞情況多取一次 token）
+    fcntl = None
 
 _token_cache = {"token": None, "expires_at": 0}
+# 併發爬取時避免多個執行緒同時向 TDXConnect 重複取 token
+_token_lock = threading.Lock()
+# 提前 60 秒刷新 token
+_REFRESH_MARGIN = 60
 
 def get_token():
     """取得 Access Token，自動快取與重新取得"""
+    with _token_lock:
+        return _get_token_locked()
+
+def _get_token_locked():
     now = time.time()
-    # 提前 60 秒刷新 token
-    if _token_cache["token"] and now < _token_cache["expires_at"] - 60:
+    if _token_cache["token"] and now < _token_cache["expires_at"] - _REFRESH_MARGIN:
         return _token_cache["token"]
-    
+
     if not CLIENT_ID or not CLIENT_SECRET:
         raise ValueError("尚未設定 TDX_CLIENT_ID 或 TDX_CLIENT_SECRET，請檢查 .env 檔案。")
 
+    if not _disk_cache_enabled():
+        _token_cache.update(_request_token())
+        return _token_cache["token"]
+
+    # 跨 process：持有檔案鎖期間「讀快取 → 過期才取新 token → 寫回」，
+    # 同時啟動的多個爬蟲只有一個會真的打 TDXConnect
+    with _file_lock(TOKEN_CACHE_FILE + ".lock"):
+        cached = _read_disk_cache()
+        if not cached or time.time() >= cached["expires_at"] - _REFRESH_MARGIN:
+            cached = _request_token()
+            _write_disk_cache(cached)
+    _token_cache.update(cached)
+    return _token_cache["token"]
+
+def _request_token():
     url = "https://tdx.transportdata.tw/auth/realms/TDXConnect/protocol/openid-connect/token"
-    resp = requests.post(url, data={
+    now = time.time()
+    resp = get_session().post(url, data={
         "grant_type": "client_credentials",
         "client_id": CLIENT_ID,
         "client_secret": CLIENT_SECRET
-    })
+    }, timeout=default_timeout())
     
     if resp.status_code != 200:
         raise RuntimeError(f"取得 Token 失敗: {resp.status_code} - {resp.text}")
         
     data = resp.json()
-    _token_cache["token"] = data["access_token"]
-    _token_cache["expires_at"] = now + data.get("expires_in", 86400)
-    return _token_cache["token"]
+    return {"token": data["access_token"], "expires_at": now + data.get("expires_in", 86400)}
 
 def auth_header():
-    return {"Authorization": f"Bearer {get_token()}"}
\ No newline at end of file
+    return {"Authorization": f"Bearer {get_token()}"}
+
+def invalidate_token():
+    """API 回 401 時呼叫：清除記憶體與磁碟快取，下次 get_token() 重新取得。"""
+    with _token_lock:
+        _token_cache.update(token=None, expires_at=0)
+        if _disk_cache_enabled():
+            with _file_lock(TOKEN_CACHE_FILE + ".lock"):
+                try:
+                    os.remove(TOKEN_CACHE_FILE)
+                except OSError:
+                    pass
+
+# ── 磁碟快取 ──────────────────────────────────────────────────
+# {"client": <CLIENT_ID 雜湊>, "token": ..., "expires_at": <epoch 秒>}
+# 檔案權限 0600；換了 CLIENT_ID 時舊 token 自動失效。
+
+def _disk_cache_enabled():
+    return bool(TOKEN_CACHE_FILE) and TOKEN_CACHE_FILE.lower() not in ("off", "0", "false", "none")
+
+def _client_fingerprint():
+    return hashlib.sha256(CLIENT_ID.encode("utf-8")).hexdigest()[:16]
+
+@contextmanager
+def _file_lock(lock_path):
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+def _read_disk_cache():
+    try:
+        with open(TOKEN_CACHE_FILE, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("client") != _client_fingerprint() or not cached.get("token"):
+        return None
+    return {"token": cached["token"], "expires_at": float(cached.get("expires_at", 0))}
+
+def _write_disk_cache(entry):
+    tmp = f"{TOKEN_CACHE_FILE}.{os.getpid()}.tmp"
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"client": _client_fingerprint(), **entry}, f)
+        os.replace(tmp, TOKEN_CACHE_FILE)
+    except OSError as e:
+        # 快取寫不進去不影響本次抓取
+        print(f"token 快取寫入失敗：{e}")
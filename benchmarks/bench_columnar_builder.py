@@ -0,0 +1,160 @@
+"""
+欄式累積 vs 逐列 dict 基準測試：以現有 data/ 樹比較
+  station_live : 全部快照 → 正規化 DataFrame（processor 解析路徑，不經 live store / 解析快取）
+  timetable    : data/timetable/daily_*.json → 班次 × 車站 DataFrame（build_timetable_features 前半段）
+兩種寫法的執行時間與 Python 記憶體峰值（tracemalloc）。
+
+用法：python benchmarks/bench_columnar_builder.py [--repeat 3]
+「逐列 dict」為改版前的寫法（每列一個 dict 後 pd.DataFrame(records)），保留在本檔僅供對照；
+兩者產出的 DataFrame 會先比對是否完全相同。
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import processor  # noqa: E402
+from config import DATA_DIR  # noqa: E402
+from crawlers import normalize, storage  # noqa: E402
+
+
+# ── 改版前：逐列 dict ─────────────────────────────────────────
+
+def _legacy_live_rows(snapshot, date_folder, crawl_time):
+    rows = []
+    tw_date = normalize.taiwan_date(date_folder, crawl_time)
+    try:
+        for r in snapshot:
+            arr_raw = r.get("ScheduleArrivalTime", "")
+            dep_raw = r.get("ScheduleDepartureTime", "")
+            rows.append({
+                "Date": date_folder,
+                "TaiwanDate": tw_date,
+                "CrawlTime": crawl_time,
+                "TrainNo": r.get("TrainNo"),
+                "StationID": normalize.normalize_station_id(r.get("StationID"), np.nan),
+                "StationName": r.get("StationName", {}).get("Zh_tw"),
+                "TrainTypeRaw": r.get("TrainTypeName", {}).get("Zh_tw", ""),
+                "Direction": r.get("Direction", np.nan),
+                "TripLine": r.get("TripLine", np.nan),
+                "EndingStationID": normalize.normalize_station_id(r.get("EndingStationID", ""), np.nan),
+                "ScheduleArrivalTime": arr_raw[:5] if arr_raw else "",
+                "ScheduleDepartureTime": dep_raw[:5] if dep_raw else "",
+                "RunningStatus": r.get("RunningStatus", 0),
+                "UpdateTime": r.get("UpdateTime", ""),
+                "DelayTime": r.get("DelayTime", 0),
+            })
+    except Exception:
+        pass
+    return rows
+
+
+def legacy_live(files):
+    frames = []
+    for folder, paths in processor._group_by_folder(files).items():
+        records = []
+        for f, snapshot in processor.iter_raw_snapshots(paths, "StationLiveBoards"):
+            records.extend(_legacy_live_rows(snapshot, os.path.basename(folder), storage.stem(f)))
+        if records:
+            frames.append(pd.DataFrame(records))
+    return pd.concat(frames, ignore_index=True)
+
+
+def columnar_live(files):
+    groups = processor._group_by_folder(files)
+    frames = [pd.DataFrame(processor._merge_columns(per_file))
+              for _, per_file in processor._iter_parsed_folders(groups, "StationLiveBoards")]
+    return pd.concat(frames, ignore_index=True)
+
+
+def legacy_timetable(path):
+    data = storage.load_payload(path)
+    ttm = processor._time_to_minutes
+    nsid = processor._normalize_station_id
+    records = []
+    for train in data.get("TrainTimetables", []):
+        info = train.get("TrainInfo", {})
+        type_raw = info.get("TrainTypeName", {}).get("Zh_tw", "")
+        stops = train.get("StopTimes", [])
+        n = len(stops)
+        for i, stop in enumerate(stops):
+            arr_str = stop.get("ArrivalTime", "")
+            dep_str = stop.get("DepartureTime", "")
+            arr_min, dep_min = ttm(arr_str), ttm(dep_str)
+            if i > 0:
+                prev_dep = ttm(stops[i-1].get("DepartureTime", ""))
+                run_min = arr_min - prev_dep if not np.isnan(arr_min) and not np.isnan(prev_dep) else np.nan
+            else:
+                run_min = np.nan
+            records.append({
+                "TrainNo": info.get("TrainNo"),
+                "TrainTypeRaw": type_raw,
+                "TrainTypeSimple": processor._simplify_type(type_raw),
+                "Direction": info.get("Direction", np.nan),
+                "TripLine": info.get("TripLine", np.nan),
+                "StartingStationID": nsid(info.get("StartingStationID", "")),
+                "EndingStationID": nsid(info.get("EndingStationID", "")),
+                "StationID": nsid(stop.get("StationID")),
+                "StopSeq": stop.get("StopSequence", i + 1),
+                "ScheduledArr": arr_str,
+                "ScheduledDep": dep_str,
+                "ArrMinute": arr_min,
+                "DepMinute": dep_min,
+                "DwellMin": dep_min - arr_min if not np.isnan(dep_min) and not np.isnan(arr_min) else 0,
+                "RunMin": run_min,
+                "IsTerminal": 1 if i == n - 1 else 0,
+            })
+    return pd.DataFrame(records)
+
+
+def columnar_timetable(path):
+    return processor._timetable_stop_frame(storage.load_payload(path))
+
+
+# ── 量測 ──────────────────────────────────────────────────────
+
+def _measure(func, arg, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    live_files = storage.glob_payloads(os.path.join(DATA_DIR, "station_live", "*", "*"))
+    timetables = sorted(storage.glob_payloads(os.path.join(DATA_DIR, "timetable", "daily_*")))
+    cases = [("station_live", legacy_live, columnar_live, live_files)]
+    if timetables:
+        cases.append(("timetable", legacy_timetable, columnar_timetable, timetables[-1]))
+
+    print(f"{'case':<14}{'builder':<10}{'rows':>8}{'time s':>9}{'peak MB':>10}")
+    for name, legacy, columnar, arg in cases:
+        a, b = legacy(arg), columnar(arg)
+        same = a.equals(b)
+        for label, func in (("dict", legacy), ("columnar", columnar)):
+            t, peak = _measure(func, arg, args.repeat)
+            print(f"{name:<14}{label:<10}{len(a):>8}{t:>9.3f}{peak:>10.1f}")
+        print(f"{'':<14}結果相同：{same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+共用 Session 前後對照基準測試（本機替身伺服器，不連 TDX）。
+
+以 data/ 內實際的 StationLiveBoard 快照與 DailyTrainTimetable 作為回應內容，
+模擬一次 `main.py all` 的請求序列（token + 7 支爬蟲），比較：
+
+  before   : 每次呼叫 requests.get / requests.post（每次新連線）
+  identity : 共用 Session，但 Accept-Encoding: identity（只看連線重用）
+  after    : http_client.get_session()（連線池 + keep-alive + gzip）
+
+用法：python benchmarks/bench_http_session.py [--rounds 5] [--latency-ms 20]
+--latency-ms 在每條新連線建立時加入延遲，模擬 TLS 握手的往返成本。
+"""
+
+import argparse
+import glob
+import gzip
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_DIR  # noqa: E402
+import http_client  # noqa: E402
+
+
+def _load_payloads() -> dict:
+    live = sorted(glob.glob(os.path.join(DATA_DIR, "station_live", "*", "*.json")))
+    daily = sorted(glob.glob(os.path.join(DATA_DIR, "timetable", "daily_*.json")))
+    static = os.path.join(DATA_DIR, "static")
+
+    def read(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    return {
+        "/token": b'{"access_token": "bench", "expires_in": 86400}',
+        "/StationLiveBoard": read(live[-1]),
+        "/Alert": b'{"Alerts": []}',
+        "/DailyTrainTimetable/Today": read(daily[-1]),
+        "/Station": read(os.path.join(static, "stations.json")),
+        "/TrainType": read(os.path.join(static, "train_types.json")),
+        "/LineNetwork": read(os.path.join(static, "line_network.json")),
+        "/Shape": read(os.path.join(static, "shape.json")),
+    }
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.connections = 0
+        self.bytes_sent = 0
+
+
+def _make_handler(payloads, gz_payloads, stats, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # 關閉 Nagle，避免 keep-alive 連線上 header/body 分開寫入時的 delayed-ACK 等待
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with stats.lock:
+                stats.connections += 1
+            if latency:
+                time.sleep(latency)
+
+        def _respond(self):
+            path = self.path.split("?")[0]
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            body = payloads.get(path, b"{}")
+            use_gzip = "gzip" in (self.headers.get("Accept-Encoding") or "")
+            if use_gzip and path in gz_payloads:
+                body = gz_payloads[path]
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if use_gzip and path in gz_payloads:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            with stats.lock:
+                stats.bytes_sent += len(body)
+
+        do_GET = _respond
+        do_POST = _respond
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def _run_round(base, paths, mode) -> float:
+    start = time.perf_counter()
+    if mode == "before":
+        requests.post(f"{base}/token", data={"grant_type": "client_credentials"}).json()
+        for p in paths:
+            requests.get(f"{base}{p}", params={"$format": "JSON"}).json()
+    else:
+        session = http_client.get_session()
+        headers = {"Accept-Encoding": "identity"} if mode == "identity" else {}
+        session.post(f"{base}/token", data={"grant_type": "client_credentials"},
+                     headers=headers, timeout=http_client.default_timeout()).json()
+        for p in paths:
+            session.get(f"{base}{p}", params={"$format": "JSON"}, headers=headers,
+                        timeout=http_client.default_timeout()).json()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    payloads = _load_payloads()
+    gz_payloads = {k: gzip.compress(v, 6) for k, v in payloads.items() if len(v) > 1024}
+    stats = _Stats()
+    server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                 _make_handler(payloads, gz_payloads, stats, args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    paths = [p for p in payloads if p != "/token"]
+
+    print(f"{'mode':<10}{'sec/run':>10}{'conns/run':>11}{'MB on wire/run':>16}")
+    for mode in ("before", "identity", "after"):
+        http_client.close_session()
+        _run_round(base, paths, mode)  # 暖身
+        stats.reset()
+        elapsed = sum(_run_round(base, paths, mode) for _ in range(args.rounds))
+        print(f"{mode:<10}{elapsed / args.rounds:>10.3f}"
+              f"{stats.connections / args.rounds:>11.1f}"
+              f"{stats.bytes_sent / args.rounds / 1e6:>16.2f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+JSON 後端基準測試：以 data/timetable/daily_*.json（每份約 4 MB，為讀取量最大的檔案）
+比較標準函式庫 json 與 orjson 的解析 / 序列化時間，以及 crawlers.jsonio 實際選用的後端。
+
+用法：python benchmarks/bench_json_backends.py [--repeat 5] [--glob "timetable/daily_*"]
+檔案先整份讀進記憶體，計時只含 loads / dumps，不含磁碟 I/O。未安裝 orjson 時該列略過。
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_DIR  # noqa: E402
+from crawlers import jsonio, storage  # noqa: E402
+
+
+def _backends() -> dict:
+    backends = {
+        "json": (json.loads,
+                 lambda obj: json.dumps(obj, ensure_ascii=False).encode("utf-8")),
+    }
+    try:
+        import orjson
+        backends["orjson"] = (orjson.loads, orjson.dumps)
+    except ImportError:
+        backends["orjson"] = None
+    backends[f"jsonio({jsonio.BACKEND})"] = (jsonio.loads, jsonio.dumpb)
+    return backends
+
+
+def _best(func, items, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--glob", default=os.path.join("timetable", "daily_*"))
+    args = parser.parse_args()
+
+    raws = []
+    for p in sorted(storage.glob_payloads(os.path.join(DATA_DIR, args.glob))):
+        with open(p, "rb") as f:
+            raw = f.read()
+        if storage.detect(raw, p).name == "json":    # 壓縮 / msgpack 檔不列入
+            raws.append(raw)
+    if not raws:
+        print(f"找不到 {args.glob} 的 .json 檔")
+        return
+    objs = [json.loads(r) for r in raws]
+    mb = sum(len(r) for r in raws) / 1e6
+    print(f"{len(raws)} 個檔案，共 {mb:.1f} MB，取 {args.repeat} 次最佳")
+
+    print(f"{'backend':<16}{'loads s':>9}{'MB/s':>8}{'dumps s':>9}{'loads x':>9}{'dumps x':>9}")
+    baseline = None
+    for name, funcs in _backends().items():
+        if funcs is None:
+            print(f"{name:<16}{'(未安裝，略過)':>20}")
+            continue
+        loads, dumps = funcs
+        t_load = _best(loads, raws, args.repeat)
+        t_dump = _best(dumps, objs, args.repeat)
+        baseline = baseline or (t_load, t_dump)
+        print(f"{name:<16}{t_load:>9.3f}{mb / t_load:>8.0f}{t_dump:>9.3f}"
+              f"{baseline[0] / t_load:>8.1f}x{baseline[1] / t_dump:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+存檔格式基準測試：以現有 data/ 樹（station_live / alerts / timetable）換算各格式的
+磁碟用量與讀取時間。
+
+用法：python benchmarks/bench_storage_formats.py [--repeat 3]
+未安裝 zstandard / msgpack 時對應格式會略過。讀取時間包含檔案 I/O + 解壓 + 解析，
+與 processor 讀檔路徑（crawlers.storage.load_payload）相同。
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATA_DIR  # noqa: E402
+from crawlers import storage  # noqa: E402
+
+GROUPS = {
+    "station_live": os.path.join(DATA_DIR, "station_live", "*", "*"),
+    "alerts": os.path.join(DATA_DIR, "alerts", "*", "*"),
+    "timetable": os.path.join(DATA_DIR, "timetable", "daily_*"),
+}
+
+
+def _available(name) -> bool:
+    try:
+        storage.get_serializer(name).dumps({})
+        return True
+    except ImportError:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payloads = {g: [storage.load_payload(f) for f in sorted(storage.glob_payloads(p))]
+                for g, p in GROUPS.items()}
+    workdir = tempfile.mkdtemp(prefix="tra_bench_")
+    try:
+        print(f"{'group':<14}{'format':<10}{'files':>6}{'MB':>9}{'ratio':>8}{'load s':>9}")
+        for group, items in payloads.items():
+            baseline_mb = None
+            for name in storage.SERIALIZERS:
+                if not _available(name):
+                    print(f"{group:<14}{name:<10}{'(未安裝，略過)':>20}")
+                    continue
+                ser = storage.get_serializer(name)
+                paths = []
+                for i, data in enumerate(items):
+                    path = os.path.join(workdir, f"{group}_{i:05d}{ser.ext}")
+                    storage.dump_payload(data, path, ser)
+                    paths.append(path)
+                mb = sum(os.path.getsize(p) for p in paths) / 1e6
+                baseline_mb = baseline_mb or mb
+                best = min(_time_load(paths) for _ in range(args.repeat))
+                print(f"{group:<14}{name:<10}{len(paths):>6}{mb:>9.2f}"
+                      f"{mb / baseline_mb:>8.2f}{best:>9.3f}")
+                for p in paths:
+                    os.remove(p)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _time_load(paths) -> float:
+    start = time.perf_counter()
+    for p in paths:
+        storage.load_payload(p)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
@@ -6,12 +6,13 @@
 """
 from __future__ import annotations
 
-import json
 import os
 from functools import lru_cache
 
 import pandas as pd
 
+from crawlers import jsonio
+
 
 CNY_PERIOD_ORDER = [
     "春節前 (除夕前3天以上)",
@@ -57,7 +58,7 @@ class CNYDataStore:
 
     def load_inferential(self) -> dict:
         with open(self._path("inferential_results.json"), "r", encoding="utf-8") as f:
-            return json.load(f)
+            return jsonio.load(f)
 
     def load_raw_year(self, year: int) -> pd.DataFrame:
         """載入單一年度原始 CSV（未清理），供資料預覽頁使用。"""
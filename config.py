@@ -15,3 +15,82 @@ BASE_URL = "https://tdx.transportdata.tw/api/basic/v3/Rail/TRA"
 
 # 資料儲存路徑
 DATA_DIR = os.path.join(BASE_DIR, "data")
+# 本機執行狀態（daemon 健康檔等），不進版控
+CACHE_DIR = os.getenv("TRA_CACHE_DIR", os.path.join(BASE_DIR, ".cache"))
+
+# HTTP 連線設定（共用 Session，見 http_client.py）
+# 逾時以 (connect, read) 秒數傳給 requests；時刻表等大型回應需較長的 read timeout
+HTTP_CONNECT_TIMEOUT = float(os.getenv("TDX_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("TDX_READ_TIMEOUT", "60"))
+HTTP_POOL_SIZE = int(os.getenv("TDX_POOL_SIZE", "10"))
+
+# 併發爬取（crawlers/orchestrator.py）
+# TDX 以 API key 計算呼叫頻率；全域預算預設每秒 5 次，可依會員等級調整
+TDX_RATE_LIMIT = float(os.getenv("TDX_RATE_LIMIT", "5"))
+CRAWL_MAX_WORKERS = int(os.getenv("CRAWL_MAX_WORKERS", "4"))
+
+# StationLiveBoard 存檔模式："full" 每份完整快照；"delta" keyframe + 差分（crawlers/delta.py）
+STATION_LIVE_STORAGE = os.getenv("STATION_LIVE_STORAGE", "full")
+
+# 快照存檔格式（crawlers/storage.py）：json / json.gz / json.zst / msgpack
+# 讀取端依檔頭自動判斷，切換格式不影響既有檔案
+STORAGE_FORMAT = os.getenv("TRA_STORAGE_FORMAT", "json")
+# JSON 編解碼後端（crawlers/jsonio.py）：auto 有安裝 orjson 時使用；json 強制標準函式庫
+JSON_BACKEND = os.getenv("TRA_JSON_BACKEND", "auto")
+
+# 常駐排程（python main.py daemon，見 scheduler.py）
+DAEMON_HEALTH_FILE = os.getenv("TRA_DAEMON_HEALTH", os.path.join(CACHE_DIR, "daemon_health.json"))
+DAEMON_JITTER_SEC = float(os.getenv("TRA_DAEMON_JITTER", "30"))
+
+# OAuth token 磁碟快取（auth.py）：多個 cron / launchd 啟動的爬蟲 process 共用同一個 token
+# 設為 "off" 停用，只用記憶體快取
+TOKEN_CACHE_FILE = os.getenv("TDX_TOKEN_CACHE", os.path.join(CACHE_DIR, "tdx_token.json"))
+
+# 請求重試 / 斷路器（crawlers/resilience.py）
+# 每次 fetch 最多嘗試 FETCH_MAX_ATTEMPTS 次，指數退避 + jitter，總時間不超過 FETCH_DEADLINE_SEC
+# （須小於 10 分鐘排程間隔）；同一 endpoint 連續失敗 CIRCUIT_FAILURE_THRESHOLD 次後
+# 暫停 CIRCUIT_COOLDOWN_SEC 秒不再呼叫
+FETCH_MAX_ATTEMPTS = int(os.getenv("TDX_MAX_ATTEMPTS", "4"))
+FETCH_BACKOFF_BASE = float(os.getenv("TDX_BACKOFF_BASE", "1"))
+FETCH_BACKOFF_MAX = float(os.getenv("TDX_BACKOFF_MAX", "30"))
+FETCH_DEADLINE_SEC = float(os.getenv("TDX_FETCH_DEADLINE", "240"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("TDX_CIRCUIT_THRESHOLD", "3"))
+CIRCUIT_COOLDOWN_SEC = float(os.getenv("TDX_CIRCUIT_COOLDOWN", "900"))
+# 每次請求嘗試的紀錄（JSON Lines，每日一檔），可用來找出資料缺口的原因
+FETCH_LOG_DIR = os.getenv("TDX_FETCH_LOG_DIR", os.path.join(CACHE_DIR, "fetch_log"))
+
+# 即時資料欄式儲存（crawlers/live_store.py）：StationLiveBoard / Alert 存檔後立即正規化，
+# 以 Parquet 依台灣日期分區；processor 有現成分區時直接讀取，不再重新解析 JSON。
+# 預設關閉（TRA_LIVE_STORE=1 開啟）；既有歷史資料可用 python -m crawlers.live_store backfill 補建
+LIVE_STORE_ENABLED = os.getenv("TRA_LIVE_STORE", "0").lower() in ("1", "true", "on", "yes")
+LIVE_STORE_DIR = os.getenv("TRA_LIVE_STORE_DIR", os.path.join(CACHE_DIR, "live_store"))
+
+# 即時快照平行解析（processor.DataProcessor._parse_raw_json）：未入 live store 的快照
+# 以 process pool 解析，每批 PARSE_BATCH_FILES 份；0 / 1 為單一 process（預設），-1 為 CPU 核心數
+PARSE_WORKERS = int(os.getenv("TRA_PARSE_WORKERS", "0"))
+if PARSE_WORKERS < 0:
+    PARSE_WORKERS = os.cpu_count() or 1
+PARSE_BATCH_FILES = int(os.getenv("TRA_PARSE_BATCH", "48"))
+
+# 即時快照解析快取（crawlers/parse_cache.py）：以 (檔名, 大小, mtime, 解析版本) 為鍵保存正規化結果，
+# export_csv.py 等重複執行時只解析新增 / 變更的快照。TRA_PARSE_CACHE=0 停用
+PARSE_CACHE_ENABLED = os.getenv("TRA_PARSE_CACHE", "1").lower() in ("1", "true", "on", "yes")
+PARSE_CACHE_DIR = os.getenv("TRA_PARSE_CACHE_DIR", os.path.join(CACHE_DIR, "parse_cache"))
+
+# 時刻表特徵快取（crawlers/feature_cache.py）：build_timetable_features 的結果依時刻表檔內容雜湊存成 Parquet，
+# 新的 process 不必再解析 4 MB 的 daily_*.json。TRA_FEATURE_CACHE=0 停用
+FEATURE_CACHE_ENABLED = os.getenv("TRA_FEATURE_CACHE", "1").lower() in ("1", "true", "on", "yes")
+FEATURE_CACHE_DIR = os.getenv("TRA_FEATURE_CACHE_DIR", os.path.join(CACHE_DIR, "features"))
+# 快取保留最近使用的幾組（每份時刻表一組，約 0.2 MB）；研究資料集每份 daily_*.json 都要一組，
+# 實際保留數不會少於 data/timetable/ 下的檔案數。TRA_FEATURE_CACHE_KEEP
+FEATURE_CACHE_KEEP = max(1, int(os.getenv("TRA_FEATURE_CACHE_KEEP", "1000")))
+
+# 研究資料集依 TaiwanDate 對應當天的時刻表（processor.DataProcessor._timetables_for_dates），
+# 同時留在記憶體中的時刻表特徵最多幾天（LRU）
+TIMETABLE_LRU_SIZE = max(1, int(os.getenv("TRA_TIMETABLE_LRU", "8")))
+
+# 研究資料集 Parquet 儲存（research_store.py）：export_csv.py 依 TaiwanDate 分區寫入 data/research/，
+# 雲端模式先讀 _manifest.json 再只下載需要的日期。整份的本機 CSV（processed_data.csv / research_dataset.csv）
+# 每次都要讀回整個 store，預設不產生；TRA_EXPORT_CSV=1 時才寫入（不進版控，雲端版不讀取）
+RESEARCH_STORE_DIR = os.getenv("TRA_RESEARCH_STORE_DIR", os.path.join(DATA_DIR, "research"))
+EXPORT_CSV = os.getenv("TRA_EXPORT_CSV", "0").lower() in ("1", "true", "on", "yes")
@@ -6,6 +6,8 @@ Alert 異常通報爬蟲。
 # 存檔至 data/alerts/YYYY-MM-DD/HHMMSS.json
 """
 
+from config import LIVE_STORE_ENABLED, LIVE_STORE_DIR
+from crawlers import live_store
 from crawlers.base import BaseCrawler
 
 
@@ -13,7 +15,15 @@ class AlertCrawler(BaseCrawler):
     endpoint = "/Alert"
     save_subdir = "alerts"
     root_key = "Alerts"
+    record_marker = "AlertID"
     timestamp_file = True
+    dedup_mode = "pointer"  # 通報內容未更新時只寫指標檔
+    priority = 10
+
+    def post_save(self, path, status, records):
+        """TRA_LIVE_STORE=1 時，立即正規化並寫入 live store（crawlers/live_store.py）。"""
+        if LIVE_STORE_ENABLED:
+            live_store.ingest(LIVE_STORE_DIR, "alerts", path, status, records)
 
 
 # ── 向後相容函數介面 ──────────────────────────────────────────
@@ -7,13 +7,21 @@ fetch → save → crawl 的流程由基礎類別處理。
 
 import json
 import os
-from abc import ABC, abstractmethod
-from datetime import datetime
+import time
 
 import requests
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
 
-from config import BASE_URL, DATA_DIR
-from auth import auth_header
+from config import BASE_URL, DATA_DIR, STORAGE_FORMAT
+from auth import auth_header, invalidate_token
+from http_client import get_session, default_timeout, throttle
+from crawlers import delta, jsonio, manifest, storage
+from crawlers.streaming import SnapshotScanner, content_hash
+from crawlers.resilience import (
+    DEFAULT_RETRY_POLICY, CircuitOpenError, circuit_breaker, is_endpoint_failure, parse_retry_after,
+    record_attempt,
+)
 
 
 class BaseCrawler(ABC):
@@ -24,19 +32,119 @@ class BaseCrawler(ABC):
     root_key: str = ""          # JSON 回應的根 key，例如 "StationLiveBoards"
     timestamp_file: bool = True # True → HHMMSS.json，False → 固定檔名
     fixed_filename: str = ""    # 當 timestamp_file=False 時使用
+    timeout: tuple = None       # (connect, read) 秒；None → config 預設值
+    priority: int = 100         # orchestrator 送出順序，數字小者優先
+    select_fields: tuple = ()   # OData $select：只下載下游會用到的欄位；空 → 全欄位
+    odata_filter: str = ""      # OData $filter（選用），例如 "DelayTime gt 0"
+    dedup_mode: str = ""        # 內容未變時："" 照常寫檔、"pointer" 寫指標檔、"skip" 不寫檔
+    storage_mode: str = "full"  # "full" 完整快照；"delta" keyframe + 差分（見 crawlers/delta.py）
+    keyframe_interval: int = 12 # delta 模式：每 N 份快照（不含指標檔）存一份 keyframe
+    serializer: str = STORAGE_FORMAT  # 存檔格式，見 crawlers/storage.py（json / json.gz / json.zst / msgpack）
+    retry_policy = DEFAULT_RETRY_POLICY  # 重試 / 退避 / 總時間上限，見 crawlers/resilience.py
+    record_marker: str = ""     # 每筆紀錄恰好出現一次的欄位名；有設定才走串流存檔（見 crawlers/streaming.py）
+    stream_save: bool = True    # False → 一律整份解析後再序列化
 
     # ── API 呼叫 ──────────────────────────────────────────────
 
+    def projection(self) -> dict:
+        """本爬蟲使用的 OData 投影參數；未設定時為空 dict。"""
+        proj = {}
+        if self.select_fields:
+            proj["$select"] = ",".join(self.select_fields)
+        if self.odata_filter:
+            proj["$filter"] = self.odata_filter
+        return proj
+
     def fetch(self) -> dict:
         """呼叫 TDX API 並回傳 JSON dict。
         資料界接來源：BASE_URL + self.endpoint（定義於各子類別），
         例如 /StationLiveBoard 提供臺鐵列車即時到離站資料。
+        透過 http_client 的共用 Session 發送（連線池 + keep-alive + gzip），
+        失敗時依 retry_policy 重試，endpoint 冷卻中則丟出 CircuitOpenError。
         """
+        return jsonio.loads(self._fetch_body())
+
+    def _fetch_body(self) -> bytes:
+        """fetch() 的原始回應位元組（crawl 用來算內容雜湊，不必再序列化一次）。"""
+        return self._guarded_request(lambda resp: resp.content)
+
+    def _guarded_request(self, consume, stream: bool = False):
+        """斷路器包裝：冷卻中丟出 CircuitOpenError；5xx / 429 / 連線層錯誤計入 endpoint 失敗
+        （含 consume(resp) 讀取串流時中斷），其他錯誤（400、404、解析失敗）不計。"""
+        try:
+            circuit_breaker.check(self.endpoint)
+        except CircuitOpenError as e:
+            record_attempt({"crawler": self.__class__.__name__, "endpoint": self.endpoint,
+                            "attempt": 0, "outcome": "circuit_open", "error": str(e)})
+            raise
+        try:
+            result = consume(self._request_with_retry(stream=stream))
+        except Exception as e:
+            if is_endpoint_failure(e):
+                circuit_breaker.record_failure(self.endpoint, f"{type(e).__name__}: {e}")
+            raise
+        circuit_breaker.record_success(self.endpoint)
+        return result
+
+    def _request_with_retry(self, stream: bool = False) -> requests.Response:
         url = f"{BASE_URL}{self.endpoint}"
-        params = {"$format": "JSON"}
-        resp = requests.get(url, headers=auth_header(), params=params)
-        resp.raise_for_status()
-        return resp.json()
+        params = {"$format": "JSON", **self.projection()}
+        policy = self.retry_policy
+        connect_timeout, read_timeout = self.timeout or default_timeout()
+        deadline = time.monotonic() + policy.deadline
+        reauthed = False
+        attempt = 0
+        while True:
+            attempt += 1
+            throttle()
+            log = {"crawler": self.__class__.__name__, "endpoint": self.endpoint, "attempt": attempt}
+            start = time.perf_counter()
+            # read timeout 不超過剩餘的總時間預算
+            remaining = max(1.0, deadline - time.monotonic())
+            retry_after = None
+            try:
+                resp = get_session().get(url, headers=auth_header(), params=params, stream=stream,
+                                         timeout=(connect_timeout, min(read_timeout, remaining)))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, resp = e, None
+                log.update(outcome="network_error", error=f"{type(e).__name__}: {e}")
+            else:
+                log["status"] = resp.status_code
+                if not (stream and resp.ok):  # 串流成功時本體留給呼叫端逐塊讀取
+                    log["bytes"] = len(resp.content)
+                if resp.ok:
+                    log["outcome"] = "ok"
+                elif resp.status_code == 401 and not reauthed:
+                    # 磁碟快取的 token 可能已被撤銷：清掉快取重取一次（不計入退避）
+                    invalidate_token()
+                    reauthed = True
+                    log["outcome"] = "reauth"
+                elif policy.should_retry_status(resp.status_code):
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    log.update(outcome="retryable_status", retry_after=retry_after)
+                else:
+                    log["outcome"] = "http_error"
+            log["elapsed"] = round(time.perf_counter() - start, 3)
+
+            if resp is not None and log["outcome"] in ("ok", "http_error"):
+                record_attempt(log)
+                resp.raise_for_status()
+                return resp
+            if log["outcome"] == "reauth":
+                record_attempt(log)
+                attempt -= 1
+                continue
+
+            wait = policy.backoff(attempt, retry_after)
+            if attempt >= policy.max_attempts or time.monotonic() + wait >= deadline:
+                log["gave_up"] = True
+                record_attempt(log)
+                if resp is not None:
+                    resp.raise_for_status()
+                raise error
+            log["backoff"] = round(wait, 3)
+            record_attempt(log)
+            time.sleep(wait)
 
     # ── 存檔 ──────────────────────────────────────────────────
 
@@ -54,19 +162,259 @@ class BaseCrawler(ABC):
 
     def save(self, data: dict) -> str:
         """將 JSON 資料存檔，回傳檔案路徑。"""
-        path = self._build_save_path()
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False)
+        return self._store(data)[0]
+
+    def _store(self, data: dict, fingerprint: dict = None) -> tuple:
+        """存檔並回傳 (path, status)，status 為 written / pointer / skipped。
+        fingerprint 為 _fingerprint() 的結果（crawl 由原始回應算好傳入）；None 時在此計算一次，
+        去重複與爬取清單共用。
+        有設定投影時，於檔頭記錄 _Projection，事後可辨識此檔缺少哪些欄位。
+        """
+        fingerprint = fingerprint or self._fingerprint(data)
+        if self.dedup_mode:
+            last = self._load_last_snapshot()
+            if self._is_unchanged(fingerprint, last):
+                last_path = os.path.join(DATA_DIR, self.save_subdir, last["Path"])
+                if self.dedup_mode == "skip":
+                    return last_path, "skipped"
+                pointer = self._write_pointer(data, fingerprint, last)
+                self._record_manifest(pointer, "pointer", len(data.get(self.root_key, [])), fingerprint)
+                self._run_post_save(pointer, "pointer", None)
+                return pointer, "pointer"
+
+        proj = self.projection()
+        records = data.get(self.root_key, [])
+        if proj:
+            data = {"_Projection": proj, **data}
+        path = self._target_path()
+        if self.storage_mode == "delta" and self.timestamp_file:
+            data = self._delta_payload(data, path)
+        storage.dump_payload(data, path, self._serializer())
+        if not self.timestamp_file:
+            self._remove_stale_formats(path)
+        if self.dedup_mode:
+            self._save_last_snapshot(fingerprint, path)
+        self._record_manifest(path, "written", len(records), fingerprint)
+        self._run_post_save(path, "written", records)
+        return path, "written"
+
+    def _serializer(self) -> storage.Serializer:
+        return storage.get_serializer(self.serializer)
+
+    def _target_path(self) -> str:
+        """_build_save_path()（子類別可覆寫，一律回傳 .json）換成實際存檔格式的副檔名。"""
+        return storage.with_format(self._build_save_path(), self._serializer())
+
+    @staticmethod
+    def _remove_stale_formats(path: str) -> None:
+        """固定檔名資料換格式後，移除其他格式的舊檔，避免讀到過期內容。"""
+        base = storage.split_ext(path)[0]
+        for ext in storage.SNAPSHOT_EXTS:
+            old = base + ext
+            if old != path and os.path.exists(old):
+                os.remove(old)
+
+    def _record_manifest(self, path: str, status: str, count: int, fingerprint: dict) -> None:
+        """追加爬取清單（crawlers/manifest.py）；清單寫入失敗不影響本次存檔。"""
+        try:
+            entry = manifest.make_entry(
+                DATA_DIR, path, datetime.now(timezone.utc), status, count,
+                endpoint=self.endpoint, crawler=self.__class__.__name__,
+                src_update_time=fingerprint.get("SrcUpdateTime"),
+                content_hash=fingerprint.get("ContentHash"),
+            )
+            manifest.append(DATA_DIR, self.save_subdir, entry, self.root_key)
+        except Exception as e:
+            print(f"[{datetime.now()}] manifest 寫入失敗：{e}")
+
+    def post_save(self, path: str, status: str, records) -> None:
+        """存檔後處理（子類別覆寫）。status 為 written / pointer；
+        records 為完整紀錄 list，串流存檔或指標檔時為 None。"""
+
+    def _run_post_save(self, path: str, status: str, records) -> None:
+        try:
+            self.post_save(path, status, records)
+        except Exception as e:
+            print(f"[{datetime.now()}] {self.__class__.__name__} post_save 失敗：{e}")
+
+    # ── 快照去重複 ────────────────────────────────────────────
+    # 上游看板未更新時（SrcUpdateTime 相同，或紀錄內容雜湊相同），
+    # 不再寫一份完整 HHMMSS.json；改寫只有幾十 bytes 的指標檔（或直接略過）。
+    # 指標檔不含 root_key，processor 的讀取迴圈自然不會重複解析同一批資料。
+
+    def _fingerprint(self, data: dict, body: bytes = None) -> dict:
+        """SrcUpdateTime + 內容雜湊（streaming.content_hash，與串流存檔同一種）。
+        body 為原始回應位元組；沒有時（外部直接呼叫 save）以 jsonio 序列化紀錄後計算。"""
+        if body is None:
+            body = jsonio.dumpb({self.root_key: data.get(self.root_key, [])})
+        return {
+            "SrcUpdateTime": data.get("SrcUpdateTime"),
+            "ContentHash": content_hash(body, self.root_key),
+        }
+
+    @staticmethod
+    def _is_unchanged(fingerprint: dict, last: dict) -> bool:
+        if not last:
+            return False
+        if fingerprint["ContentHash"] == last.get("ContentHash"):
+            return True
+        src = fingerprint.get("SrcUpdateTime")
+        return bool(src) and src == last.get("SrcUpdateTime")
+
+    def _state_path(self) -> str:
+        return os.path.join(DATA_DIR, self.save_subdir, ".last_snapshot.json")
+
+    def _load_last_snapshot(self) -> dict:
+        """讀取上一份完整快照的指紋；檔案不存在或已被刪除時回傳空 dict。"""
+        try:
+            with open(self._state_path(), "r", encoding="utf-8") as f:
+                last = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not os.path.exists(os.path.join(DATA_DIR, self.save_subdir, last.get("Path", ""))):
+            return {}
+        return last
+
+    def _save_last_snapshot(self, fingerprint: dict, path: str) -> None:
+        state = dict(fingerprint, Path=os.path.relpath(path, os.path.join(DATA_DIR, self.save_subdir)))
+        tmp = self._state_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, self._state_path())
+
+    def _write_pointer(self, data: dict, fingerprint: dict, last: dict) -> str:
+        """內容未變：寫指標檔，記錄本次抓取時間與內容所在的原始快照。"""
+        pointer = {
+            "UpdateTime": data.get("UpdateTime"),
+            "SrcUpdateTime": fingerprint["SrcUpdateTime"],
+            "_Unchanged": {"SameAs": last["Path"], "ContentHash": fingerprint["ContentHash"]},
+        }
+        path = self._target_path()
+        storage.dump_payload(pointer, path, self._serializer())
         return path
 
+    # ── 差分存檔 ──────────────────────────────────────────────
+
+    def _delta_payload(self, data: dict, path: str) -> dict:
+        """依同資料夾既有的鏈決定寫 keyframe 或 delta。
+        每個日期資料夾以 keyframe 開頭，之後每 keyframe_interval 份再存一份。
+        """
+        chain = sorted((f for f in storage.glob_payloads(os.path.join(os.path.dirname(path), "*"))
+                        if f != path), key=storage.stem)
+        cache = {}
+
+        def load(f):
+            if f not in cache:
+                cache[f] = storage.load_payload(f)
+            return cache[f]
+
+        start, since_key, base_name = None, 0, None
+        for i in range(len(chain) - 1, -1, -1):
+            k = delta.kind(load(chain[i]))
+            if k == "pointer":
+                continue
+            base_name = base_name or os.path.basename(chain[i])
+            since_key += 1
+            if k in ("keyframe", "full"):
+                start = i
+                break
+        if start is None or since_key >= self.keyframe_interval:
+            return delta.make_keyframe(data)
+
+        prev = None
+        for _, _, records in delta.iter_chain(chain[start:], load, self.root_key):
+            prev = records
+        if prev is None:  # 鏈中斷：重新起一份 keyframe
+            return delta.make_keyframe(data)
+        return delta.make_delta(data, prev, base_name, self.root_key)
+
+    # ── 串流存檔 ──────────────────────────────────────────────
+    # 回應位元組逐塊寫入暫存檔（依格式即時壓縮），完成後 rename；
+    # 不呼叫 resp.json()、也不重新序列化。筆數 / SrcUpdateTime / 內容雜湊
+    # 由 SnapshotScanner 在寫入時以位元組掃描取得。delta 模式需要完整紀錄，不走此路徑。
+
+    def _can_stream(self) -> bool:
+        if not (self.stream_save and self.record_marker):
+            return False
+        if self.storage_mode == "delta" and self.timestamp_file:
+            return False
+        return storage.supports_stream(self._serializer())
+
+    def _fetch_and_store_stream(self) -> tuple:
+        """回傳 (path, status, count)。"""
+        path = self._target_path()
+        tmp = path + ".tmp"
+
+        def consume(resp):
+            try:
+                with open(tmp, "wb") as f:
+                    writer = storage.open_stream_writer(f, self._serializer())
+                    scanner = SnapshotScanner(writer, self.root_key, self.record_marker,
+                                              prefix={"_Projection": self.projection()}
+                                              if self.projection() else None)
+                    for chunk in resp.iter_content(chunk_size=64 * 1024):
+                        scanner.write(chunk)
+                    meta = scanner.close()
+                    writer.close()
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+            finally:
+                resp.close()
+            return meta
+
+        meta = self._guarded_request(consume, stream=True)
+        fingerprint = {"SrcUpdateTime": meta["SrcUpdateTime"], "ContentHash": meta["ContentHash"]}
+
+        if self.dedup_mode:
+            last = self._load_last_snapshot()
+            if self._is_unchanged(fingerprint, last):
+                os.remove(tmp)
+                if self.dedup_mode == "skip":
+                    return os.path.join(DATA_DIR, self.save_subdir, last["Path"]), "skipped", meta["count"]
+                pointer = self._write_pointer({"UpdateTime": meta["UpdateTime"]}, fingerprint, last)
+                self._record_manifest(pointer, "pointer", meta["count"], fingerprint)
+                self._run_post_save(pointer, "pointer", None)
+                return pointer, "pointer", meta["count"]
+
+        os.replace(tmp, path)
+        if not self.timestamp_file:
+            self._remove_stale_formats(path)
+        if self.dedup_mode:
+            self._save_last_snapshot(fingerprint, path)
+        self._record_manifest(path, "written", meta["count"], fingerprint)
+        self._run_post_save(path, "written", None)
+        return path, "written", meta["count"]
+
     # ── 完整流程 ──────────────────────────────────────────────
 
-    def crawl(self) -> None:
-        """fetch + save + log，含基本錯誤處理。"""
+    def crawl(self) -> dict:
+        """fetch + save + log，含基本錯誤處理。
+        回傳本次執行摘要 dict（供 orchestrator 彙整報告）。
+        """
+        name = self.__class__.__name__
+        result = {"crawler": name, "endpoint": self.endpoint, "ok": False,
+                  "path": None, "count": 0, "status": None, "error": None, "elapsed": 0.0}
+        start = time.perf_counter()
         try:
-            data = self.fetch()
-            path = self.save(data)
-            count = len(data.get(self.root_key, []))
-            print(f"[{datetime.now()}] {self.__class__.__name__} saved: {path} ({count} records)")
+            if self._can_stream():
+                path, status, count = self._fetch_and_store_stream()
+            else:
+                body = self._fetch_body()
+                data = jsonio.loads(body)
+                path, status = self._store(data, self._fingerprint(data, body))
+                count = len(data.get(self.root_key, []))
+            result.update(ok=True, path=path, count=count, status=status)
+            if status == "written":
+                print(f"[{datetime.now()}] {name} saved: {path} ({count} records)")
+            else:
+                print(f"[{datetime.now()}] {name} unchanged ({status}): {path} ({count} records)")
+        except CircuitOpenError as e:
+            result.update(status="circuit_open", error=str(e))
+            print(f"[{datetime.now()}] {name} SKIPPED: {e}")
         except Exception as e:
-            print(f"[{datetime.now()}] {self.__class__.__name__} ERROR: {e}")
+            result["error"] = f"{type(e).__name__}: {e}"
+            print(f"[{datetime.now()}] {name} ERROR: {result['error']}")
+        result["elapsed"] = time.perf_counter() - start
+        return result
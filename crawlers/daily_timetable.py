@@ -11,6 +11,8 @@ class DailyTimetableCrawler(BaseCrawler):
     endpoint = "/DailyTrainTimetable/Today"
     save_subdir = "timetable"
     root_key = "TrainTimetables"
+    record_marker = "TrainInfo"
+    priority = 20
 
     def _build_save_path(self):
         """依日期存檔：timetable/daily_2026-03-01.json"""
@@ -0,0 +1,165 @@
+"""
+StationLiveBoard 差分存檔編解碼（不依賴 pandas，crawler 與 processor 共用）。
+
+存檔格式（同一日期資料夾內為一條鏈）：
+  keyframe : {"_Delta": {"Kind": "keyframe", ...}, "StationLiveBoards": [...]}
+             與一般快照相同，舊版讀取程式可直接解析。
+  delta    : {"_Delta": {"Kind": "delta", "Base": "<前一份檔名>", ...},
+              "Inserted": [...], "Changed": [...], "Removed": [...]}
+             Inserted 為完整紀錄；Changed 只記錄有變動的欄位（Set / Unset）；
+             Removed 只記錄 key。
+
+紀錄 key 為 (TrainNo, StationID, n)：n 是同一 (TrainNo, StationID) 在該快照中
+第幾次出現 —— 上游偶爾會在同一份看板重複列出同一車次×車站（DelayTime 不同），
+加上 n 才能完整還原。還原結果與原快照為相同的紀錄集合，重複 key 之間的相對
+順序保持不變；不同 key 之間的排列順序不保證與原檔相同。
+"""
+
+DELTA_VERSION = 1
+DEFAULT_KEY_FIELDS = ("TrainNo", "StationID")
+
+
+class _Missing:
+    pass
+
+
+_MISSING = _Missing()
+
+
+def _keyed(records: list, key_fields) -> dict:
+    """list → {(key..., n): record}，保留原始順序。"""
+    seen = {}
+    out = {}
+    for r in records:
+        base = tuple(r.get(k) for k in key_fields)
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        out[base + (n,)] = r
+    return out
+
+
+def encode(prev_records: list, cur_records: list, key_fields=DEFAULT_KEY_FIELDS) -> dict:
+    """計算 prev → cur 的差分。"""
+    prev = _keyed(prev_records, key_fields)
+    cur = _keyed(cur_records, key_fields)
+    inserted, changed = [], []
+    for key, rec in cur.items():
+        old = prev.get(key)
+        if old is None:
+            inserted.append(rec)
+        elif old != rec:
+            entry = {"Key": list(key),
+                     "Set": {f: v for f, v in rec.items() if old.get(f, _MISSING) != v}}
+            unset = [f for f in old if f not in rec]
+            if unset:
+                entry["Unset"] = unset
+            changed.append(entry)
+    removed = [list(key) for key in prev if key not in cur]
+    return {"Inserted": inserted, "Changed": changed, "Removed": removed}
+
+
+def apply(prev_records: list, delta: dict, key_fields=DEFAULT_KEY_FIELDS) -> list:
+    """將差分套用到前一份快照，回傳新快照的紀錄 list。"""
+    state = _keyed(prev_records, key_fields)
+    for key in delta.get("Removed", []):
+        state.pop(tuple(key), None)
+    for entry in delta.get("Changed", []):
+        key = tuple(entry["Key"])
+        rec = dict(state.get(key, {}))
+        rec.update(entry.get("Set", {}))
+        for f in entry.get("Unset", []):
+            rec.pop(f, None)
+        state[key] = rec
+    records = list(state.values())
+    records.extend(delta.get("Inserted", []))
+    return records
+
+
+# ── 檔案層級 ──────────────────────────────────────────────────
+
+def kind(payload: dict) -> str:
+    """回傳 "keyframe" / "delta" / "pointer" / "full"（一般快照）。"""
+    meta = payload.get("_Delta")
+    if meta:
+        return meta.get("Kind", "full")
+    if "_Unchanged" in payload:
+        return "pointer"
+    return "full"
+
+
+def make_keyframe(data: dict, key_fields=DEFAULT_KEY_FIELDS) -> dict:
+    meta = {"Kind": "keyframe", "Version": DELTA_VERSION, "Key": list(key_fields)}
+    return {"_Delta": meta, **data}
+
+
+def make_delta(data: dict, prev_records: list, base_name: str, root_key: str,
+               key_fields=DEFAULT_KEY_FIELDS) -> dict:
+    meta = {"Kind": "delta", "Version": DELTA_VERSION, "Key": list(key_fields),
+            "Base": base_name}
+    header = {k: v for k, v in data.items() if k != root_key}
+    return {"_Delta": meta, **header,
+            **encode(prev_records, data.get(root_key, []), key_fields)}
+
+
+def iter_chain(paths: list, load, root_key: str):
+    """依時間順序走過同一資料夾的快照檔，逐檔產生 (path, payload, records)。
+
+    payload 為檔案原始內容；records 為還原後的完整紀錄 list
+    （delta 套用前一份、pointer 沿用前一份、keyframe / 一般快照直接取 root_key）。
+    鏈中斷（前一份缺檔或無法解析）時 records 為 None，直到下一份 keyframe。
+    paths 必須已排序且屬於同一條鏈（同一日期資料夾）。
+    """
+    prev = None
+    for path in paths:
+        payload = load(path)
+        k = kind(payload)
+        if k == "delta":
+            key_fields = payload["_Delta"].get("Key", DEFAULT_KEY_FIELDS)
+            records = apply(prev, payload, key_fields) if prev is not None else None
+        elif k == "pointer":
+            records = prev
+        else:
+            records = payload.get(root_key)
+        prev = records
+        yield path, payload, records
+
+
+def iter_changes(paths: list, load, root_key: str):
+    """直接串流變更紀錄：逐檔產生 (path, inserted_or_changed_records, removed_keys)。
+
+    delta 檔不需還原整份快照；keyframe / 一般快照視為全部插入。
+    Changed 項目會與前一份狀態合併成完整紀錄後輸出。
+    """
+    state = {}
+    key_fields = DEFAULT_KEY_FIELDS
+    for path in paths:
+        payload = load(path)
+        k = kind(payload)
+        if k == "pointer":
+            yield path, [], []
+            continue
+        if k == "delta":
+            key_fields = payload["_Delta"].get("Key", key_fields)
+            for key in payload.get("Removed", []):
+                state.pop(tuple(key), None)
+            upserts = []
+            for entry in payload.get("Changed", []):
+                key = tuple(entry["Key"])
+                rec = dict(state.get(key, {}))
+                rec.update(entry.get("Set", {}))
+                for f in entry.get("Unset", []):
+                    rec.pop(f, None)
+                state[key] = rec
+                upserts.append(rec)
+            inserted = payload.get("Inserted", [])
+            upserts.extend(inserted)
+            # 與 apply() 相同：保留列在前、插入列在後，重新編 n
+            state = _keyed(list(state.values()) + inserted, key_fields)
+            yield path, upserts, payload.get("Removed", [])
+        else:
+            if k == "keyframe":
+                key_fields = payload["_Delta"].get("Key", key_fields)
+            records = payload.get(root_key, [])
+            removed = list(state)
+            state = _keyed(records, key_fields)
+            yield path, list(records), [list(key) for key in removed if key not in state]
@@ -0,0 +1,84 @@
+"""
+衍生特徵快取（feature cache）— 以來源檔內容雜湊為鍵，把計算好的 DataFrame 存成 Parquet。
+
+結構：<FEATURE_CACHE_DIR>/<name>/<sha256 前 24 碼>-v<版本>.<表名>.parquet
+  例：timetable/3f2a…-v1.stops.parquet、timetable/3f2a…-v1.mix.parquet
+- 鍵只看來源檔位元組與特徵程式版本，與檔名 / 路徑 / mtime 無關：
+  同一份時刻表換目錄、重新複製都能命中；新的 daily_*.json 內容不同，自然換一組鍵。
+- 計算方式（例如 processor.build_timetable_features）有變動時由呼叫端調高版本。
+- 每個 name 保留最近使用（讀取或寫入）的 keep 組（預設 config.FEATURE_CACHE_KEEP），
+  較久沒用到的在寫入時清掉；讀取命中會更新檔案 mtime。
+此快取可隨時刪除重建，不進版控（預設位於 .cache/）。pyarrow 僅在實際讀寫時才 import。
+"""
+
+import glob
+import hashlib
+import os
+
+from config import FEATURE_CACHE_KEEP
+
+KEEP_ENTRIES = FEATURE_CACHE_KEEP
+
+
+def cache_key(path: str, version) -> str:
+    """來源檔內容雜湊 + 特徵程式版本。"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return f"{h.hexdigest()[:24]}-v{version}"
+
+
+def _path(cache_dir: str, name: str, key: str, table: str) -> str:
+    return os.path.join(cache_dir, name, f"{key}.{table}.parquet")
+
+
+def load(cache_dir: str, name: str, key: str, tables) -> dict:
+    """讀回 {表名: DataFrame}；任一表不存在或讀取失敗回傳 None。"""
+    import pyarrow.parquet as pq
+    out = {}
+    for table in tables:
+        path = _path(cache_dir, name, key, table)
+        if not os.path.exists(path):
+            return None
+        try:
+            out[table] = pq.read_table(path).to_pandas()
+        except Exception:
+            return None
+    for table in tables:        # 標記為最近使用，_prune 依此保留
+        try:
+            os.utime(_path(cache_dir, name, key, table))
+        except OSError:
+            pass
+    return out
+
+
+def save(cache_dir: str, name: str, key: str, frames: dict, source: str = "",
+         keep: int = KEEP_ENTRIES):
+    """寫入 {表名: DataFrame}（各自原子寫入），同一 name 下只留最近使用的 keep 組。"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    folder = os.path.join(cache_dir, name)
+    os.makedirs(folder, exist_ok=True)
+    for table, df in frames.items():
+        path = _path(cache_dir, name, key, table)
+        pa_table = pa.Table.from_pandas(df, preserve_index=False)
+        meta = dict(pa_table.schema.metadata or {})
+        meta[b"source"] = os.path.basename(source).encode("utf-8")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(pa_table.replace_schema_metadata(meta), tmp, compression="zstd")
+        os.replace(tmp, path)
+    _prune(folder, keep)
+
+
+def _prune(folder: str, keep: int = KEEP_ENTRIES):
+    keys = {}
+    for path in glob.glob(os.path.join(folder, "*.parquet")):
+        key = os.path.basename(path).split(".", 1)[0]
+        keys[key] = max(keys.get(key, 0), os.path.getmtime(path))
+    for key in sorted(keys, key=keys.get, reverse=True)[keep:]:
+        for path in glob.glob(os.path.join(folder, f"{key}.*.parquet")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
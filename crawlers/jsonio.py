@@ -0,0 +1,84 @@
+"""
+JSON 編解碼入口 — 有安裝 orjson（pip install orjson）時使用 orjson，否則退回標準函式庫 json。
+快照讀寫（crawlers/storage.py）、爬蟲回應解析、爬取清單都經由這裡。
+
+  loads(raw)          bytes / str → 物件
+  dumps(obj)          物件 → str（中文不跳脫，等同 ensure_ascii=False）
+  dumpb(obj)          物件 → UTF-8 bytes
+  dumpb_spaced(obj)   物件 → UTF-8 bytes，與舊版 json.dump(ensure_ascii=False) 逐位元組相同
+  load(f)             已開啟的檔案 → 物件
+
+- dumpb 兩種後端輸出同為緊湊格式（無多餘空白），換後端不會讓內容忽大忽小；
+  .json 快照檔改用 dumpb_spaced（", " / ": " 分隔，標準函式庫），
+  已進版控的 JSON 檔重寫時內容沒變就不會產生差異。
+- orjson 不支援的內容（NaN / Infinity、超過 64 位元的整數、非字串 key）
+  自動改用標準函式庫處理，可讀寫的資料範圍與過去相同；
+  NaN / Infinity 兩種後端都寫成 NaN / Infinity（orjson 本身會寫成 null，這裡另外攔下）。
+- 內容雜湊（crawlers/streaming.content_hash）直接雜湊原始回應位元組；只有外部直接呼叫
+  BaseCrawler.save 與清單補建時才經 dumpb 序列化，兩種後端對一般 JSON 資料輸出相同。
+
+config.JSON_BACKEND（環境變數 TRA_JSON_BACKEND）設為 json 可強制使用標準函式庫。
+"""
+
+import json
+import math
+
+from config import JSON_BACKEND
+
+try:
+    if JSON_BACKEND == "json":
+        raise ImportError
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+_SEPARATORS = (",", ":")
+
+
+def loads(raw):
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except ValueError:
+            pass    # NaN 等 orjson 不接受的寫法；真正損毀的內容由下方丟出例外
+    if isinstance(raw, (bytearray, memoryview)):
+        raw = bytes(raw)
+    return json.loads(raw)
+
+
+def _has_non_finite(obj) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(_has_non_finite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(v) for v in obj)
+    return False
+
+
+def dumpb(obj) -> bytes:
+    if orjson is not None:
+        try:
+            out = orjson.dumps(obj)
+        except TypeError:
+            out = None
+        # orjson 不會對 NaN / Infinity 丟例外，而是默默寫成 null；
+        # 輸出有 null 時才逐一檢查，確定有非有限浮點數就改用標準函式庫（寫成 NaN）
+        if out is not None and not (b"null" in out and _has_non_finite(obj)):
+            return out
+    return json.dumps(obj, ensure_ascii=False, separators=_SEPARATORS).encode("utf-8")
+
+
+def dumpb_spaced(obj) -> bytes:
+    # orjson 沒有 ", " / ": " 分隔的選項，一律用標準函式庫（NaN / Infinity 照樣寫成 NaN / Infinity）
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def dumps(obj) -> str:
+    return dumpb(obj).decode("utf-8")
+
+
+def load(f):
+    return loads(f.read())
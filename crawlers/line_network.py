@@ -9,6 +9,7 @@ class LineNetworkCrawler(BaseCrawler):
     endpoint = "/LineNetwork"
     save_subdir = "static"
     root_key = "LineNetworks"
+    record_marker = "LineSegments"
     timestamp_file = False
     fixed_filename = "line_network.json"
 
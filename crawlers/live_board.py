@@ -14,6 +14,7 @@ class LiveBoardCrawler(BaseCrawler):
     endpoint = "/TrainLiveBoard"
     save_subdir = "live_board"
     root_key = "TrainLiveBoards"
+    record_marker = "TrainNo"
     timestamp_file = True
 
 
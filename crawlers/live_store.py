@@ -0,0 +1,270 @@
+"""
+即時資料欄式儲存（live store）— 存檔當下就把快照正規化成列，寫成 Parquet。
+
+結構：<LIVE_STORE_DIR>/<kind>/TaiwanDate=YYYY-MM-DD/
+        <資料夾日期>_<HHMMSS>.parquet   每份原始快照一個 part（指標檔為 0 列）
+        compact.parquet                 已結束的台灣日期合併成單檔
+  kind = station_live / alerts。每列帶 _Source（<資料夾日期>_<HHMMSS>），
+  compact.parquet 的 schema metadata 記錄涵蓋哪些快照，因此「某份快照是否已入庫」
+  不需讀資料即可判斷；processor 逐資料夾決定讀 Parquet 或退回解析 JSON。
+
+寫入新 part 時，較早（已結束）的台灣日期若仍有零散 part 就順手合併，
+避免讀取端開大量小檔。
+
+正規化規則與 processor 共用 crawlers/normalize.py。
+此儲存可隨時由原始 JSON 重建，不進版控（預設位於 .cache/）。
+pyarrow 僅在實際寫入 / 讀取時才 import。
+"""
+
+import json
+import os
+import sys
+
+from crawlers import delta, normalize, storage
+
+KINDS = {
+    # kind: 原始快照的 root_key
+    "station_live": "StationLiveBoards",
+    "alerts": "Alerts",
+}
+COMPACT_NAME = "compact.parquet"
+_PARTITION_PREFIX = "TaiwanDate="
+
+
+def _schema(kind: str):
+    import pyarrow as pa
+    if kind == "alerts":
+        return pa.schema([
+            ("_Source", pa.string()),
+            ("PublishTime", pa.string()),
+            ("Category", pa.string()),
+            ("Description", pa.string()),
+        ])
+    return pa.schema([
+        ("_Source", pa.string()),
+        ("Date", pa.string()),
+        ("TaiwanDate", pa.string()),
+        ("CrawlTime", pa.string()),
+        ("TrainNo", pa.string()),
+        ("StationID", pa.string()),
+        ("StationName", pa.string()),
+        ("TrainTypeRaw", pa.string()),
+        ("TrainType", pa.string()),
+        ("Direction", pa.int64()),
+        ("TripLine", pa.int64()),
+        ("EndingStationID", pa.string()),
+        ("ScheduleArrivalTime", pa.string()),
+        ("ScheduleDepartureTime", pa.string()),
+        ("RunningStatus", pa.int64()),
+        ("UpdateTime", pa.string()),
+        ("DelayTime", pa.int64()),
+    ])
+
+
+def source_key(snapshot_path: str) -> str:
+    """原始快照路徑 → _Source，例如 2026-03-02_100437。"""
+    return f"{os.path.basename(os.path.dirname(snapshot_path))}_{storage.stem(snapshot_path)}"
+
+
+def _partition_dir(store_dir: str, kind: str, snapshot_path: str) -> str:
+    tw_date = normalize.taiwan_date(os.path.basename(os.path.dirname(snapshot_path)),
+                                    storage.stem(snapshot_path))
+    return os.path.join(store_dir, kind, f"{_PARTITION_PREFIX}{tw_date}")
+
+
+def part_path_for(store_dir: str, kind: str, snapshot_path: str) -> str:
+    """原始快照路徑 → 對應的零散 part 路徑。"""
+    return os.path.join(_partition_dir(store_dir, kind, snapshot_path),
+                        f"{source_key(snapshot_path)}.parquet")
+
+
+def snapshot_rows(kind: str, records: list, date_folder: str, crawl_time: str) -> list:
+    if kind == "alerts":
+        rows = normalize.alert_rows(records)
+    else:
+        rows = normalize.live_board_rows(records, date_folder, crawl_time)
+        for row in rows:
+            row["TrainType"] = normalize.simplify_type(row["TrainTypeRaw"])
+    source = f"{date_folder}_{crawl_time}"
+    for row in rows:
+        row["_Source"] = source
+    return rows
+
+
+def _write_table(table, path: str, sources=None) -> None:
+    import pyarrow.parquet as pq
+    if sources is not None:
+        table = table.replace_schema_metadata({b"sources": json.dumps(sorted(sources)).encode()})
+    tmp = path + ".tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+def write_part(store_dir: str, kind: str, snapshot_path: str, rows: list) -> str:
+    import pyarrow as pa
+    path = part_path_for(store_dir, kind, snapshot_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    _write_table(pa.Table.from_pylist(rows, schema=_schema(kind)), path)
+    return path
+
+
+def ingest(store_dir: str, kind: str, snapshot_path: str, status: str, records=None) -> str:
+    """爬蟲存檔後呼叫：指標檔寫 0 列 part；records 為 None 時讀回剛寫入的檔案。"""
+    if status == "pointer":
+        rows = []
+    else:
+        if records is None:
+            records = storage.load_payload(snapshot_path).get(KINDS[kind], [])
+        date_folder = os.path.basename(os.path.dirname(snapshot_path))
+        rows = snapshot_rows(kind, records, date_folder, storage.stem(snapshot_path))
+    path = write_part(store_dir, kind, snapshot_path, rows)
+    compact_closed(store_dir, kind, before=os.path.basename(os.path.dirname(path)))
+    return path
+
+
+# ── 合併 ──────────────────────────────────────────────────────
+
+def _partition_index(pdir: str) -> tuple:
+    """回傳 ({_Source: 零散 part 路徑}, compact 涵蓋的 _Source set)。"""
+    import pyarrow.parquet as pq
+    loose, compacted = {}, set()
+    try:
+        names = os.listdir(pdir)
+    except OSError:
+        return loose, compacted
+    for name in names:
+        if name == COMPACT_NAME:
+            meta = pq.read_schema(os.path.join(pdir, name)).metadata or {}
+            compacted = set(json.loads(meta.get(b"sources", b"[]")))
+        elif name.endswith(".parquet"):
+            loose[name[: -len(".parquet")]] = os.path.join(pdir, name)
+    return loose, compacted
+
+
+def compact_partition(pdir: str) -> int:
+    """將分區內零散 part 併入 compact.parquet，回傳併入的 part 數。"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    loose, compacted = _partition_index(pdir)
+    if not loose:
+        return 0
+    tables = []
+    compact_path = os.path.join(pdir, COMPACT_NAME)
+    if compacted:
+        tables.append(pq.read_table(compact_path).replace_schema_metadata(None))
+    for source in sorted(loose):
+        tables.append(pq.read_table(loose[source]).replace_schema_metadata(None))
+    table = pa.concat_tables(tables)
+    # 依 _Source 穩定排序：同一份快照內的列序不變
+    order = pc.sort_indices(table, sort_keys=[("_Source", "ascending")])
+    _write_table(table.take(order), compact_path, compacted | set(loose))
+    for path in loose.values():
+        os.remove(path)
+    return len(loose)
+
+
+def compact_closed(store_dir: str, kind: str, before: str = None) -> int:
+    """合併 before（分區目錄名）之前的所有分區；before=None 表示全部合併。"""
+    base = os.path.join(store_dir, kind)
+    try:
+        partitions = sorted(n for n in os.listdir(base) if n.startswith(_PARTITION_PREFIX))
+    except OSError:
+        return 0
+    return sum(compact_partition(os.path.join(base, n)) for n in partitions
+               if before is None or n < before)
+
+
+# ── 讀取 ──────────────────────────────────────────────────────
+
+def load_sources(store_dir: str, kind: str, snapshot_paths: list):
+    """讀出指定快照（同一資料夾、已排序）的正規化列，列序與逐檔解析相同。
+    任一份快照尚未入庫時回傳 None。"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    wanted = {}
+    for p in snapshot_paths:
+        wanted.setdefault(_partition_dir(store_dir, kind, p), set()).add(source_key(p))
+    tables = []
+    for pdir in sorted(wanted):
+        keys = wanted[pdir]
+        loose, compacted = _partition_index(pdir)
+        if not keys <= (compacted | set(loose)):
+            return None
+        from_compact = keys & compacted
+        if from_compact:
+            table = pq.read_table(os.path.join(pdir, COMPACT_NAME)).replace_schema_metadata(None)
+            if from_compact != compacted:
+                table = table.filter(pc.is_in(table["_Source"], pa.array(sorted(from_compact))))
+            tables.append(table)
+        for key in sorted(keys - compacted):
+            tables.append(pq.read_table(loose[key]).replace_schema_metadata(None))
+    tables = [t for t in tables if t.num_rows]
+    if not tables:
+        return _schema(kind).empty_table().to_pandas().drop(columns=["_Source"])
+    table = pa.concat_tables(tables)
+    order = pc.sort_indices(table, sort_keys=[("_Source", "ascending")])
+    return table.take(order).drop(["_Source"]).to_pandas()
+
+
+def covered_sources(store_dir: str, kind: str) -> set:
+    """已入庫的所有 _Source。"""
+    base = os.path.join(store_dir, kind)
+    covered = set()
+    try:
+        partitions = [n for n in os.listdir(base) if n.startswith(_PARTITION_PREFIX)]
+    except OSError:
+        return covered
+    for n in partitions:
+        loose, compacted = _partition_index(os.path.join(base, n))
+        covered |= compacted | set(loose)
+    return covered
+
+
+def backfill(data_dir: str, store_dir: str, kind: str, overwrite: bool = False) -> int:
+    """由既有原始快照補建 part（差分鏈會先還原）並合併；回傳新入庫的快照數。
+    overwrite=True 時先清空該 kind 重建。"""
+    import shutil
+    root_key = KINDS[kind]
+    if overwrite:
+        shutil.rmtree(os.path.join(store_dir, kind), ignore_errors=True)
+    covered = covered_sources(store_dir, kind)
+    groups = {}
+    for f in storage.glob_payloads(os.path.join(data_dir, kind, "*", "*")):
+        groups.setdefault(os.path.dirname(f), []).append(f)
+    written = 0
+    for folder, paths in sorted(groups.items()):
+        paths = sorted(paths, key=storage.stem)
+        if all(source_key(p) in covered for p in paths):
+            continue
+
+        def load(f):
+            try:
+                return storage.load_payload(f)
+            except Exception:
+                return {}
+
+        for path, payload, records in delta.iter_chain(paths, load, root_key):
+            if source_key(path) in covered:
+                continue
+            # 指標檔與無法還原的檔案：processor 同樣略過，寫 0 列 part 表示已處理
+            if records is None or delta.kind(payload) == "pointer":
+                write_part(store_dir, kind, path, [])
+            else:
+                date_folder = os.path.basename(os.path.dirname(path))
+                write_part(store_dir, kind, path,
+                           snapshot_rows(kind, records, date_folder, storage.stem(path)))
+            written += 1
+    compact_closed(store_dir, kind)
+    return written
+
+
+if __name__ == "__main__":
+    from config import DATA_DIR, LIVE_STORE_DIR
+
+    if len(sys.argv) < 2 or sys.argv[1] != "backfill":
+        print("使用方式: python -m crawlers.live_store backfill [station_live|alerts ...]")
+        sys.exit(1)
+    for kind in sys.argv[2:] or list(KINDS):
+        print(f"{kind}: {backfill(DATA_DIR, LIVE_STORE_DIR, kind)} 個 part")
@@ -0,0 +1,225 @@
+"""
+爬取清單（manifest）— 每次存檔追加一行 JSON，讀取端查清單而不 glob 資料目錄。
+
+位置：data/<subdir>/.manifest/<TaiwanDate>.jsonl（append-only，依台灣日期分檔）
+  - 放在各子目錄底下：GitHub Actions 各 workflow 只 git add 自己的子目錄
+    （live → data/station_live/），清單會跟著資料一起進版控。
+  - 以 . 開頭：processor 的 glob（<subdir>/*/*）與日期目錄掃描都不會誤判。
+
+每行欄位：
+  path           相對 DATA_DIR 的路徑，例如 station_live/2026-03-02/100437.json
+  endpoint / crawler
+  crawl_utc      實際抓取時間（UTC ISO 8601）
+  taiwan_date    crawl_utc + 8 小時的日期（分檔依據）
+  status         written / pointer
+  count          紀錄筆數（指標檔為所指內容的筆數）
+  src_update_time, bytes, content_hash
+
+某子目錄第一次寫入清單時（.manifest 尚不存在），會先掃描既有檔案補建。
+讀取端查單一日期時仍會與該資料夾的目錄列表比對（見 snapshot_paths），
+清單漏記的快照不會被略過。手動補建：python -m crawlers.manifest rebuild
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+from crawlers import delta, jsonio, storage
+from crawlers.streaming import content_hash
+
+MANIFEST_DIRNAME = ".manifest"
+TAIWAN_OFFSET = timedelta(hours=8)
+
+
+def manifest_dir(data_dir: str, subdir: str) -> str:
+    return os.path.join(data_dir, subdir, MANIFEST_DIRNAME)
+
+
+def available(data_dir: str, subdir: str) -> bool:
+    """該子目錄是否已有清單；沒有時讀取端應退回 glob。"""
+    return os.path.isdir(manifest_dir(data_dir, subdir))
+
+
+def make_entry(data_dir: str, path: str, crawl_utc: datetime, status: str, count,
+               endpoint: str = "", crawler: str = "", src_update_time=None,
+               content_hash=None) -> dict:
+    return {
+        "path": os.path.relpath(path, data_dir).replace(os.sep, "/"),
+        "endpoint": endpoint,
+        "crawler": crawler,
+        "crawl_utc": crawl_utc.astimezone(timezone.utc).isoformat(timespec="seconds"),
+        "taiwan_date": (crawl_utc.astimezone(timezone.utc) + TAIWAN_OFFSET).strftime("%Y-%m-%d"),
+        "status": status,
+        "count": count,
+        "src_update_time": src_update_time,
+        "bytes": os.path.getsize(path) if os.path.exists(path) else None,
+        "content_hash": content_hash,
+    }
+
+
+def append(data_dir: str, subdir: str, entry: dict, root_key: str = "") -> None:
+    """追加一筆；清單尚不存在時先掃描子目錄補建既有檔案。"""
+    if not available(data_dir, subdir):
+        rebuild(data_dir, subdir, root_key, exclude=(entry["path"],))
+    path = os.path.join(manifest_dir(data_dir, subdir), f"{entry['taiwan_date']}.jsonl")
+    line = jsonio.dumps(entry) + "\n"
+    # O_APPEND + 單次 write：多個 process 同時追加也不會交錯
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line.encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+# ── 查詢 ──────────────────────────────────────────────────────
+
+def _partitions(data_dir: str, subdir: str, taiwan_dates=None) -> list:
+    mdir = manifest_dir(data_dir, subdir)
+    if taiwan_dates is None:
+        try:
+            names = sorted(n for n in os.listdir(mdir) if n.endswith(".jsonl"))
+        except OSError:
+            return []
+        return [os.path.join(mdir, n) for n in names]
+    return [os.path.join(mdir, f"{d}.jsonl") for d in sorted(taiwan_dates)]
+
+
+def entries(data_dir: str, subdir: str, taiwan_dates=None) -> list:
+    """讀取清單紀錄；taiwan_dates 指定時只讀那幾天的分檔。損毀的行略過。"""
+    out = []
+    for part in _partitions(data_dir, subdir, taiwan_dates):
+        try:
+            with open(part, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        out.append(jsonio.loads(line))
+                    except ValueError:
+                        continue
+        except OSError:
+            continue
+    return out
+
+
+def latest_entries(data_dir: str, subdir: str, taiwan_dates=None) -> dict:
+    """{path: 最後一筆紀錄}；固定檔名資料（stations.json 等）被覆寫多次時取最新。"""
+    latest = {}
+    for e in entries(data_dir, subdir, taiwan_dates):
+        latest[e["path"]] = e
+    return latest
+
+
+def snapshot_paths(data_dir: str, subdir: str, folder_date=None) -> list:
+    """<subdir>/<date>/<HHMMSS> 快照的絕對路徑（已存在者）。
+
+    folder_date 為資料夾日期；資料夾日期與台灣日期最多差一天，
+    因此只讀前後三天的分檔再依資料夾過濾，並與該資料夾的目錄列表比對：
+    清單寫入失敗或手動複製進來的快照不在清單中，此時印出警告並改用目錄列表，
+    不會默默少讀資料。清單中已不存在的檔案略過。
+    folder_date 為 None（讀全部）時直接列出各日期資料夾：逐一比對每天的清單
+    比列目錄還慢，清單在此沒有好處。
+    """
+    base = os.path.join(data_dir, subdir)
+    if not folder_date:
+        return storage.glob_payloads(os.path.join(base, "*", "*"))
+    try:
+        d = datetime.strptime(folder_date, "%Y-%m-%d")
+    except ValueError:
+        return []
+    dates = [(d + timedelta(days=k)).strftime("%Y-%m-%d") for k in (-1, 0, 1)]
+    listed = storage.glob_payloads(os.path.join(base, folder_date, "*"))
+    on_disk = set(listed)
+    recorded = []
+    for rel in latest_entries(data_dir, subdir, dates):
+        parts = rel.split("/")
+        if len(parts) == 3 and parts[1] == folder_date:
+            full = os.path.join(data_dir, *parts)
+            if full in on_disk:
+                recorded.append(full)
+    if len(recorded) == len(on_disk):
+        return recorded
+    print(f"[warn] {subdir}/{folder_date}：{len(on_disk) - len(recorded)} 個快照不在爬取清單中，"
+          f"改用目錄列表（python -m crawlers.manifest rebuild {subdir} 可補建清單）")
+    return listed
+
+
+# ── 補建 ──────────────────────────────────────────────────────
+
+def _guess_crawl_utc(data_dir: str, path: str) -> datetime:
+    """<date>/<HHMMSS> 依 processor 慣例視為 UTC；固定檔名取 mtime。"""
+    try:
+        folder = os.path.basename(os.path.dirname(path))
+        dt = datetime.strptime(f"{folder} {storage.stem(path)}", "%Y-%m-%d %H%M%S")
+        return dt.replace(tzinfo=timezone.utc)
+    except ValueError:
+        return datetime.fromtimestamp(os.path.getmtime(path), tz=timezone.utc)
+
+
+def _detect_root_key(payload: dict) -> str:
+    for k, v in payload.items():
+        if not k.startswith("_") and isinstance(v, list):
+            return k
+    return ""
+
+
+def rebuild(data_dir: str, subdir: str, root_key: str = "", exclude=()) -> int:
+    """掃描子目錄既有檔案重建清單（覆蓋舊清單），回傳筆數。
+    exclude：不列入的相對路徑（append() 補建時，剛寫入的檔案由呼叫端自行追加）。"""
+    base = os.path.join(data_dir, subdir)
+    files = storage.glob_payloads(os.path.join(base, "*", "*")) + storage.glob_payloads(os.path.join(base, "*"))
+    groups = {}
+    for f in files:
+        groups.setdefault(os.path.dirname(f), []).append(f)
+
+    cache = {}
+
+    def load(f):
+        if f not in cache:
+            try:
+                cache[f] = storage.load_payload(f)
+            except Exception:
+                cache[f] = {}
+        return cache[f]
+
+    by_date = {}
+    for folder, paths in groups.items():
+        paths = sorted(paths, key=storage.stem)
+        key = root_key or next((_detect_root_key(load(p)) for p in paths if _detect_root_key(load(p))), "")
+        for path, payload, records in delta.iter_chain(paths, load, key):
+            unchanged = payload.get("_Unchanged") or {}
+            entry = make_entry(
+                data_dir, path, _guess_crawl_utc(data_dir, path),
+                status="pointer" if unchanged else "written",
+                count=len(records) if records is not None else None,
+                src_update_time=payload.get("SrcUpdateTime"),
+                content_hash=unchanged.get("ContentHash")
+                or (content_hash(jsonio.dumpb({key: records}), key) if records is not None else None),
+            )
+            if entry["path"] not in exclude:
+                by_date.setdefault(entry["taiwan_date"], []).append(entry)
+        cache.clear()
+
+    mdir = manifest_dir(data_dir, subdir)
+    os.makedirs(mdir, exist_ok=True)
+    for name in os.listdir(mdir):
+        if name.endswith(".jsonl") and name[:-6] not in by_date:
+            os.remove(os.path.join(mdir, name))
+    for taiwan_date, rows in by_date.items():
+        rows.sort(key=lambda e: (e["crawl_utc"], e["path"]))
+        tmp = os.path.join(mdir, f"{taiwan_date}.jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for e in rows:
+                f.write(jsonio.dumps(e) + "\n")
+        os.replace(tmp, os.path.join(mdir, f"{taiwan_date}.jsonl"))
+    return sum(len(rows) for rows in by_date.values())
+
+
+if __name__ == "__main__":
+    from config import DATA_DIR
+
+    if len(sys.argv) < 2 or sys.argv[1] != "rebuild":
+        print("使用方式: python -m crawlers.manifest rebuild [subdir ...]")
+        sys.exit(1)
+    subdirs = sys.argv[2:] or ["station_live", "alerts", "timetable", "static"]
+    for sub in subdirs:
+        if os.path.isdir(os.path.join(DATA_DIR, sub)):
+            print(f"{sub}: {rebuild(DATA_DIR, sub)} 筆")
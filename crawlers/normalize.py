@@ -0,0 +1,155 @@
+"""
+快照紀錄正規化 — processor 解析與爬蟲存檔後的 live store 共用同一套規則（不依賴 pandas）。
+
+- StationID 補零為 4 碼
+- 表定到離站時間取 HH:MM
+- 資料夾日期 + 檔名時間（視為 UTC）換算台灣日期
+- 車種名稱簡化為五類
+"""
+
+from datetime import datetime, timedelta
+
+
+def normalize_station_id(value, missing=None):
+    """StationID 去空白並補零為 4 碼；空值回傳 missing。"""
+    if value is None or (isinstance(value, float) and value != value):
+        return missing
+    station_id = str(value).strip()
+    return station_id.zfill(4) if station_id else missing
+
+
+# 車種簡化對照：統一歸為五類
+def simplify_type(type_name: str) -> str:
+    if not type_name: return "其他"
+    if '太魯閣' in type_name or '普悠瑪' in type_name: return "傾斜式自強"
+    if '自強' in type_name: return "自強"
+    if '區間快' in type_name: return "區間快"
+    if '區間' in type_name: return "區間"
+    if '莒光' in type_name: return "莒光"
+    return "其他"
+
+
+def taiwan_date(date_folder: str, crawl_time: str) -> str:
+    """資料夾日期 + HHMMSS 視為 UTC，回傳台灣日期；無法解析時沿用資料夾日期。"""
+    try:
+        utc_dt = datetime.strptime(f"{date_folder} {crawl_time}", "%Y-%m-%d %H%M%S")
+        return (utc_dt + timedelta(hours=8)).strftime("%Y-%m-%d")
+    except Exception:
+        return date_folder
+
+
+LIVE_BOARD_COLUMNS = (
+    "Date", "TaiwanDate", "CrawlTime", "TrainNo", "StationID", "StationName", "TrainTypeRaw",
+    "Direction", "TripLine", "EndingStationID", "ScheduleArrivalTime", "ScheduleDepartureTime",
+    "RunningStatus", "UpdateTime", "DelayTime",
+)
+
+
+def new_columns(names=LIVE_BOARD_COLUMNS) -> dict:
+    return {name: [] for name in names}
+
+
+def new_pool() -> dict:
+    """字串共用表：strings 讓重複字串只保留一個物件；station_ids 快取原始站碼 → 補零結果。
+    同一個 pool 只搭配同一種 missing 使用。"""
+    return {"strings": {}, "station_ids": {}}
+
+
+def live_board_columns(snapshot: list, date_folder: str, crawl_time: str, missing=None,
+                       out: dict = None, pool: dict = None) -> dict:
+    """StationLiveBoard / TrainLiveBoard 一份快照 → 正規化的欄式結果 {欄位: list}。
+    直接逐欄 append，不為每列建立 dict；out 指定時接在其後（多份快照共用一組 list）。
+    pool（new_pool()）可跨快照共用：StationName / TrainTypeRaw / 站碼的重複值只保留一個物件，
+    原始 payload 釋放後不必為每列各留一份字串。
+    與舊版逐檔 try/except 行為一致：某筆紀錄格式異常時，該檔其餘紀錄捨棄。
+    missing 為缺值代表（processor 傳 np.nan；live store 用 None）。
+    """
+    out = new_columns() if out is None else out
+    pool = new_pool() if pool is None else pool
+    intern = pool["strings"].setdefault
+    ids = pool["station_ids"]
+    tw_date = taiwan_date(date_folder, crawl_time)
+    tw_date, date_folder, crawl_time = (intern(v, v) for v in (tw_date, date_folder, crawl_time))
+    (add_date, add_tw_date, add_crawl, add_train, add_station, add_name, add_type,
+     add_direction, add_trip_line, add_ending, add_arr, add_dep, add_running,
+     add_update, add_delay) = [out[name].append for name in LIVE_BOARD_COLUMNS]
+
+    def station_id(value):
+        if type(value) is not str:
+            return normalize_station_id(value, missing)
+        if value not in ids:
+            ids[value] = normalize_station_id(value, missing)
+            if type(ids[value]) is str:
+                ids[value] = intern(ids[value], ids[value])
+        return ids[value]
+
+    try:
+        for r in snapshot:
+            # 一列的值全部取完才 append，格式異常時各欄長度仍一致
+            # ScheduleArrivalTime 格式為 HH:MM:SS，取前 5 碼統一為 HH:MM
+            arr_raw = r.get("ScheduleArrivalTime", "")
+            arr_hhmm = arr_raw[:5] if arr_raw else ""
+            dep_raw = r.get("ScheduleDepartureTime", "")
+            dep_hhmm = dep_raw[:5] if dep_raw else ""
+            station = station_id(r.get("StationID"))
+            ending = station_id(r.get("EndingStationID", ""))
+            name = r.get("StationName", {}).get("Zh_tw")
+            type_raw = r.get("TrainTypeName", {}).get("Zh_tw", "")
+            train_no = r.get("TrainNo")
+            direction = r.get("Direction", missing)
+            trip_line = r.get("TripLine", missing)
+            running = r.get("RunningStatus", 0)
+            update = r.get("UpdateTime", "")
+            delay = r.get("DelayTime", 0)
+
+            add_date(date_folder)
+            add_tw_date(tw_date)
+            add_crawl(crawl_time)
+            add_train(train_no)
+            add_station(station)
+            add_name(intern(name, name) if type(name) is str else name)
+            add_type(intern(type_raw, type_raw) if type(type_raw) is str else type_raw)
+            add_direction(direction)
+            add_trip_line(trip_line)
+            add_ending(ending)
+            add_arr(arr_hhmm)
+            add_dep(dep_hhmm)
+            add_running(running)
+            add_update(update)
+            add_delay(delay)
+    except Exception:
+        pass
+    return out
+
+
+def live_board_rows(snapshot: list, date_folder: str, crawl_time: str, missing=None) -> list:
+    """同 live_board_columns，回傳列（dict list），供 live store 寫入。"""
+    columns = live_board_columns(snapshot, date_folder, crawl_time, missing)
+    return [dict(zip(LIVE_BOARD_COLUMNS, values)) for values in zip(*columns.values())]
+
+
+def alert_category(desc: str) -> str:
+    cat = "其他"
+    if any(k in desc for k in ["號誌", "電力", "設備", "故障"]): cat = "設備故障"
+    elif any(k in desc for k in ["天候", "豪雨", "地震", "颱風"]): cat = "天候災害"
+    elif any(k in desc for k in ["旅客", "救護"]): cat = "旅客因素"
+    elif any(k in desc for k in ["調度", "待避", "交會"]): cat = "運轉調度"
+    elif any(k in desc for k in ["平交道"]): cat = "平交道事故"
+    elif any(k in desc for k in ["施工", "維修"]): cat = "施工影響"
+    return cat
+
+
+def alert_rows(alerts: list) -> list:
+    """Alert 一份快照 → [{PublishTime, Category, Description}]；格式異常時其餘紀錄捨棄。"""
+    rows = []
+    try:
+        for r in alerts:
+            desc = r.get("Description", "")
+            rows.append({
+                "PublishTime": r.get("PublishTime"),
+                "Category": alert_category(desc),
+                "Description": desc,
+            })
+    except Exception:
+        pass
+    return rows
@@ -0,0 +1,81 @@
+"""
+併發爬取協調器 — main.py all / station 使用。
+
+- ThreadPoolExecutor 同時執行彼此獨立的爬蟲（I/O bound，GIL 不是瓶頸），
+  總耗時由「各支往返時間加總」降為「最慢那支」。
+- 全域速率預算：http_client.set_rate_limit(TDX_RATE_LIMIT)，所有執行緒共用。
+- 端點併發上限：同一 endpoint 預設同時只跑 1 支，可用 endpoint_caps 調整。
+- 優先序：依 crawler.priority 由小到大送出；StationLiveBoard 排最前，
+  靜態資料更新不會擋在即時快照之前。
+- 全部結束後印出單一彙整報告。
+"""
+
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from config import TDX_RATE_LIMIT, CRAWL_MAX_WORKERS
+from http_client import set_rate_limit
+
+DEFAULT_ENDPOINT_CAP = 1
+
+
+def run_crawlers(crawlers, max_workers: int = CRAWL_MAX_WORKERS,
+                 rate_limit: float = TDX_RATE_LIMIT,
+                 endpoint_caps: dict = None) -> list:
+    """併發執行多支爬蟲，回傳各爬蟲 crawl() 的結果 dict（依優先序排列）。
+    rate_limit 為 None 時沿用目前的全域速率限制，不設定也不清除
+    （常駐排程由 scheduler 設定一次，同時執行的多個任務共用同一個預算）。"""
+    crawlers = sorted(crawlers, key=lambda c: c.priority)
+    caps = endpoint_caps or {}
+    semaphores = {}
+    for c in crawlers:
+        if c.endpoint not in semaphores:
+            semaphores[c.endpoint] = threading.BoundedSemaphore(
+                caps.get(c.endpoint, DEFAULT_ENDPOINT_CAP))
+
+    def _run(crawler):
+        with semaphores[crawler.endpoint]:
+            return crawler.crawl()
+
+    if rate_limit is not None:
+        set_rate_limit(rate_limit, burst=max(1, int(rate_limit)))
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers),
+                                thread_name_prefix="crawl") as pool:
+            futures = [pool.submit(_run, c) for c in crawlers]
+            results = [f.result() for f in futures]
+    finally:
+        if rate_limit is not None:
+            set_rate_limit(None)
+    wall = time.perf_counter() - start
+
+    print_report(results, wall)
+    return results
+
+
+def _pad(text: str, width: int, align: str = "<") -> str:
+    """依終端機顯示寬度補空白（中文字佔兩格），表頭與各列才能用同一組欄寬。"""
+    shown = sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text)
+    fill = " " * max(0, width - shown)
+    return text + fill if align == "<" else fill + text
+
+
+def print_report(results: list, wall: float) -> None:
+    """印出彙整報告：每支爬蟲一行 + 總計。"""
+    print(f"[{datetime.now()}] ── 爬取彙整報告 ──")
+    print(f"  {_pad('Crawler', 24)}{_pad('狀態', 6)}{_pad('筆數', 8, '>')}{_pad('秒數', 8, '>')}"
+          f"  檔案 / 錯誤")
+    for r in results:
+        status = "OK" if r["ok"] else "FAIL"
+        detail = r["path"] if r["ok"] else r["error"]
+        elapsed = f"{r['elapsed']:.2f}"
+        print(f"  {_pad(r['crawler'], 24)}{_pad(status, 6)}{_pad(str(r['count']), 8, '>')}"
+              f"{_pad(elapsed, 8, '>')}  {detail}")
+    failed = sum(1 for r in results if not r["ok"])
+    serial = sum(r["elapsed"] for r in results)
+    print(f"  共 {len(results)} 支（成功 {len(results) - failed} / 失敗 {failed}），"
+          f"實際耗時 {wall:.2f} s（逐支累計 {serial:.2f} s）")
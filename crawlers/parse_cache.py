@@ -0,0 +1,136 @@
+"""
+即時快照解析快取（parse cache）— processor 解析過的正規化列存到磁碟，下次只解析新增 / 變更的檔案。
+
+結構：<PARSE_CACHE_DIR>/<subdir>/<資料夾日期>.parquet
+  每個日期資料夾一個 Parquet（逐檔各存一份時小檔過多，讀取反而比解析 JSON 慢），
+  每列帶 _File（快照檔名）。schema metadata 記錄每個檔案的快取鍵：
+    files   {檔名: {"stat": [size, mtime_ns], "dep": 是否依賴前一份, "prev": 前一份檔名}}
+    version CACHE_VERSION
+  檔案大小 / mtime 不同、或 version 不同即視為失效。差分檔與指標檔的內容取決於前一份
+  （dep=True），前一份失效或中間插入 / 刪除檔案時一併重新解析。
+
+正規化規則（crawlers/normalize.py）或欄位有變動時須調高 CACHE_VERSION。
+live store（crawlers/live_store.py）已涵蓋的資料夾不經過這裡。
+此快取可隨時刪除重建，不進版控（預設位於 .cache/）。pyarrow 僅在實際讀寫時才 import。
+"""
+
+import os
+
+from crawlers import jsonio
+
+CACHE_VERSION = 1
+FILE_COLUMN = "_File"
+
+
+def _schema():
+    import pyarrow as pa
+    return pa.schema([
+        (FILE_COLUMN, pa.string()),
+        ("Date", pa.string()),
+        ("TaiwanDate", pa.string()),
+        ("CrawlTime", pa.string()),
+        ("TrainNo", pa.string()),
+        ("StationID", pa.string()),
+        ("StationName", pa.string()),
+        ("TrainTypeRaw", pa.string()),
+        ("Direction", pa.int64()),
+        ("TripLine", pa.int64()),
+        ("EndingStationID", pa.string()),
+        ("ScheduleArrivalTime", pa.string()),
+        ("ScheduleDepartureTime", pa.string()),
+        ("RunningStatus", pa.int64()),
+        ("UpdateTime", pa.string()),
+        ("DelayTime", pa.int64()),
+    ])
+
+
+def cache_path(cache_dir: str, subdir: str, folder: str) -> str:
+    return os.path.join(cache_dir, subdir, f"{os.path.basename(folder)}.parquet")
+
+
+def _stat(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def lookup(cache_dir: str, subdir: str, paths: list) -> dict:
+    """paths 為同一資料夾、已排序的快照。回傳
+    {"table": 快取內容或 None, "entries": 快取鍵, "stats": 各檔目前的 stat, "stale": 需重新解析的 index}。"""
+    import pyarrow.parquet as pq
+    path = cache_path(cache_dir, subdir, os.path.dirname(paths[0])) if paths else ""
+    table, entries = None, {}
+    if path and os.path.exists(path):
+        try:
+            table = pq.read_table(path)
+            meta = table.schema.metadata or {}
+            if meta.get(b"version", b"").decode() == str(CACHE_VERSION):
+                entries = jsonio.loads(meta.get(b"files", b"{}"))
+            else:
+                table = None
+        except Exception:
+            table = None
+
+    stats = [_stat(p) for p in paths]
+    stale = []
+    prev_ok = False
+    for i, p in enumerate(paths):
+        e = entries.get(os.path.basename(p))
+        ok = (e is not None and stats[i] is not None and e["stat"] == stats[i]
+              and (not e["dep"] or (prev_ok and e["prev"] == os.path.basename(paths[i - 1]))))
+        if not ok:
+            stale.append(i)
+        prev_ok = ok
+    return {"table": table, "entries": entries, "stats": stats, "stale": stale}
+
+
+def _to_table(name: str, columns: dict):
+    """單一快照的欄式結果 {欄位: list}（缺值為 NaN / None）→ pyarrow Table。"""
+    import pyarrow as pa
+    schema = _schema()
+    n = len(next(iter(columns.values())))
+    arrays = [pa.array([name] * n, type=pa.string())]
+    arrays += [pa.array(columns[f.name], type=f.type, from_pandas=True) for f in schema
+               if f.name != FILE_COLUMN]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def update(cache_dir: str, subdir: str, paths: list, hit: dict, parsed: dict):
+    """把重新解析的結果 parsed {index: (kind, 欄式結果)} 併入快取，有變動時寫回；
+    回傳該資料夾全部列（依檔名排序，含 _File 欄）。"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    names = [os.path.basename(p) for p in paths]
+    stale = set(hit["stale"])
+    keep = [n for i, n in enumerate(names) if i not in stale]
+    entries = {n: hit["entries"][n] for n in keep}
+
+    tables = []
+    if hit["table"] is not None and keep:
+        table = hit["table"].replace_schema_metadata(None)
+        if set(keep) != set(hit["entries"]):
+            table = table.filter(pc.is_in(table[FILE_COLUMN], pa.array(keep)))
+        tables.append(table)
+    for i in sorted(parsed):
+        kind, columns = parsed[i]
+        # stat 取解析前的值：解析途中檔案被改寫時，下次仍會判定失效
+        entries[names[i]] = {"stat": hit["stats"][i], "dep": kind in ("delta", "pointer"),
+                             "prev": names[i - 1] if i else None}
+        if columns:
+            tables.append(_to_table(names[i], columns))
+    tables = [t for t in tables if t.num_rows]
+    table = pa.concat_tables(tables) if tables else _schema().empty_table()
+    # 依檔名穩定排序：與資料夾內逐檔解析的列序相同
+    table = table.take(pc.sort_indices(table, sort_keys=[(FILE_COLUMN, "ascending")]))
+
+    if parsed or entries != hit["entries"]:
+        path = cache_path(cache_dir, subdir, os.path.dirname(paths[0]))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        meta = {b"version": str(CACHE_VERSION).encode(), b"files": jsonio.dumpb(entries)}
+        tmp = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table.replace_schema_metadata(meta), tmp, compression="zstd")
+        os.replace(tmp, path)
+    return table
@@ -0,0 +1,186 @@
+"""
+請求韌性層 — BaseCrawler.fetch 的重試策略、斷路器與嘗試紀錄。
+
+- RetryPolicy   : 連線錯誤、逾時、429、5xx 重試；指數退避 + jitter，
+                  有 Retry-After 時優先採用；整體時間上限 deadline，
+                  單次抓取不會拖過下一個排程 tick。
+- CircuitBreaker: 同一 endpoint 連續失敗達門檻後進入冷卻（open），
+                  冷卻期間直接略過、不打 API；冷卻結束放行一次試探（half-open），
+                  成功即恢復。只有 5xx、429 與連線層錯誤算失敗（is_endpoint_failure），
+                  400 / 404 等是查詢本身的問題，不代表 endpoint 故障。
+                  狀態存於 CACHE_DIR，cron 與常駐排程的各個 process 共用（檔案鎖保護）。
+- record_attempt: 每次嘗試（含被斷路器略過）寫一行 JSON 到
+                  FETCH_LOG_DIR/YYYY-MM-DD.jsonl，事後可對照資料缺口。
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from auth import _file_lock
+from config import (
+    CACHE_DIR, FETCH_LOG_DIR,
+    FETCH_MAX_ATTEMPTS, FETCH_BACKOFF_BASE, FETCH_BACKOFF_MAX, FETCH_DEADLINE_SEC,
+    CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN_SEC,
+)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(RuntimeError):
+    """endpoint 處於冷卻期，本次未送出請求。"""
+
+
+# ── 重試策略 ──────────────────────────────────────────────────
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = FETCH_MAX_ATTEMPTS,
+                 backoff_base: float = FETCH_BACKOFF_BASE,
+                 backoff_max: float = FETCH_BACKOFF_MAX,
+                 deadline: float = FETCH_DEADLINE_SEC,
+                 retry_statuses: tuple = RETRY_STATUSES):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline = deadline
+        self.retry_statuses = retry_statuses
+
+    def should_retry_status(self, status_code: int) -> bool:
+        return status_code in self.retry_statuses
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """第 attempt 次（從 1 起算）失敗後的等待秒數。
+        Retry-After 優先；否則 base * 2^(attempt-1)，取其一半加上隨機一半（equal jitter）。
+        """
+        if retry_after is not None:
+            return min(max(0.0, retry_after), self.backoff_max)
+        cap = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return cap / 2 + random.uniform(0, cap / 2)
+
+
+def parse_retry_after(value) -> float:
+    """Retry-After 標頭：秒數或 HTTP 日期；無法解析回傳 None。"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return (when - datetime.now(timezone.utc)).total_seconds()
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+# ── 斷路器 ────────────────────────────────────────────────────
+
+def is_endpoint_failure(exc: BaseException) -> bool:
+    """是否計入斷路器：5xx、429 與連線 / 逾時 / 傳輸中斷；其他 4xx 與解析錯誤不算。"""
+    if isinstance(exc, requests.HTTPError):
+        status = exc.response.status_code if exc.response is not None else None
+        return status is not None and (status >= 500 or status == 429)
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout,
+                            requests.exceptions.ChunkedEncodingError))
+
+
+class CircuitBreaker:
+    """依 endpoint 記錄連續失敗次數；狀態檔 {endpoint: {"failures", "opened_until", ...}}。"""
+
+    def __init__(self, state_file: str = os.path.join(CACHE_DIR, "circuit_breakers.json"),
+                 threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 cooldown: float = CIRCUIT_COOLDOWN_SEC):
+        self.state_file = state_file
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict:
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, state: dict) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            tmp = f"{self.state_file}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.state_file)
+        except OSError as e:
+            print(f"斷路器狀態寫入失敗：{e}")
+
+    def _update(self, func) -> None:
+        """跨 process 的讀 → 改 → 寫：執行緒鎖 + 狀態檔旁的檔案鎖（與 auth 的 token 快取相同作法）。
+        func(state) 回傳 True 時寫回。"""
+        with self._lock:
+            try:
+                with _file_lock(self.state_file + ".lock"):
+                    state = self._load()
+                    if func(state):
+                        self._save(state)
+            except OSError as e:
+                print(f"斷路器狀態寫入失敗：{e}")
+
+    def check(self, endpoint: str) -> None:
+        """冷卻中則丟出 CircuitOpenError；冷卻結束後放行（half-open）。"""
+        with self._lock:
+            entry = self._load().get(endpoint, {})
+        opened_until = entry.get("opened_until", 0)
+        if opened_until and time.time() < opened_until:
+            remaining = opened_until - time.time()
+            raise CircuitOpenError(
+                f"{endpoint} 連續失敗 {entry.get('failures', 0)} 次，冷卻中（剩 {remaining:.0f} 秒）")
+
+    def record_success(self, endpoint: str) -> None:
+        def reset(state):
+            return state.pop(endpoint, None) is not None
+        self._update(reset)
+
+    def record_failure(self, endpoint: str, error: str) -> None:
+        def bump(state):
+            entry = state.get(endpoint, {})
+            entry["failures"] = entry.get("failures", 0) + 1
+            entry["last_error"] = error
+            entry["last_failure"] = datetime.now().isoformat(timespec="seconds")
+            if entry["failures"] >= self.threshold:
+                entry["opened_until"] = time.time() + self.cooldown
+            state[endpoint] = entry
+            return True
+        self._update(bump)
+
+
+circuit_breaker = CircuitBreaker()
+
+
+# ── 嘗試紀錄 ──────────────────────────────────────────────────
+
+_log_lock = threading.Lock()
+
+
+def record_attempt(entry: dict) -> None:
+    """寫一行嘗試紀錄；寫入失敗不影響抓取。"""
+    now = datetime.now()
+    entry = {"time": now.isoformat(timespec="milliseconds"), "pid": os.getpid(), **entry}
+    path = os.path.join(FETCH_LOG_DIR, f"{now:%Y-%m-%d}.jsonl")
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    try:
+        with _log_lock:
+            os.makedirs(FETCH_LOG_DIR, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+    except OSError:
+        pass
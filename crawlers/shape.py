@@ -12,6 +12,7 @@ class ShapeCrawler(BaseCrawler):
     endpoint = "/Shape"
     save_subdir = "static"
     root_key = "Shapes"
+    record_marker = "LineID"
     timestamp_file = False
     fixed_filename = "shape.json"
 
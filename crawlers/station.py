@@ -13,6 +13,7 @@ class StationCrawler(BaseCrawler):
     endpoint = "/Station"
     save_subdir = "static"
     root_key = "Stations"
+    record_marker = "StationUID"
     timestamp_file = False
     fixed_filename = "stations.json"
 
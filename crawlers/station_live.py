@@ -6,6 +6,8 @@ StationLiveCrawler — 新核心即時爬蟲。
 # 每 10 分鐘自動抓取一次，存檔至 data/raw/station_live/YYYY-MM-DD/HHMMSS.json
 """
 
+from config import STATION_LIVE_STORAGE, LIVE_STORE_ENABLED, LIVE_STORE_DIR
+from crawlers import live_store
 from crawlers.base import BaseCrawler
 
 
@@ -13,7 +15,24 @@ class StationLiveCrawler(BaseCrawler):
     endpoint = "/StationLiveBoard"
     save_subdir = "station_live"
     root_key = "StationLiveBoards"
+    record_marker = "TrainNo"
     timestamp_file = True
+    dedup_mode = "pointer"  # 看板未更新時只寫指標檔
+    storage_mode = STATION_LIVE_STORAGE  # "delta" → keyframe + 差分，見 crawlers/delta.py
+    priority = 0
+    # 只取 processor._parse_raw_json 會讀的欄位；
+    # 捨棄 EndingStationName、Platform、TrainTypeID/Code 等未使用欄位
+    select_fields = (
+        "TrainNo", "StationID", "StationName", "TrainTypeName",
+        "Direction", "TripLine", "EndingStationID",
+        "ScheduleArrivalTime", "ScheduleDepartureTime",
+        "RunningStatus", "DelayTime", "UpdateTime",
+    )
+
+    def post_save(self, path, status, records):
+        """TRA_LIVE_STORE=1 時，立即正規化並寫入 live store（crawlers/live_store.py）。"""
+        if LIVE_STORE_ENABLED:
+            live_store.ingest(LIVE_STORE_DIR, "station_live", path, status, records)
 
 
 # ── 向後相容的函數介面（供 SKILL 測試指令使用）──────────────
@@ -0,0 +1,199 @@
+"""
+快照存檔格式（serializer）— BaseCrawler 寫入、processor / export_csv 讀取共用，不依賴 pandas。
+
+可用格式（config.STORAGE_FORMAT / 環境變數 TRA_STORAGE_FORMAT）：
+  json      : .json          原始 UTF-8 JSON（預設，與舊檔相容；整份序列化時分隔符號同舊版 json.dump）
+  json.gz   : .json.gz       gzip 壓縮 JSON（標準函式庫）
+  json.zst  : .json.zst      zstd 壓縮 JSON（需 pip install zstandard）
+  msgpack   : .msgpack       MessagePack 二進位編碼（需 pip install msgpack）
+
+JSON 編解碼經由 crawlers/jsonio.py（有安裝 orjson 時自動使用）。
+讀取端一律透過 load_payload()：依檔頭 magic bytes 自動判斷格式，
+因此同一個資料夾內新舊格式可以混存。
+
+json / json.gz / json.zst 另支援串流寫入（open_stream_writer），
+BaseCrawler 可直接把 API 回應位元組寫進檔案，不經 parse → 再序列化。
+"""
+
+import glob
+import gzip
+import os
+
+from crawlers import jsonio
+
+SNAPSHOT_EXTS = (".json", ".json.gz", ".json.zst", ".msgpack")
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class Serializer:
+    def __init__(self, name: str, ext: str, dumps, loads):
+        self.name = name
+        self.ext = ext
+        self.dumps = dumps    # dict -> bytes
+        self.loads = loads    # bytes -> dict
+
+
+def _json_dumps(data) -> bytes:
+    return jsonio.dumpb(data)
+
+
+def _json_file_dumps(data) -> bytes:
+    # 未壓縮的 .json 常進版控：輸出與舊版 json.dump 相同，內容不變時重寫不產生差異
+    return jsonio.dumpb_spaced(data)
+
+
+def _json_loads(raw: bytes):
+    return jsonio.loads(raw)
+
+
+def _gzip_dumps(data) -> bytes:
+    # mtime=0：內容相同時輸出位元組相同，避免無意義的 git 差異
+    return gzip.compress(_json_dumps(data), compresslevel=6, mtime=0)
+
+
+def _gzip_loads(raw: bytes):
+    return _json_loads(gzip.decompress(raw))
+
+
+def _zstd_dumps(data) -> bytes:
+    import zstandard
+    return zstandard.ZstdCompressor(level=10).compress(_json_dumps(data))
+
+
+def _zstd_loads(raw: bytes):
+    import zstandard
+    # decompressobj：串流寫入的 frame 沒有 content size，一次性 decompress() 無法解
+    return _json_loads(zstandard.ZstdDecompressor().decompressobj().decompress(raw))
+
+
+def _msgpack_dumps(data) -> bytes:
+    import msgpack
+    return msgpack.packb(data, use_bin_type=True)
+
+
+def _msgpack_loads(raw: bytes):
+    import msgpack
+    return msgpack.unpackb(raw, raw=False)
+
+
+SERIALIZERS = {
+    "json": Serializer("json", ".json", _json_file_dumps, _json_loads),
+    "json.gz": Serializer("json.gz", ".json.gz", _gzip_dumps, _gzip_loads),
+    "json.zst": Serializer("json.zst", ".json.zst", _zstd_dumps, _zstd_loads),
+    "msgpack": Serializer("msgpack", ".msgpack", _msgpack_dumps, _msgpack_loads),
+}
+
+
+def get_serializer(name: str) -> Serializer:
+    if name not in SERIALIZERS:
+        raise ValueError(f"未知的存檔格式：{name}（可用：{', '.join(SERIALIZERS)}）")
+    return SERIALIZERS[name]
+
+
+# ── 路徑工具 ──────────────────────────────────────────────────
+
+def split_ext(path: str) -> tuple:
+    """拆出快照副檔名：'.../081332.json.gz' → ('.../081332', '.json.gz')。"""
+    for ext in sorted(SNAPSHOT_EXTS, key=len, reverse=True):
+        if path.endswith(ext):
+            return path[: -len(ext)], ext
+    return os.path.splitext(path)
+
+
+def stem(path: str) -> str:
+    """快照檔名去掉副檔名，例如 HHMMSS。"""
+    return split_ext(os.path.basename(path))[0]
+
+
+def with_format(path: str, serializer: Serializer) -> str:
+    """將 .json 路徑換成指定格式的副檔名。"""
+    return split_ext(path)[0] + serializer.ext
+
+
+def is_payload_file(name: str) -> bool:
+    return name.endswith(SNAPSHOT_EXTS)
+
+
+def glob_payloads(pattern_without_ext: str) -> list:
+    """glob 所有格式的快照檔，例如 glob_payloads('data/station_live/*/*')。"""
+    files = []
+    for ext in SNAPSHOT_EXTS:
+        files.extend(glob.glob(pattern_without_ext + ext))
+    return files
+
+
+def find_payload(json_path: str):
+    """固定檔名資料（stations.json 等）可能以任一格式存在；回傳最新的一份，找不到回傳 None。"""
+    base = split_ext(json_path)[0]
+    candidates = [base + ext for ext in SNAPSHOT_EXTS if os.path.exists(base + ext)]
+    if not candidates:
+        return None
+    return max(candidates, key=os.path.getmtime)
+
+
+# ── 讀寫 ──────────────────────────────────────────────────────
+
+def detect(raw: bytes, path: str = "") -> Serializer:
+    """依 magic bytes（其次副檔名）判斷格式。"""
+    if raw[:2] == _GZIP_MAGIC:
+        return SERIALIZERS["json.gz"]
+    if raw[:4] == _ZSTD_MAGIC:
+        return SERIALIZERS["json.zst"]
+    if path.endswith(".msgpack"):
+        return SERIALIZERS["msgpack"]
+    head = raw[:1]
+    if head and head not in b"{[ \t\r\n\xef":
+        return SERIALIZERS["msgpack"]
+    return SERIALIZERS["json"]
+
+
+def loads_payload(raw: bytes, path: str = ""):
+    return detect(raw, path).loads(raw)
+
+
+def load_payload(path: str):
+    """讀取任一格式的快照檔。"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    return loads_payload(raw, path)
+
+
+def dump_payload(data, path: str, serializer: Serializer) -> None:
+    """寫入快照：先寫暫存檔再 rename，讀取端不會看到寫到一半的檔案。"""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(serializer.dumps(data))
+    os.replace(tmp, path)
+
+
+# ── 串流寫入 ──────────────────────────────────────────────────
+
+class _Passthrough:
+    """原始 JSON：直接寫入底層檔案；close() 不關閉底層檔案。"""
+
+    def __init__(self, fileobj):
+        self._f = fileobj
+
+    def write(self, chunk: bytes) -> int:
+        return self._f.write(chunk)
+
+    def close(self) -> None:
+        self._f.flush()
+
+
+def supports_stream(serializer: Serializer) -> bool:
+    return serializer.name in ("json", "json.gz", "json.zst")
+
+
+def open_stream_writer(fileobj, serializer: Serializer):
+    """回傳可逐塊 write(JSON bytes) 的物件，依格式即時壓縮；close() 不關閉 fileobj。"""
+    if serializer.name == "json":
+        return _Passthrough(fileobj)
+    if serializer.name == "json.gz":
+        return gzip.GzipFile(fileobj=fileobj, mode="wb", compresslevel=6, mtime=0)
+    if serializer.name == "json.zst":
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).stream_writer(fileobj, closefd=False)
+    raise ValueError(f"{serializer.name} 不支援串流寫入")
@@ -0,0 +1,113 @@
+"""
+串流存檔的位元組層級掃描 — 不建立 Python 物件即可取得存檔所需的中繼資料。
+
+TDX 回應固定為 {"UpdateTime": ..., "SrcUpdateTime": ..., ..., "<root_key>": [...]}：
+表頭欄位在前、紀錄陣列在最後。SnapshotScanner 逐塊接收回應位元組並轉寫到輸出：
+
+- 表頭：緩衝到 root_key 出現為止（通常 < 300 bytes），從中擷取 UpdateTime /
+  SrcUpdateTime；有設定投影時在開頭的 { 之後插入 "_Projection"。
+- 筆數：以 record_marker（每筆紀錄恰好出現一次的欄位名，例如 "TrainNo"）
+  計數；字串內的 \\"TrainNo\\" 有跳脫符號，不會被算到。
+- 內容雜湊：root_key 之後的原始位元組 sha256（content_hash）。整份解析的路徑
+  （BaseCrawler._store、manifest 補建）也用 content_hash 計算，同一份回應只有一種雜湊。
+"""
+
+import hashlib
+import json
+import re
+
+HEAD_LIMIT = 64 * 1024   # 超過仍找不到 root_key 就放棄表頭解析，整份雜湊
+_CARRY = 64              # 紀錄標記跨 chunk 邊界時保留的尾端位元組
+HASH_PREFIX = "sha256:"
+
+
+def _field_pattern(name: str) -> re.Pattern:
+    return re.compile(rb'(?<!\\)"' + re.escape(name.encode("utf-8")) + rb'"\s{0,8}:')
+
+
+def _head_string(head: bytes, name: str):
+    m = re.search(rb'"' + re.escape(name.encode("utf-8")) + rb'"\s*:\s*"([^"]*)"', head)
+    return m.group(1).decode("utf-8") if m else None
+
+
+def content_hash(body: bytes, root_key: str) -> str:
+    """序列化後快照的內容雜湊：root_key 之後的位元組 sha256（找不到 root_key 時整份）。
+    與 SnapshotScanner 串流時算出的值相同。"""
+    m = _field_pattern(root_key).search(body, 0, HEAD_LIMIT)
+    return HASH_PREFIX + hashlib.sha256(body[m.end():] if m else body).hexdigest()
+
+
+class SnapshotScanner:
+    def __init__(self, writer, root_key: str, record_marker: str, prefix: dict = None):
+        self.writer = writer
+        self.prefix = prefix or {}
+        self._root_pattern = _field_pattern(root_key)
+        self._marker_pattern = _field_pattern(record_marker)
+        self._head = b""
+        self._in_body = False
+        self._carry = b""
+        self._hash = hashlib.sha256()
+        self.count = 0
+        self.bytes = 0
+        self.meta = {"UpdateTime": None, "SrcUpdateTime": None}
+
+    def write(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        self.bytes += len(chunk)
+        if self._in_body:
+            self.writer.write(chunk)
+            self._scan(chunk)
+            return
+        self._head += chunk
+        m = self._root_pattern.search(self._head)
+        if m is not None:
+            header, body = self._head[:m.end()], self._head[m.end():]
+            self.meta["UpdateTime"] = _head_string(header, "UpdateTime")
+            self.meta["SrcUpdateTime"] = _head_string(header, "SrcUpdateTime")
+            self._head, self._in_body = b"", True
+            self.writer.write(self._with_prefix(header))
+            self.writer.write(body)
+            self._scan(body)
+        elif len(self._head) >= HEAD_LIMIT:
+            self._flush_head()
+
+    def _flush_head(self) -> None:
+        """找不到 root_key：緩衝內容整段視為紀錄區段。"""
+        head, self._head = self._head, b""
+        self._in_body = True
+        self.writer.write(self._with_prefix(head))
+        self._scan(head)
+
+    def _with_prefix(self, header: bytes) -> bytes:
+        """在開頭的 { 之後插入 prefix 欄位。"""
+        if not self.prefix:
+            return header
+        stripped = header.lstrip()
+        if not stripped.startswith(b"{"):
+            raise ValueError("回應不是 JSON 物件，無法串流存檔")
+        rest = stripped[1:]
+        inner = json.dumps(self.prefix, ensure_ascii=False).encode("utf-8")[1:-1]
+        sep = b"" if rest.lstrip().startswith(b"}") else b","
+        return b"{" + inner + sep + rest
+
+    def _scan(self, chunk: bytes) -> None:
+        self._hash.update(chunk)
+        buf = self._carry + chunk
+        skip = len(self._carry)
+        # 完全落在 carry 內的標記上一輪已計入；跨界或落在新 chunk 內的才算
+        self.count += sum(1 for m in self._marker_pattern.finditer(buf) if m.end() > skip)
+        self._carry = buf[-_CARRY:]
+
+    def close(self) -> dict:
+        """寫出仍在緩衝的表頭（極短回應），回傳中繼資料。"""
+        if self.bytes == 0:
+            raise ValueError("空的回應")
+        if not self._in_body:
+            self._flush_head()
+        return {
+            **self.meta,
+            "ContentHash": HASH_PREFIX + self._hash.hexdigest(),
+            "count": self.count,
+            "bytes": self.bytes,
+        }
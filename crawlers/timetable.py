@@ -18,6 +18,7 @@ class TimetableCrawler(BaseCrawler):
     endpoint = "/DailyTrainTimetable/Today"
     save_subdir = "timetable"
     root_key = "TrainTimetables"
+    record_marker = "TrainInfo"
     timestamp_file = False
     fixed_filename = ""  # 動態產生，覆寫 _build_save_path
 
@@ -9,6 +9,7 @@ class TrainTypeCrawler(BaseCrawler):
     endpoint = "/TrainType"
     save_subdir = "static"
     root_key = "TrainTypes"
+    record_marker = "TrainTypeID"
     timestamp_file = False
     fixed_filename = "train_types.json"
 
@@ -1,94 +1,144 @@
 """
 GitHub Actions 呼叫的匯出腳本。
-產生 data/processed_data.csv 和 data/research_dataset.csv 供 Streamlit Cloud 讀取。
+產生 data/research/（Parquet research store，見 research_store.py）供 Streamlit Cloud 讀取。
+
+預設增量匯出：只重建上次匯出後有新快照 / 時刻表變動的台灣日期分區
+（見 DataProcessor.update_research_store），每小時的成本只跟新增的快照有關：
+  - train_schedule.csv   對應時刻表有變動時才重寫
+  - stations_coords.csv  車站資料（代碼 / 名稱 / 座標）有變動時才重寫
+  - processed_data.csv / research_dataset.csv 為整份的本機 CSV（需讀回整個 store），
+    預設不產生，TRA_EXPORT_CSV=1 時才寫入；不推上 GitHub，雲端版也不讀取
+沒有任何變動時直接結束。python export_csv.py --full 整份重建（含上述各檔）。
 """
-import json
 import os
+import sys
 import pandas as pd
+import research_store
+from config import EXPORT_CSV, RESEARCH_STORE_DIR
 from processor import DataProcessor
+from crawlers import storage
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+FULL = "--full" in sys.argv[1:]
+
+
+def _to_csv(frame, path):
+    """先寫暫存檔再換上，讀取端不會讀到寫一半的 CSV。"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    frame.to_csv(tmp, index=False, encoding="utf-8-sig")
+    os.replace(tmp, path)
+
+
+def _same_csv(frame, path):
+    """path 已存在且內容與 frame 的 CSV 輸出相同（小檔直接比對內容）。"""
+    try:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return f.read() == frame.to_csv(index=False)
+    except OSError:
+        return False
+
+
+def _watermark(manifest, key):
+    return ((manifest or {}).get("watermark") or {}).get(key)
+
 
 dp = DataProcessor(DATA_DIR)
 
-# research_dataset（完整自變數版）
-df = dp.build_research_dataset()
-if not df.empty:
-    out = os.path.join(DATA_DIR, "research_dataset.csv")
-    df.to_csv(out, index=False, encoding="utf-8-sig")
+# research_dataset（完整自變數版）→ research store
+previous = research_store.read_manifest(RESEARCH_STORE_DIR)
+manifest, rebuilt = dp.update_research_store(RESEARCH_STORE_DIR, full=FULL)
+if manifest is None:
+    print("無資料可匯出")
+    sys.exit(0)
+if rebuilt:
+    print(f"research store 匯出完成（重建 {len(rebuilt)} 個日期分區：{rebuilt[0]} ~ {rebuilt[-1]}；"
+          f"共 {manifest['rows']} 筆，{len(manifest['partitions'])} 個日期分區）")
+
+research_csv = os.path.join(DATA_DIR, "research_dataset.csv")
+processed_csv = os.path.join(DATA_DIR, "processed_data.csv")
+coords_path = os.path.join(DATA_DIR, "stations_coords.csv")
+sched_path = os.path.join(DATA_DIR, "train_schedule.csv")
+write_csv = EXPORT_CSV and (FULL or bool(rebuilt)
+                            or not (os.path.exists(research_csv) and os.path.exists(processed_csv)))
+write_schedule = (FULL or not os.path.exists(sched_path)
+                  or _watermark(previous, "timetables") != _watermark(manifest, "timetables"))
+
+stations_path = storage.find_payload(os.path.join(DATA_DIR, "static", "stations.json"))
+stations_data = storage.load_payload(stations_path) if stations_path else {}
+coords_records = [
+    {
+        "StationID": s.get("StationID"),
+        "StationName": s.get("StationName", {}).get("Zh_tw", ""),
+        "Lat": s.get("StationPosition", {}).get("PositionLat"),
+        "Lon": s.get("StationPosition", {}).get("PositionLon"),
+    }
+    for s in stations_data.get("Stations", [])
+]
+coords_df = pd.DataFrame(coords_records)
+if not coords_df.empty:
+    # ★ 修正：stations_coords.csv 的 StationID 也統一補零
+    coords_df["StationID"] = coords_df["StationID"].astype(str).str.strip().str.zfill(4)
+write_coords = not coords_df.empty and (FULL or not _same_csv(coords_df, coords_path))
+
+if not (rebuilt or write_csv or write_coords or write_schedule):
+    print("上次匯出後沒有新的快照或時刻表變動，略過匯出")
+    sys.exit(0)
+
+# 整份相容 CSV：讀回整個 research store（成本隨資料量增加，預設關閉）
+if write_csv:
+    df = research_store.load(RESEARCH_STORE_DIR, manifest=manifest)
+    _to_csv(df, research_csv)
     print(f"research_dataset.csv 匯出完成（{len(df)} 筆）")
 
     # 合併車站座標
-    stations_path = os.path.join(DATA_DIR, "static", "stations.json")
-    if os.path.exists(stations_path):
-        with open(stations_path, "r", encoding="utf-8") as f:
-            stations_data = json.load(f)
-        station_records = [
-            {
-                "StationID": s.get("StationID"),
-                "Lat": s.get("StationPosition", {}).get("PositionLat"),
-                "Lon": s.get("StationPosition", {}).get("PositionLon"),
-            }
-            for s in stations_data.get("Stations", [])
-        ]
-        stations_df = pd.DataFrame(station_records)
-        if not stations_df.empty:
-            # ★ 修正：統一 StationID 補零到 4 位，確保 merge 格式一致
-            df["StationID"] = df["StationID"].astype(str).str.strip().str.zfill(4)
-            stations_df["StationID"] = stations_df["StationID"].astype(str).str.strip().str.zfill(4)
-            # ★ 修正：同時清除 Lat_x/Lon_x/Lat_y/Lon_y 殘留欄位
-            df = df.drop(columns=["Lat", "Lon", "Lat_x", "Lon_x", "Lat_y", "Lon_y"], errors="ignore")
-            df = df.merge(stations_df[["StationID", "Lat", "Lon"]], on="StationID", how="left")
-
-        # 額外匯出 stations_coords.csv 供雲端模式使用
-        coords_records = [
-            {
-                "StationID": s.get("StationID"),
-                "StationName": s.get("StationName", {}).get("Zh_tw", ""),
-                "Lat": s.get("StationPosition", {}).get("PositionLat"),
-                "Lon": s.get("StationPosition", {}).get("PositionLon"),
-            }
-            for s in stations_data.get("Stations", [])
-        ]
-        coords_df = pd.DataFrame(coords_records)
-        # ★ 修正：stations_coords.csv 的 StationID 也統一補零
-        coords_df["StationID"] = coords_df["StationID"].astype(str).str.strip().str.zfill(4)
-        coords_path = os.path.join(DATA_DIR, "stations_coords.csv")
-        coords_df.to_csv(coords_path, index=False, encoding="utf-8-sig")
-        print(f"stations_coords.csv saved: {len(coords_df)} 站")
-
-    # processed_data（Streamlit Cloud 主要讀取來源）
-    out2 = os.path.join(DATA_DIR, "processed_data.csv")
-    df.to_csv(out2, index=False, encoding="utf-8-sig")
+    station_records = [
+        {
+            "StationID": s.get("StationID"),
+            "Lat": s.get("StationPosition", {}).get("PositionLat"),
+            "Lon": s.get("StationPosition", {}).get("PositionLon"),
+        }
+        for s in stations_data.get("Stations", [])
+    ]
+    stations_df = pd.DataFrame(station_records)
+    if not stations_df.empty and not df.empty:
+        # ★ 修正：統一 StationID 補零到 4 位，確保 merge 格式一致
+        df["StationID"] = df["StationID"].astype(str).str.strip().str.zfill(4)
+        stations_df["StationID"] = stations_df["StationID"].astype(str).str.strip().str.zfill(4)
+        # ★ 修正：同時清除 Lat_x/Lon_x/Lat_y/Lon_y 殘留欄位
+        df = df.drop(columns=["Lat", "Lon", "Lat_x", "Lon_x", "Lat_y", "Lon_y"], errors="ignore")
+        df = df.merge(stations_df[["StationID", "Lat", "Lon"]], on="StationID", how="left")
+
+    # processed_data（研究資料集 + 車站座標，供本機分析）
+    _to_csv(df, processed_csv)
     print(f"processed_data.csv 匯出完成（{len(df)} 筆）")
 
-    # ── 首末班車時間表（供查詢用）──
-    tt_df, _ = dp._load_timetable()
-    if not tt_df.empty:
-        first_trains = (tt_df[tt_df["StopSeq"] == 1]
-                        [["TrainNo", "TrainTypeSimple", "StartingStationID",
-                           "EndingStationID", "ScheduledDep", "Direction", "TripLine"]]
-                        .rename(columns={"ScheduledDep": "FirstDep",
-                                         "StartingStationID": "FromStationID",
-                                         "EndingStationID": "ToStationID"})
-                        .drop_duplicates(subset=["TrainNo"]))
-        last_trains = (tt_df[tt_df["IsTerminal"] == 1]
-                       [["TrainNo", "ScheduledArr"]]
-                       .rename(columns={"ScheduledArr": "LastArr"})
-                       .drop_duplicates(subset=["TrainNo"]))
-        train_schedule = first_trains.merge(last_trains, on="TrainNo", how="left")
-
-        # 合併車站名稱（起迄站）
-        sname = {}
-        if os.path.exists(stations_path):
-            for s in stations_data.get("Stations", []):
-                sname[s.get("StationID")] = s.get("StationName", {}).get("Zh_tw", "")
-        train_schedule["FromStation"] = train_schedule["FromStationID"].map(sname)
-        train_schedule["ToStation"]   = train_schedule["ToStationID"].map(sname)
-
-        sched_path = os.path.join(DATA_DIR, "train_schedule.csv")
-        train_schedule.to_csv(sched_path, index=False, encoding="utf-8-sig")
-        print(f"train_schedule.csv 匯出完成（{len(train_schedule)} 班次）")
-else:
-    print("無資料可匯出")
+# 額外匯出 stations_coords.csv 供雲端模式使用
+if write_coords:
+    _to_csv(coords_df, coords_path)
+    print(f"stations_coords.csv saved: {len(coords_df)} 站")
+
+# ── 首末班車時間表（供查詢用）──
+tt_df, _ = dp._load_timetable() if write_schedule else (pd.DataFrame(), None)
+if not tt_df.empty:
+    first_trains = (tt_df[tt_df["StopSeq"] == 1]
+                    [["TrainNo", "TrainTypeSimple", "StartingStationID",
+                       "EndingStationID", "ScheduledDep", "Direction", "TripLine"]]
+                    .rename(columns={"ScheduledDep": "FirstDep",
+                                     "StartingStationID": "FromStationID",
+                                     "EndingStationID": "ToStationID"})
+                    .drop_duplicates(subset=["TrainNo"]))
+    last_trains = (tt_df[tt_df["IsTerminal"] == 1]
+                   [["TrainNo", "ScheduledArr"]]
+                   .rename(columns={"ScheduledArr": "LastArr"})
+                   .drop_duplicates(subset=["TrainNo"]))
+    train_schedule = first_trains.merge(last_trains, on="TrainNo", how="left")
+
+    # 合併車站名稱（起迄站）
+    sname = {}
+    for s in stations_data.get("Stations", []):
+        sname[s.get("StationID")] = s.get("StationName", {}).get("Zh_tw", "")
+    train_schedule["FromStation"] = train_schedule["FromStationID"].map(sname)
+    train_schedule["ToStation"]   = train_schedule["ToStationID"].map(sname)
 
+    _to_csv(train_schedule, sched_path)
+    print(f"train_schedule.csv 匯出完成（{len(train_schedule)} 班次）")
@@ -0,0 +1,114 @@
+"""
+共用 HTTP Session — auth.py 取 token 與所有 BaseCrawler 子類別共用同一個連線池。
+
+- requests.Session + HTTPAdapter：連線池與 keep-alive，同一個 process 內
+  多支爬蟲（main.py all / station）重用同一條 TLS 連線，不再每支各自握手。
+- Accept-Encoding：明確要求 gzip / deflate（有安裝 brotli 時加上 br），
+  DailyTrainTimetable 這類數 MB 的回應以壓縮傳輸。
+- 逾時：預設 (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)，見 config.py。
+- 速率限制：set_rate_limit() 設定全域 token bucket，BaseCrawler.fetch 送出前
+  呼叫 throttle()；未設定時為 no-op（單支爬蟲執行不受影響）。
+"""
+
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, HTTP_POOL_SIZE
+
+_session = None
+_session_lock = threading.Lock()
+_rate_limiter = None
+
+
+def _accept_encoding() -> str:
+    """回傳本機 urllib3 能解壓的編碼清單。"""
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+        encodings.append("br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append("br")
+        except ImportError:
+            pass
+    return ", ".join(encodings)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "Accept-Encoding": _accept_encoding(),
+        "Connection": "keep-alive",
+    })
+    return session
+
+
+def get_session() -> requests.Session:
+    """取得 process 內共用的 Session（延遲建立、thread-safe）。"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def close_session() -> None:
+    """關閉共用 Session（daemon 結束或測試時使用）。"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def default_timeout() -> tuple:
+    """預設 (connect, read) 逾時秒數。"""
+    return (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+
+
+# ── 全域速率限制 ──────────────────────────────────────────────
+
+class RateLimiter:
+    """Thread-safe token bucket：每秒補充 rate 個額度，最多累積 burst 個。"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """取得一個額度，必要時等待；回傳實際等待秒數。"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def set_rate_limit(rate: float = None, burst: int = 1) -> None:
+    """設定全域 TDX 請求速率（次/秒）；rate=None 取消限制。"""
+    global _rate_limiter
+    _rate_limiter = RateLimiter(rate, burst) if rate else None
+
+
+def throttle() -> float:
+    """在送出 TDX 請求前呼叫；未設定速率限制時立即返回。"""
+    limiter = _rate_limiter
+    return limiter.acquire() if limiter is not None else 0.0
@@ -8,17 +8,30 @@ CLI 入口：python main.py <task>
   station   - 更新靜態資料（車站、車種、路線網路）
   all       - 全部資料
   legacy    - 舊 TrainLiveBoard（向後相容，逐步廢棄）
+  daemon    - 常駐模式：單一 process 內排程 live / alert / timetable（見 scheduler.py）
+
+station / all 由 crawlers.orchestrator 併發執行，結束時印出彙整報告。
 """
 
 import sys
-from crawlers.station_live import crawl_station_live
-from crawlers.alert import crawl_alerts
-from crawlers.daily_timetable import crawl_daily_timetable
-from crawlers.station import crawl_stations
-from crawlers.train_type import crawl_train_types
-from crawlers.line_network import crawl_line_network
-from crawlers.shape import crawl_shape
+from crawlers.station_live import StationLiveCrawler, crawl_station_live
+from crawlers.alert import AlertCrawler, crawl_alerts
+from crawlers.daily_timetable import DailyTimetableCrawler, crawl_daily_timetable
+from crawlers.station import StationCrawler
+from crawlers.train_type import TrainTypeCrawler
+from crawlers.line_network import LineNetworkCrawler
+from crawlers.shape import ShapeCrawler
 from crawlers.live_board import crawl_live_board
+from crawlers.orchestrator import run_crawlers
+
+
+def _static_crawlers():
+    return [StationCrawler(), TrainTypeCrawler(), LineNetworkCrawler(), ShapeCrawler()]
+
+
+def _all_crawlers():
+    # 即時快照優先（priority=0），靜態資料更新排在最後
+    return [StationLiveCrawler(), AlertCrawler(), DailyTimetableCrawler()] + _static_crawlers()
 
 
 def print_help():
@@ -30,6 +43,7 @@ def print_help():
     print("  station   - 更新靜態資料 (Station + TrainType + LineNetwork)")
     print("  all       - 抓取全部資料")
     print("  legacy    - 抓取舊 TrainLiveBoard（逐步廢棄）")
+    print("  daemon    - 常駐排程模式（live / alert / timetable，Ctrl+C 或 SIGTERM 結束）")
 
 
 if __name__ == "__main__":
@@ -42,21 +56,15 @@ if __name__ == "__main__":
     elif task == "timetable":
         crawl_daily_timetable()
     elif task == "station":
-        crawl_stations()
-        crawl_train_types()
-        crawl_line_network()
-        crawl_shape()
+        run_crawlers(_static_crawlers())
     elif task == "all":
-        crawl_station_live()
-        crawl_alerts()
-        crawl_daily_timetable()
-        crawl_stations()
-        crawl_train_types()
-        crawl_line_network()
-        crawl_shape()
+        run_crawlers(_all_crawlers())
     elif task == "legacy":
         crawl_live_board()
         crawl_alerts()
+    elif task == "daemon":
+        from scheduler import run_daemon
+        run_daemon()
     elif task in ("-h", "--help", "help"):
         print_help()
     else:
@@ -1,10 +1,22 @@
-import json
+import hashlib
+import itertools
 import os
-import glob
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, date, timedelta
 
+import research_store
+import schema
+from crawlers import delta as _delta
+from crawlers import feature_cache, live_store, manifest, normalize, parse_cache, storage
+from config import (DATA_DIR as _DEFAULT_DATA_DIR, LIVE_STORE_DIR, PARSE_WORKERS, PARSE_BATCH_FILES,
+                    PARSE_CACHE_ENABLED, PARSE_CACHE_DIR, FEATURE_CACHE_ENABLED, FEATURE_CACHE_DIR,
+                    FEATURE_CACHE_KEEP, TIMETABLE_LRU_SIZE)
+
 # ── 雲端模式偵測 ──────────────────────────────────────────────
 # 若環境變數 STREAMLIT_CLOUD=1，則從 GitHub raw 讀取 CSV
 CLOUD_MODE = os.environ.get("STREAMLIT_CLOUD", "0") == "1"
@@ -26,18 +38,10 @@ RESEARCH_DELAY_THRESHOLD = 2   # 單位：分鐘
 def _normalize_station_id(value):
     if pd.isna(value):
         return np.nan
-    station_id = str(value).strip()
-    return station_id.zfill(4) if station_id else np.nan
-
-# 車種簡化對照：統一歸為五類
-def _simplify_type(type_name: str) -> str:
-    if not type_name: return "其他"
-    if '太魯閣' in type_name or '普悠瑪' in type_name: return "傾斜式自強"
-    if '自強' in type_name: return "自強"
-    if '區間快' in type_name: return "區間快"
-    if '區間' in type_name: return "區間"
-    if '莒光' in type_name: return "莒光"
-    return "其他"
+    return normalize.normalize_station_id(value, missing=np.nan)
+
+# 車種簡化對照：統一歸為五類（規則見 crawlers/normalize.py，live store 共用）
+_simplify_type = normalize.simplify_type
 
 # 時段分類（參照 Notion 研究設計）
 def _get_period(time_str: str) -> str:
@@ -68,6 +72,180 @@ def _holiday_type(date_str: str) -> str:
 def _is_holiday(date_str: str) -> int:
     return 0 if _holiday_type(date_str) == "平日" else 1
 
+# ── 向量化衍生欄位 ────────────────────────────────────────────
+# 日期 / 車種 / 時間的不重複值只有數十到上千個，逐值函式對每個不重複值只算一次，
+# 再以 factorize 的整數代碼展開回原長度；結果與逐列 .apply 相同（含 dtype）。
+
+def _map_unique(values: pd.Series, func) -> pd.Series:
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    mapped = pd.Series([func(u) for u in uniques])
+    return mapped.take(codes).set_axis(values.index)
+
+def _hour_token(times: pd.Series) -> pd.Series:
+    """"HH:MM" → "HH"（向量化切字串，等同逐列 str(t).split(":")[0]）。"""
+    return times.astype(str).str.split(":", n=1).str[0]
+
+def _period_of_hour(token) -> str:
+    return _get_period(token) if isinstance(token, str) else "未知"
+
+def _arr_hour(times: pd.Series) -> pd.Series:
+    """ScheduledArr → 整點小時（int）；非 "HH:MM" 字串為 -1。"""
+    token = _hour_token(times).where(times.str.contains(":", regex=False, na=False))
+    return _map_unique(token, lambda h: int(h) if isinstance(h, str) else -1)
+
+
+# ══════════════════════════════════════════════════════════════
+#  原始快照讀取（支援差分存檔，見 crawlers/delta.py）
+# ══════════════════════════════════════════════════════════════
+
+def _load_json_quiet(path: str) -> dict:
+    """讀取單一快照（任一存檔格式）；檔案損毀時回傳空 dict（與舊版逐檔 try/except 行為一致）。"""
+    try:
+        return storage.load_payload(path)
+    except Exception:
+        return {}
+
+def _group_by_folder(files) -> dict:
+    """依日期資料夾分組並排序；差分鏈以資料夾為單位。"""
+    groups = {}
+    for f in sorted(files):
+        groups.setdefault(os.path.dirname(f), []).append(f)
+    return groups
+
+def iter_raw_snapshots(files, root_key: str):
+    """逐檔產生 (path, records)：差分檔自動還原成完整紀錄；
+    指標檔（內容未變）與無法還原的檔案略過。"""
+    for paths in _group_by_folder(files).values():
+        for path, payload, records in _delta.iter_chain(paths, _load_json_quiet, root_key):
+            if records is None or _delta.kind(payload) == "pointer":
+                continue
+            yield path, records
+
+def _parse_live_batch(task) -> list:
+    """解析同一資料夾 paths[start:end] 的即時快照，回傳 [(index, kind, 欄式結果 {欄位: list})]。
+    可在 process pool 中執行（模組層級函式才能 pickle）。
+    批次開頭若是差分 / 指標檔，往前找到最近的完整快照開始還原，
+    因此切批與否，每份快照還原出的紀錄都與整個資料夾依序解析相同。"""
+    paths, start, end, root_key = task
+    loaded = {}
+
+    def load(path):
+        if path not in loaded:
+            loaded[path] = _load_json_quiet(path)
+        return loaded[path]
+
+    begin = start
+    while begin > 0 and _delta.kind(load(paths[begin])) in ("delta", "pointer"):
+        begin -= 1
+
+    results = []
+    pool = normalize.new_pool()   # 整批共用的字串表（StationName 等重複值只留一份）
+    chain = _delta.iter_chain(paths[begin:end], load, root_key)
+    for i, (path, payload, records) in enumerate(chain, begin):
+        if i < start:
+            continue
+        kind = _delta.kind(payload)
+        columns = {}
+        if records is not None and kind != "pointer":
+            columns = normalize.live_board_columns(
+                records, os.path.basename(os.path.dirname(path)), storage.stem(path),
+                missing=np.nan, pool=pool)
+            if not columns["Date"]:
+                columns = {}
+        results.append((i, kind, columns))
+        loaded.pop(path, None)
+    return results
+
+def _index_runs(indices, step: int) -> list:
+    """已排序的 index → 連續區段 [(start, end)]，每段最多 step 個。"""
+    runs = []
+    for i in indices:
+        if runs and runs[-1][1] == i and i - runs[-1][0] < step:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return [tuple(r) for r in runs]
+
+def _iter_parsed_folders(groups: dict, root_key: str, workers: int = 0,
+                         batch_files: int = PARSE_BATCH_FILES, todo: dict = None):
+    """{資料夾: [已排序 paths]} → 依序產生 (資料夾, {index: (kind, 欄式結果)})。
+    每個資料夾解析完就交出，呼叫端可立即轉成 DataFrame，記憶體峰值約為單一資料夾。
+    todo {資料夾: [index]} 指定時只解析這些檔案（解析快取失效的部分），沒有待解析檔案的資料夾不產生。
+    workers > 1 時以 process pool 平行解析：連續的檔案切成 batch_files 份一批，
+    executor.map 依提交順序回傳，結果與逐檔解析完全相同。"""
+    tasks = []
+    for folder, paths in groups.items():
+        indices = range(len(paths)) if todo is None else todo.get(folder, [])
+        step = max(1, batch_files) if workers > 1 else max(1, len(paths))
+        for start, end in _index_runs(indices, step):
+            tasks.append((folder, (paths, start, end, root_key)))
+
+    def run():
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                yield from pool.map(_parse_live_batch, [t for _, t in tasks])
+        else:
+            for _, task in tasks:
+                yield _parse_live_batch(task)
+
+    current, per_file = None, {}
+    for (folder, _), results in zip(tasks, run()):
+        if folder != current and current is not None:
+            yield current, per_file
+            per_file = {}
+        current = folder
+        for i, kind, columns in results:
+            per_file[i] = (kind, columns)
+    if current is not None:
+        yield current, per_file
+
+def _merge_columns(per_file: dict) -> dict:
+    """{index: (kind, 欄式結果)} 依檔案順序接成一份欄式結果。"""
+    merged = {}
+    for i in sorted(per_file):
+        for k, values in per_file[i][1].items():
+            merged.setdefault(k, []).extend(values)
+    return merged
+
+def _from_normalized(df: pd.DataFrame, drop=()) -> pd.DataFrame:
+    """live store / 解析快取讀出的 DataFrame → 與逐檔解析相同的欄位與缺值（None 改回 NaN）。"""
+    df = df.drop(columns=list(drop))
+    for col in ("StationID", "EndingStationID"):
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+_OBS_KEYS = ["Date", "TrainNo", "StationID"]
+_OBS_COLUMNS = ["FirstSeenTime", "LastSeenTime", "ObsCount"]   # 只在原始解析快取中，預設不對外
+
+def _raw_view(df: pd.DataFrame, observations: bool) -> pd.DataFrame:
+    """原始解析快取 → 回傳給呼叫端的淺複本（observations=False 時去掉 _OBS_COLUMNS）。
+    淺複本共用底層資料；pandas 3 的 Copy-on-Write 讓呼叫端改值時才複製，不會回寫快取。"""
+    if observations:
+        return df.copy(deep=False)
+    return df.drop(columns=_OBS_COLUMNS, errors="ignore")
+
+def _taiwan_seen_time(date: pd.Series, crawl_time: pd.Series) -> pd.Series:
+    """資料夾日期（UTC）+ CrawlTime（HHMMSS）→ 台灣時間 "YYYY-MM-DD HH:MM:SS"，格式不符為 NaN。"""
+    ts = pd.to_datetime(date.astype(str) + crawl_time.astype(str), format="%Y-%m-%d%H%M%S",
+                        errors="coerce")
+    return (ts + pd.Timedelta(hours=8)).dt.strftime("%Y-%m-%d %H:%M:%S")
+
+def _latest_observations(df: pd.DataFrame):
+    """單一資料夾的全部觀測（依檔案時間順序）→ 每個 (Date, TrainNo, StationID) 只留最後一筆，
+    另加 FirstSeenTime / LastSeenTime（台灣時間）與 ObsCount（出現在幾份快照列中）。
+    回傳 (去重後的 DataFrame, 原始列數)；index 為該列在資料夾內的原始列號，
+    由呼叫端依資料夾順序平移成整體列號。指標檔（內容未變）沒有列，不計入 ObsCount。"""
+    n_rows = len(df)
+    df = df.reset_index(drop=True).sort_values("CrawlTime", kind="stable")
+    crawl = df.groupby(_OBS_KEYS, dropna=False, sort=False)["CrawlTime"]
+    first, count = crawl.transform("min"), crawl.transform("size")
+    keep = ~df.duplicated(subset=_OBS_KEYS, keep="last")
+    out = df[keep].copy()
+    out["FirstSeenTime"] = _taiwan_seen_time(out["Date"], first[keep])
+    out["LastSeenTime"] = _taiwan_seen_time(out["Date"], out["CrawlTime"])
+    out["ObsCount"] = count[keep].astype("int64")
+    return out.sort_index(), n_rows
+
 
 # ══════════════════════════════════════════════════════════════
 #  時刻表衍生變數計算
@@ -81,6 +259,109 @@ def _time_to_minutes(t: str) -> float:
     except:
         return np.nan
 
+def _timetable_stop_frame(data: dict) -> pd.DataFrame:
+    """時刻表 payload → 每個【班次 × 車站】一列的 DataFrame（build_timetable_features 的前半段）。
+    巢狀 JSON 只走訪一次、攤平成每站一格的欄位；班次層級欄位每班存一次再依停靠站數展開，
+    分鐘數對不重複的時間字串各算一次，DwellMin / RunMin / IsTerminal 以陣列位移在班次邊界內計算。"""
+    trains = {name: [] for name in ("TrainNo", "TrainTypeRaw", "Direction", "TripLine",
+                                    "StartingStationID", "EndingStationID")}
+    stations, seqs, arrs, deps, counts = [], [], [], [], []
+    station_ids = {}
+
+    def station_id(value):
+        if type(value) is not str:
+            return _normalize_station_id(value)
+        if value not in station_ids:
+            station_ids[value] = _normalize_station_id(value)
+        return station_ids[value]
+
+    for train in data.get("TrainTimetables", []):
+        stops = train.get("StopTimes", [])
+        if not stops:
+            continue
+        info = train.get("TrainInfo", {})
+        trains["TrainNo"].append(info.get("TrainNo"))
+        trains["TrainTypeRaw"].append(info.get("TrainTypeName", {}).get("Zh_tw", ""))
+        trains["Direction"].append(info.get("Direction", np.nan))
+        trains["TripLine"].append(info.get("TripLine", np.nan))
+        trains["StartingStationID"].append(station_id(info.get("StartingStationID", "")))
+        trains["EndingStationID"].append(station_id(info.get("EndingStationID", "")))
+        counts.append(len(stops))
+        for i, stop in enumerate(stops):
+            stations.append(station_id(stop.get("StationID")))
+            seqs.append(stop.get("StopSequence", i + 1))
+            arrs.append(stop.get("ArrivalTime", ""))
+            deps.append(stop.get("DepartureTime", ""))
+
+    if not counts:
+        return pd.DataFrame()
+    counts = np.asarray(counts)
+    train_cols = {k: pd.Series(v).repeat(counts).reset_index(drop=True) for k, v in trains.items()}
+    train_cols["TrainTypeSimple"] = _map_unique(train_cols["TrainTypeRaw"], _simplify_type)
+
+    # 站序（班次內第幾站）與班次邊界
+    ends = np.cumsum(counts)
+    pos = np.arange(ends[-1]) - np.repeat(ends - counts, counts)
+    is_last = pos == np.repeat(counts - 1, counts)
+
+    arr_str, dep_str = pd.Series(arrs), pd.Series(deps)
+    # 全部時間都能解析時為 int64，否則為含 NaN 的 float64（與逐站計算的推斷結果相同）
+    arr_col = _map_unique(arr_str, _time_to_minutes)
+    dep_col = _map_unique(dep_str, _time_to_minutes)
+    arr_min, dep_min = arr_col.to_numpy(dtype=float), dep_col.to_numpy(dtype=float)
+    # 與前站的運轉時分：前一列的開車時間，每班第一站為 NaN
+    prev_dep = np.empty_like(dep_min)
+    prev_dep[0] = np.nan
+    prev_dep[1:] = dep_min[:-1]
+    prev_dep[pos == 0] = np.nan
+    dwell = dep_min - arr_min
+
+    return pd.DataFrame({
+        "TrainNo": train_cols["TrainNo"],
+        "TrainTypeRaw": train_cols["TrainTypeRaw"],
+        "TrainTypeSimple": train_cols["TrainTypeSimple"],
+        "Direction": train_cols["Direction"],
+        "TripLine": train_cols["TripLine"],
+        "StartingStationID": train_cols["StartingStationID"],
+        "EndingStationID": train_cols["EndingStationID"],
+        "StationID": pd.Series(stations),
+        "StopSeq": pd.Series(seqs),
+        "ScheduledArr": arr_str,
+        "ScheduledDep": dep_str,
+        "ArrMinute": arr_col,
+        "DepMinute": dep_col,
+        "DwellMin": np.where(np.isnan(dwell), 0, dwell).astype("int64"),
+        "RunMin": arr_min - prev_dep,
+        "IsTerminal": is_last.astype(int),
+    })
+
+_TRAIN_DATE_RE = re.compile(rb'"TrainDate"\s*:\s*"(\d{4}-\d{2}-\d{2})"')
+_FILE_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+def _timetable_train_date(path: str):
+    """時刻表檔的 TrainDate（營運日，台灣日期）。
+    DailyTrainTimetable 的 TrainDate 在檔案開頭，JSON 檔只讀前 4 KB；其他格式整份載入。
+    檔名日期是爬取當下的主機日期（UTC），常比 TrainDate 早一天，只在讀不到 TrainDate 時才用。"""
+    try:
+        if storage.split_ext(path)[1] == ".json":
+            with open(path, "rb") as f:
+                m = _TRAIN_DATE_RE.search(f.read(4096))
+            if m:
+                return m.group(1).decode()
+        data = storage.load_payload(path)
+        if isinstance(data, dict) and data.get("TrainDate"):
+            return str(data["TrainDate"])[:10]
+    except Exception:
+        pass
+    m = _FILE_DATE_RE.search(os.path.basename(path))
+    return m.group(1) if m else None
+
+# _timetable_stop_frame / build_timetable_features 的產出有變動時調高，特徵快取隨之失效
+TIMETABLE_FEATURE_VERSION = 1
+
+# build_research_dataset 的產出（欄位、計算方式）有變動時調高，research store 下次匯出整份重建
+RESEARCH_EXPORT_VERSION = 1
+
 def build_timetable_features(timetable_path: str) -> pd.DataFrame:
     """
     從時刻表 JSON 計算每個【班次 × 車站】的結構性特徵：
@@ -96,60 +377,20 @@ def build_timetable_features(timetable_path: str) -> pd.DataFrame:
     - MixIndex      : 同站同小時內行駛的不同車種數
     - SpeedDiff     : 同站同小時內最快與最慢車種運轉時分差（分鐘）
     """
-    with open(timetable_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    records = []
-    for train in data.get("TrainTimetables", []):
-        info = train.get("TrainInfo", {})
-        train_no = info.get("TrainNo")
-        type_raw = info.get("TrainTypeName", {}).get("Zh_tw", "")
-        type_simple = _simplify_type(type_raw)
-        stops = train.get("StopTimes", [])
-        n = len(stops)
-
-        for i, stop in enumerate(stops):
-            arr_str = stop.get("ArrivalTime", "")
-            dep_str = stop.get("DepartureTime", "")
-            arr_min = _time_to_minutes(arr_str)
-            dep_min = _time_to_minutes(dep_str)
-
-            # 與前站的運轉時分
-            if i > 0:
-                prev_dep = _time_to_minutes(stops[i-1].get("DepartureTime", ""))
-                run_min = arr_min - prev_dep if not np.isnan(arr_min) and not np.isnan(prev_dep) else np.nan
-            else:
-                run_min = np.nan
-
-            records.append({
-                "TrainNo": train_no,
-                "TrainTypeRaw": type_raw,
-                "TrainTypeSimple": type_simple,
-                "Direction": info.get("Direction", np.nan),
-                "TripLine": info.get("TripLine", np.nan),
-                "StartingStationID": _normalize_station_id(info.get("StartingStationID", "")),
-                "EndingStationID": _normalize_station_id(info.get("EndingStationID", "")),
-                "StationID": _normalize_station_id(stop.get("StationID")),
-                "StopSeq": stop.get("StopSequence", i + 1),
-                "ScheduledArr": arr_str,
-                "ScheduledDep": dep_str,
-                "ArrMinute": arr_min,
-                "DepMinute": dep_min,
-                "DwellMin": dep_min - arr_min if not np.isnan(dep_min) and not np.isnan(arr_min) else 0,
-                "RunMin": run_min,
-                "IsTerminal": 1 if i == n - 1 else 0,
-            })
-
-    df = pd.DataFrame(records)
+    df = _timetable_stop_frame(storage.load_payload(timetable_path))
     if df.empty:
         return df, pd.DataFrame()
 
     # ── 車種混合度 & 速差指標（以小時為單位，依站聚合）──
-    df["ArrHour"] = df["ArrMinute"].apply(lambda x: int(x // 60) if not np.isnan(x) else -1)
-    mix_df = df.groupby(["StationID", "ArrHour"]).agg(
-        MixIndex=("TrainTypeSimple", "nunique"),
-        SpeedDiff=("RunMin", lambda x: x.max() - x.min() if x.count() > 1 else 0)
-    ).reset_index()
+    arr_min = df["ArrMinute"].to_numpy()
+    df["ArrHour"] = np.where(np.isnan(arr_min), -1, arr_min // 60).astype(int)
+    grouped = df.groupby(["StationID", "ArrHour"])
+    run = grouped["RunMin"]
+    mix_df = pd.DataFrame({
+        "MixIndex": grouped["TrainTypeSimple"].nunique(),
+        # 同站同小時僅一筆有效運轉時分時速差為 0
+        "SpeedDiff": (run.max() - run.min()).where(run.count() > 1, 0),
+    }).reset_index()
 
     return df, mix_df
 
@@ -159,10 +400,29 @@ def build_timetable_features(timetable_path: str) -> pd.DataFrame:
 # ══════════════════════════════════════════════════════════════
 
 class DataProcessor:
-    def __init__(self, data_dir):
+    def __init__(self, data_dir, live_store_dir=None, parse_workers=None, parse_cache_dir=None,
+                 feature_cache_dir=None):
         self.data_dir = data_dir
-        self._raw_cache = {}        # 原始 JSON 解析快取
+        # 即時快照平行解析的 process 數；0 / 1 為單一 process 依序解析
+        self.parse_workers = PARSE_WORKERS if parse_workers is None else parse_workers
+        # live store / 解析快取以資料夾名稱對應 config.DATA_DIR；分析其他資料目錄時不套用
+        is_default_dir = os.path.realpath(data_dir) == os.path.realpath(_DEFAULT_DATA_DIR)
+        if live_store_dir is None and is_default_dir:
+            live_store_dir = LIVE_STORE_DIR
+        self.live_store_dir = live_store_dir
+        if parse_cache_dir is None and is_default_dir and PARSE_CACHE_ENABLED:
+            parse_cache_dir = PARSE_CACHE_DIR
+        self.parse_cache_dir = parse_cache_dir
+        # 時刻表特徵快取以檔案內容為鍵，任何資料目錄都可共用
+        if feature_cache_dir is None and FEATURE_CACHE_ENABLED:
+            feature_cache_dir = FEATURE_CACHE_DIR
+        self.feature_cache_dir = feature_cache_dir
+        self._raw_cache = {}        # 原始 JSON 解析快取（唯讀，取用時回傳淺複本）
         self._timetable_df = None    # 時刻表快取
+        self._timetable_lru = OrderedDict()  # 時刻表檔 → (班次×車站, 混合度)，最多 TIMETABLE_LRU_SIZE 份
+        self._train_dates = {}       # 時刻表檔 → (排序鍵, TrainDate)
+        self._timetable_listing = None  # 時刻表檔 → 排序鍵；每次建構研究資料集時重列一次
+        self.research_memory_report = None  # 最近一次研究資料集各欄轉換前後的記憶體（schema.memory_report）
         self._mix_df = None          # 混合度快取
         self._stations_df = None     # 站點快取
         self._line_network_df = None # 路線網路快取
@@ -186,23 +446,123 @@ class DataProcessor:
         if self._timetable_df is not None:
             return self._timetable_df, self._mix_df
         # 優先用 DailyTrainTimetable（daily_*.json），其次用 GeneralTrainTimetable
-        daily_files = glob.glob(os.path.join(self.data_dir, "timetable", "daily_*.json"))
-        general_files = glob.glob(os.path.join(self.data_dir, "timetable", "*.json"))
-        general_files = [f for f in general_files if "daily_" not in os.path.basename(f)]
-        files = daily_files if daily_files else general_files
-        if not files:
+        latest = self._latest_timetable_file()
+        if latest is None:
             return pd.DataFrame(), pd.DataFrame()
-        latest = max(files, key=os.path.getmtime)
-        self._timetable_df, self._mix_df = build_timetable_features(latest)
+        self._timetable_df, self._mix_df = self._timetable_for_path(latest)
         return self._timetable_df, self._mix_df
 
+    def _timetable_for_path(self, path: str):
+        """單一時刻表檔的特徵，經 LRU 快取；超過 TIMETABLE_LRU_SIZE 份時丟掉最久未用的。"""
+        if path in self._timetable_lru:
+            self._timetable_lru.move_to_end(path)
+            return self._timetable_lru[path]
+        features = self._timetable_features(path)
+        self._timetable_lru[path] = features
+        while len(self._timetable_lru) > TIMETABLE_LRU_SIZE:
+            self._timetable_lru.popitem(last=False)
+        return features
+
+    def _timetable_files(self) -> dict:
+        """{時刻表檔: 排序鍵}，快取到下一次建構研究資料集。
+        有爬取清單時取 manifest.latest_entries（鍵為 (crawl_utc, 相對路徑)，略過已不存在的檔案），
+        否則 glob data/timetable/（鍵為 (mtime, 路徑)）。"""
+        if self._timetable_listing is not None:
+            return self._timetable_listing
+        files = {}
+        if manifest.available(self.data_dir, "timetable"):
+            for rel, e in manifest.latest_entries(self.data_dir, "timetable").items():
+                full = os.path.join(self.data_dir, *rel.split("/"))
+                if os.path.exists(full):
+                    # 同一時間（補建時取自 mtime）以檔名較新者為準
+                    files[full] = (e["crawl_utc"], rel)
+        if not files:
+            for path in storage.glob_payloads(os.path.join(self.data_dir, "timetable", "*")):
+                try:
+                    files[path] = (os.path.getmtime(path), path)
+                except OSError:
+                    continue
+        self._timetable_listing = files
+        return files
+
+    def _daily_timetables(self) -> dict:
+        """{TrainDate: 時刻表檔}；同一天有多份時取最新抓取者。"""
+        by_date = {}
+        for path, order in self._timetable_files().items():
+            if not os.path.basename(path).startswith("daily_"):
+                continue
+            cached = self._train_dates.get(path)
+            if cached is None or cached[0] != order:
+                cached = self._train_dates[path] = (order, _timetable_train_date(path))
+            train_date = cached[1]
+            if train_date and (train_date not in by_date or order > by_date[train_date][0]):
+                by_date[train_date] = (order, path)
+        return {d: path for d, (_, path) in by_date.items()}
+
+    def _timetables_for_dates(self, dates) -> dict:
+        """{台灣日期: 時刻表檔}。當天沒有 DailyTrainTimetable 時取日期最接近的一份（同距離取較早），
+        完全沒有 daily_*.json 時退回 _latest_timetable_file（GeneralTrainTimetable）。"""
+        daily = self._daily_timetables()
+        if not daily:
+            latest = self._latest_timetable_file()
+            return {d: latest for d in dates} if latest else {}
+        ordinals = {}
+        for d in daily:
+            try:
+                ordinals[d] = datetime.strptime(d, "%Y-%m-%d").toordinal()
+            except ValueError:
+                pass
+        out = {}
+        for d in dates:
+            if d in daily:
+                out[d] = daily[d]
+                continue
+            try:
+                target = datetime.strptime(str(d), "%Y-%m-%d").toordinal()
+            except ValueError:
+                continue
+            if ordinals:
+                nearest = min(ordinals, key=lambda k: (abs(ordinals[k] - target), ordinals[k]))
+                out[d] = daily[nearest]
+        return out
+
+    def _timetable_features(self, path: str):
+        """build_timetable_features(path)，結果依檔案內容雜湊快取（crawlers/feature_cache.py）。"""
+        if not self.feature_cache_dir:
+            return build_timetable_features(path)
+        try:
+            key = feature_cache.cache_key(path, TIMETABLE_FEATURE_VERSION)
+            hit = feature_cache.load(self.feature_cache_dir, "timetable", key, ("stops", "mix"))
+        except Exception:
+            key, hit = None, None
+        if hit is not None:
+            return hit["stops"], hit["mix"]
+        tt_df, mix_df = build_timetable_features(path)
+        if key is not None and not tt_df.empty:
+            try:
+                # 每份時刻表都要留一組，保留數至少涵蓋目前所有時刻表檔
+                feature_cache.save(self.feature_cache_dir, "timetable", key,
+                                   {"stops": tt_df, "mix": mix_df}, source=path,
+                                   keep=max(FEATURE_CACHE_KEEP, len(self._timetable_files())))
+            except Exception:
+                pass    # 快取寫不進去（唯讀目錄等）不影響結果
+        return tt_df, mix_df
+
+    def _latest_timetable_file(self):
+        """最新一份時刻表檔（DailyTrainTimetable 優先）：有爬取清單時依 crawl_utc，否則依檔案 mtime。"""
+        files = self._timetable_files()
+        daily = [p for p in files if os.path.basename(p).startswith("daily_")]
+        candidates = daily or list(files)
+        if not candidates:
+            return None
+        return max(candidates, key=files.get)
+
     def _load_train_types(self):
         """載入 TrainType 對照表，回傳 {TrainTypeID: {code, name_zh, simple}} dict。"""
-        path = os.path.join(self.data_dir, "static", "train_types.json")
-        if not os.path.exists(path):
+        path = storage.find_payload(os.path.join(self.data_dir, "static", "train_types.json"))
+        if path is None:
             return {}
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = storage.load_payload(path)
         result = {}
         for t in data.get("TrainTypes", []):
             tid = t.get("TrainTypeID", "")
@@ -236,7 +596,7 @@ class DataProcessor:
             try:
                 url = f"{GITHUB_RAW_BASE}/static/stations.json?v={cache_busting}"
                 with urllib.request.urlopen(url) as resp:
-                    data = json.loads(resp.read().decode())
+                    data = storage.loads_payload(resp.read())
                 records = [{"StationID": s.get("StationID"),
                             "StationName": s.get("StationName", {}).get("Zh_tw"),
                             "StationClass": s.get("StationClass"),
@@ -251,12 +611,11 @@ class DataProcessor:
                 self._stations_df = pd.DataFrame()
                 return self._stations_df
 
-        path = os.path.join(self.data_dir, "static", "stations.json")
-        if not os.path.exists(path):
+        path = storage.find_payload(os.path.join(self.data_dir, "static", "stations.json"))
+        if path is None:
             self._stations_df = pd.DataFrame()
             return self._stations_df
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = storage.load_payload(path)
         records = [{"StationID": s.get("StationID"),
                     "StationName": s.get("StationName", {}).get("Zh_tw"),
                     "StationClass": s.get("StationClass"),
@@ -297,12 +656,11 @@ class DataProcessor:
         """載入 LineNetwork，建構每條路線的站序與累積里程對照。"""
         if self._line_network_df is not None:
             return self._line_network_df
-        path = os.path.join(self.data_dir, "static", "line_network.json")
-        if not os.path.exists(path):
+        path = storage.find_payload(os.path.join(self.data_dir, "static", "line_network.json"))
+        if path is None:
             self._line_network_df = pd.DataFrame()
             return self._line_network_df
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = storage.load_payload(path)
         records = []
         for line in data.get("LineNetworks", []):
             line_id = line.get("LineID")
@@ -377,16 +735,15 @@ class DataProcessor:
             try:
                 url = f"{GITHUB_RAW_BASE}/static/shape.json?v={cache_busting}"
                 with urllib.request.urlopen(url) as resp:
-                    data = json.loads(resp.read().decode())
+                    data = storage.loads_payload(resp.read())
                 return _parse_shape_data(data)
             except Exception:
                 return {}
 
-        path = os.path.join(self.data_dir, "static", "shape.json")
-        if not os.path.exists(path):
+        path = storage.find_payload(os.path.join(self.data_dir, "static", "shape.json"))
+        if path is None:
             return {}
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = storage.load_payload(path)
         return _parse_shape_data(data)
 
     def get_shape(self) -> dict:
@@ -417,108 +774,186 @@ class DataProcessor:
         result = line_df[line_df["StationID"].isin(station_ids)]
         return result.sort_values("StationOrder")
 
+    def _snapshot_files(self, data_subdir: str, date_str=None) -> list:
+        """<data_subdir>/<date>/<time> 快照檔清單：指定日期且有爬取清單時查清單
+        （與目錄列表不一致時改用列表，見 manifest.snapshot_paths），否則 glob。
+        date_str 可為單一資料夾日期或日期清單。"""
+        if isinstance(date_str, (list, tuple, set)):
+            return [f for d in sorted(date_str) for f in self._snapshot_files(data_subdir, d)]
+        if date_str and manifest.available(self.data_dir, data_subdir):
+            return manifest.snapshot_paths(self.data_dir, data_subdir, date_str)
+        pattern = os.path.join(self.data_dir, data_subdir,
+                               date_str if date_str else "*", "*")
+        return storage.glob_payloads(pattern)
+
     def _parse_raw_json(self, data_subdir: str, root_key: str,
-                        date_str=None) -> pd.DataFrame:
+                        date_str=None, observations=False) -> pd.DataFrame:
         """
-        統一解析 data/<data_subdir>/<date>/<time>.json 格式的即時資料。
+        統一解析 data/<data_subdir>/<date>/<time>.json 格式的即時資料
+        （.json.gz / .json.zst / .msgpack 亦可，依檔頭自動判斷）。
         StationLiveBoard 直接含有 ScheduleArrivalTime / ScheduleDepartureTime，
         不需再 join 時刻表取得表定到站時間。
+        observations=True 時另含去重時統計的 FirstSeenTime / LastSeenTime / ObsCount
+        （_latest_observations）；預設不含，parse_live_board 等輸出欄位與去重前相同。
         """
-        pattern = os.path.join(self.data_dir, data_subdir,
-                               date_str if date_str else "*", "*.json")
+        if isinstance(date_str, (list, tuple, set)):
+            date_str = tuple(sorted(date_str))
         cache_key = (data_subdir, root_key, date_str or "__all__")
         cached = self._raw_cache.get(cache_key)
         if cached is not None:
-            return cached.copy()
-        files = glob.glob(pattern)
+            return _raw_view(cached, observations)
+        files = self._snapshot_files(data_subdir, date_str)
         if not files:
             return pd.DataFrame()
 
-        records = []
-        for f in files:
-            try:
-                with open(f, "r", encoding="utf-8") as fp:
-                    data = json.load(fp)
-                date_folder = os.path.basename(os.path.dirname(f))
-                crawl_time = os.path.basename(f).replace(".json", "")
+        # 去重複：同日同車次同車站只保留最後一筆。鍵含 Date（= 資料夾），
+        # 每個資料夾讀完就先去重，記憶體中只留各資料夾去重後的結果
+        groups = _group_by_folder(files)
+        latest, pending = {}, {}
+        for folder, paths in groups.items():
+            parts = self._live_store_parts(data_subdir, paths)
+            if parts is None:
+                pending[folder] = paths
+            elif parts:
+                latest[folder] = _latest_observations(parts[0])
+        latest.update(self._parse_folders(data_subdir, root_key, pending))
+
+        # 依資料夾順序組回，index 平移為整體列號，與平行 / 快取與否無關
+        frames, offset = [], 0
+        for folder in groups:
+            if folder in latest:
+                frame, n_rows = latest[folder]
+                frame.index += offset
+                offset += n_rows
+                frames.append(frame)
+
+        if not frames:
+            return pd.DataFrame()
+        df = pd.concat(frames) if len(frames) > 1 else frames[0]
+        df = df.sort_values("CrawlTime", kind="stable")
+        self._raw_cache[cache_key] = df
+        return _raw_view(df, observations)
+
+    def _parse_folders(self, data_subdir: str, root_key: str, pending: dict) -> dict:
+        """解析未入 live store 的資料夾 → {資料夾: _latest_observations 結果}（無資料的資料夾不列）。
+        有解析快取（crawlers/parse_cache.py）時只解析新增 / 變更的檔案，其餘沿用快取。"""
+        lookups = {}
+        if self.parse_cache_dir:
+            for folder, paths in pending.items():
                 try:
-                    utc_dt = datetime.strptime(f"{date_folder} {crawl_time}", "%Y-%m-%d %H%M%S")
-                    taiwan_date = (utc_dt + timedelta(hours=8)).strftime("%Y-%m-%d")
+                    lookups[folder] = parse_cache.lookup(self.parse_cache_dir, data_subdir, paths)
                 except Exception:
-                    taiwan_date = date_folder
-                for r in data.get(root_key, []):
-                    # ScheduleArrivalTime 格式為 HH:MM:SS，取前 5 碼統一為 HH:MM
-                    arr_raw = r.get("ScheduleArrivalTime", "")
-                    arr_hhmm = arr_raw[:5] if arr_raw else ""
-                    dep_raw = r.get("ScheduleDepartureTime", "")
-                    dep_hhmm = dep_raw[:5] if dep_raw else ""
-                    records.append({
-                        "Date": date_folder,
-                        "TaiwanDate": taiwan_date,
-                        "CrawlTime": crawl_time,
-                        "TrainNo": r.get("TrainNo"),
-                        "StationID": _normalize_station_id(r.get("StationID")),
-                        "StationName": r.get("StationName", {}).get("Zh_tw"),
-                        "TrainTypeRaw": r.get("TrainTypeName", {}).get("Zh_tw", ""),
-                        "Direction": r.get("Direction", np.nan),
-                        "TripLine": r.get("TripLine", np.nan),
-                        "EndingStationID": _normalize_station_id(r.get("EndingStationID", "")),
-                        "ScheduleArrivalTime": arr_hhmm,
-                        "ScheduleDepartureTime": dep_hhmm,
-                        "RunningStatus": r.get("RunningStatus", 0),
-                        "UpdateTime": r.get("UpdateTime", ""),
-                        "DelayTime": r.get("DelayTime", 0),
-                    })
-            except:
-                pass
-
-        if not records:
-            return pd.DataFrame()
-        df = pd.DataFrame(records)
-
-        # 去重複：同日同車次同車站只保留最後一筆
-        df = df.sort_values("CrawlTime").drop_duplicates(
-            subset=["Date", "TrainNo", "StationID"], keep="last")
-        self._raw_cache[cache_key] = df.copy()
-        return df
+                    pass
+        todo = {folder: lookups[folder]["stale"] if folder in lookups else range(len(paths))
+                for folder, paths in pending.items()}
+        parsed = _iter_parsed_folders(pending, root_key, self.parse_workers, todo=todo)
+
+        # 全部檔案都命中解析快取的資料夾不會出現在 parsed 中，per_file 為空
+        fully_cached = [(folder, {}) for folder, hit in lookups.items() if not hit["stale"]]
+        frames = {}
+        for folder, per_file in itertools.chain(parsed, fully_cached):
+            frame = self._folder_frame(data_subdir, root_key, folder, pending[folder],
+                                       lookups.get(folder), per_file)
+            if frame is not None:
+                frames[folder] = _latest_observations(frame)
+        return frames
+
+    def _folder_frame(self, data_subdir, root_key, folder, paths, hit, per_file):
+        """單一資料夾的解析結果（有快取時先併入快取）→ DataFrame；無資料回傳 None。"""
+        if hit is not None:
+            try:
+                table = parse_cache.update(self.parse_cache_dir, data_subdir, paths, hit, per_file)
+                if not table.num_rows:
+                    return None
+                return _from_normalized(table.to_pandas(), drop=(parse_cache.FILE_COLUMN,))
+            except Exception:
+                # 欄位型別不符等無法寫入快取的情況：整個資料夾改為直接解析
+                per_file = next(_iter_parsed_folders({folder: paths}, root_key, self.parse_workers),
+                                (folder, {}))[1]
+        columns = _merge_columns(per_file)
+        return pd.DataFrame(columns) if columns else None
+
+    def _live_store_parts(self, kind: str, paths: list):
+        """同一資料夾的快照若都已寫入 live store（crawlers/live_store.py），
+        回傳 [DataFrame]（無資料時為 []）；任一份未入庫時回傳 None，由呼叫端改為解析 JSON。"""
+        if (not self.live_store_dir or kind not in live_store.KINDS
+                or not os.path.isdir(os.path.join(self.live_store_dir, kind))):
+            return None
+        try:
+            df = live_store.load_sources(self.live_store_dir, kind, paths)
+        except Exception:
+            return None
+        if df is None or df.empty:
+            return None if df is None else []
+        if kind == "station_live":
+            df = _from_normalized(df, drop=("TrainType",))
+        return [df]
+
+    def get_station_live_snapshot(self, date_str: str, crawl_time: str) -> list:
+        """還原任一時點的 StationLiveBoard 快照（完整紀錄 list），
+        不論該檔是完整快照、keyframe、差分或指標檔。"""
+        paths = sorted(self._snapshot_files("station_live", date_str), key=storage.stem)
+        stems = [storage.stem(p) for p in paths]
+        if crawl_time not in stems:
+            return []
+        chain = paths[:stems.index(crawl_time) + 1]
+        records = None
+        for _, _, records in _delta.iter_chain(chain, _load_json_quiet, "StationLiveBoards"):
+            pass
+        return records or []
+
+    def iter_station_live_changes(self, date_str=None):
+        """直接串流 station_live 變更紀錄，不還原整份快照。
+        逐檔產生 (Date, CrawlTime, upserts, removed_keys)：upserts 為新增或內容有變的
+        完整紀錄；removed_keys 為 [TrainNo, StationID, n]。
+        """
+        for folder, paths in _group_by_folder(self._snapshot_files("station_live", date_str)).items():
+            for path, upserts, removed in _delta.iter_changes(paths, _load_json_quiet,
+                                                              "StationLiveBoards"):
+                yield os.path.basename(folder), storage.stem(path), upserts, removed
 
 
     def _enrich_base_features(self, df: pd.DataFrame) -> pd.DataFrame:
-        """為解析後的 DataFrame 加上基本分類變數。
+        """為解析後的 DataFrame 加上基本分類變數，回傳新的 DataFrame（原有欄位與輸入共用資料，不複製）。
         表定到站時間直接使用 StationLiveBoard 的 ScheduleArrivalTime，
         不需 join GeneralTrainTimetable（SKILL 規範第3點）。
         """
-        df["TrainType"] = df["TrainTypeRaw"].apply(_simplify_type)
+        cols = {"TrainType": _map_unique(df["TrainTypeRaw"], _simplify_type)}
 
         # Y1：官方口徑（終點站 5 分鐘）— 主要依變數
-        df["IsDelayed"] = (df["DelayTime"] >= OFFICIAL_DELAY_THRESHOLD).astype(int)
+        cols["IsDelayed"] = (df["DelayTime"] >= OFFICIAL_DELAY_THRESHOLD).astype(int)
         # Y1b：研究口徑（路網站間 2 分鐘）— 輔助比較用
-        df["IsDelayed_Research"] = (df["DelayTime"] >= RESEARCH_DELAY_THRESHOLD).astype(int)
+        cols["IsDelayed_Research"] = (df["DelayTime"] >= RESEARCH_DELAY_THRESHOLD).astype(int)
 
         # ScheduledArr 直接從 API 欄位取得，統一欄位名稱
-        df["ScheduledArr"] = df["ScheduleArrivalTime"] if "ScheduleArrivalTime" in df.columns else ""
+        cols["ScheduledArr"] = (df["ScheduleArrivalTime"] if "ScheduleArrivalTime" in df.columns
+                                else pd.Series("", index=df.index))
 
         # Period 由 ScheduledArr 衍生
-        df["Period"] = df["ScheduledArr"].apply(_get_period)
+        cols["Period"] = _map_unique(_hour_token(cols["ScheduledArr"]), _period_of_hour)
         date_col = "TaiwanDate" if "TaiwanDate" in df.columns else "Date"
-        df["IsHoliday"] = df[date_col].apply(_is_holiday)
-        df["HolidayType"] = df[date_col].apply(_holiday_type)
-        return df
+        holiday_type = _map_unique(df[date_col], _holiday_type)
+        cols["IsHoliday"] = (holiday_type != "平日").astype(int)
+        cols["HolidayType"] = holiday_type
+        return df.assign(**cols)
 
 
     # ── 全台原始資料（儀表板用）────────────────────────────────
 
     def parse_live_board(self, date_str=None):
         """讀取全台 live_board，回傳基本清理後的 DataFrame（供儀表板總覽用）
-        雲端模式：直接讀 GitHub raw CSV，不解析 JSON。
+        雲端模式：讀 GitHub raw 上的 research store（Parquet），不解析 JSON。
         """
         if CLOUD_MODE or not os.path.exists(self.data_dir):
             from datetime import datetime
             cache_busting = int(datetime.now().timestamp())
-            url = f"{GITHUB_RAW_BASE}/processed_data.csv?v={cache_busting}"
             try:
-                df = pd.read_csv(url)
-                # 雲端模式：若 CSV 不含座標欄位，嘗試從 stations_coords.csv 補充
+                # 只讀 research store（只下載需要的日期）；整份 CSV 已不再定期更新，不作為備援
+                df = self._cloud_research_store(date_str)
+                if df is None:
+                    print(f"[warn] research store 無法讀取：{GITHUB_RAW_BASE}/research")
+                    return pd.DataFrame()
+                # 雲端模式：若資料不含座標欄位，嘗試從 stations_coords.csv 補充
                 if df.empty:
                     return df
                 if "Lat" not in df.columns or df["Lat"].isna().all():
@@ -589,73 +1024,83 @@ class DataProcessor:
 
     # ── 研究用資料集（含完整自變數）────────────────────────────
 
-    def build_research_dataset(self, date_str=None):
+    def build_research_dataset(self, date_str=None, compact=True):
         """
         建構研究用資料集（分析單位1：車次×車站）。
         Y1 IsDelayed（官方 5 分鐘口徑）、Y2 DelayTime（連續）
-        雲端模式：直接讀 GitHub raw processed_data.csv。
+        雲端模式：讀 GitHub raw 上的 research store。
+        date_str 為資料夾日期或日期清單（本機模式）；compact=True 時依 schema.RESEARCH_SCHEMA
+        轉為 category / 小整數型別。
         """
         if CLOUD_MODE or not os.path.exists(self.data_dir):
-            from datetime import datetime
-            cache_busting = int(datetime.now().timestamp())
-            for fname in ["processed_data.csv", "research_dataset.csv"]:
-                url = f"{GITHUB_RAW_BASE}/{fname}?v={cache_busting}"
-                try:
-                    df = pd.read_csv(url)
-                    if not df.empty:
-                        return df
-                except Exception:
-                    pass
+            stored = self._cloud_research_store(date_str)
+            if stored is not None:
+                return stored if compact else stored.astype(
+                    {c: stored[c].cat.categories.dtype for c in stored.columns
+                     if isinstance(stored[c].dtype, pd.CategoricalDtype)})
+            # 整份 CSV 已不再定期更新，不作為備援，避免默默回傳舊資料
+            print(f"[warn] research store 無法讀取：{GITHUB_RAW_BASE}/research")
             return pd.DataFrame()
 
+        self._timetable_listing = None    # 時刻表清單每次建構重列一次
         df = self._parse_raw_json("station_live", "StationLiveBoards", date_str)
         if df.empty:
             return df
 
         df = self._enrich_base_features(df)
 
-        # 星期、月份
-        def safe_date(ds):
-            try: return datetime.strptime(ds, "%Y-%m-%d")
-            except: return None
+        # 星期、月份（無法解析的日期為 NaN）
         date_col = "TaiwanDate" if "TaiwanDate" in df.columns else "Date"
-        df["_dt"] = df[date_col].apply(safe_date)
-        df["Weekday"] = df["_dt"].apply(lambda d: d.weekday() if d else np.nan)
-        df["Month"] = df["_dt"].apply(lambda d: d.month if d else np.nan)
-        df.drop(columns=["_dt"], inplace=True)
+        dt = pd.to_datetime(df[date_col], format="%Y-%m-%d", errors="coerce")
+        df["Weekday"] = dt.dt.weekday
+        df["Month"] = dt.dt.month
 
         # ── 終點站標記：EndingStationID 直接來自 LiveBoard ──
         df["IsTerminal"] = (
             df["StationID"].astype(str) == df["EndingStationID"].astype(str)
         ).astype(int)
 
-        # ── StopSeq、RunMin、MixIndex：仍需 GeneralTimetable 計算 ──
-        tt_df, mix_df = self._load_timetable()
-        if not tt_df.empty:
-            tt_merge = tt_df[["TrainNo", "StationID", "StopSeq", "RunMin"]].drop_duplicates(
-                subset=["TrainNo", "StationID"])
-            df = df.merge(tt_merge, on=["TrainNo", "StationID"], how="left")
-
+        # ── StopSeq、RunMin、MixIndex：依 TaiwanDate 對應當天的時刻表 ──
+        # 每份時刻表只取合併用的小表（_TTFile 標記來源），一次 merge 完成；
+        # 完整特徵表經 LRU 快取，日期再多也只留 TIMETABLE_LRU_SIZE 份在記憶體
+        tt_files = self._timetables_for_dates(df[date_col].dropna().unique())
+        stop_parts, first_parts, mix_parts = [], [], []
+        for path in dict.fromkeys(tt_files.values()):
+            tt_df, mix_df = self._timetable_for_path(path)
+            if tt_df.empty:
+                continue
+            stop_parts.append(tt_df[["TrainNo", "StationID", "StopSeq", "RunMin"]].drop_duplicates(
+                subset=["TrainNo", "StationID"]).assign(_TTFile=path))
             # 首末班時間
             first_dep = tt_df[tt_df["StopSeq"] == 1].groupby("TrainNo")["ScheduledDep"].first()
             last_arr = tt_df[tt_df["IsTerminal"] == 1].groupby("TrainNo")["ScheduledArr"].first()
-            df["FirstDep"] = df["TrainNo"].map(first_dep)
-            df["LastArr"] = df["TrainNo"].map(last_arr)
+            first_parts.append(pd.DataFrame({"FirstDep": first_dep, "LastArr": last_arr})
+                               .rename_axis("TrainNo").reset_index().assign(_TTFile=path))
+            if not mix_df.empty:
+                mix_parts.append(mix_df.assign(_TTFile=path))
+
+        df["_TTFile"] = df[date_col].map(tt_files)
+        if stop_parts:
+            df = df.merge(pd.concat(stop_parts, ignore_index=True),
+                          on=["_TTFile", "TrainNo", "StationID"], how="left")
+            df = df.merge(pd.concat(first_parts, ignore_index=True),
+                          on=["_TTFile", "TrainNo"], how="left")
         else:
             df["StopSeq"] = np.nan
             df["RunMin"] = np.nan
             df["FirstDep"] = np.nan
             df["LastArr"] = np.nan
 
-        if not mix_df.empty:
-            df["_ArrHour"] = df["ScheduledArr"].apply(
-                lambda t: int(t.split(":")[0]) if isinstance(t, str) and ":" in t else -1)
-            df = df.merge(mix_df, left_on=["StationID", "_ArrHour"],
-                          right_on=["StationID", "ArrHour"], how="left")
+        if mix_parts:
+            df["_ArrHour"] = _arr_hour(df["ScheduledArr"])
+            df = df.merge(pd.concat(mix_parts, ignore_index=True),
+                          left_on=["_TTFile", "StationID", "_ArrHour"],
+                          right_on=["_TTFile", "StationID", "ArrHour"], how="left")
             df.drop(columns=["_ArrHour", "ArrHour"], errors="ignore", inplace=True)
         else:
             df["MixIndex"] = np.nan
             df["SpeedDiff"] = np.nan
+        df.drop(columns=["_TTFile"], inplace=True)
 
         # ── PrevDelay（X9）──
         df = df.sort_values(["Date", "TrainNo", "StopSeq"])
@@ -690,8 +1135,128 @@ class DataProcessor:
             "PrevDelay", "DelayTime", "IsDelayed", "IsDelayed_Research"
         ]
         df = df[[c for c in cols if c in df.columns]].reset_index(drop=True)
+        return self._compact_research(df) if compact else df
+
+    # ── 研究資料集增量匯出（research store）──────────────────
+
+    def _research_inputs(self) -> dict:
+        """即時快照以外、會影響研究資料集的輸入（靜態資料雜湊 + 程式版本）；有變動時整份重建。
+        stations.json 只雜湊研究資料集用到的 StationID / StationClass：
+        檔案本身的 UpdateTime 每次爬取都會變，整檔雜湊會讓每次匯出都整份重建。"""
+        inputs = {"version": [research_store.STORE_VERSION, RESEARCH_EXPORT_VERSION,
+                              TIMETABLE_FEATURE_VERSION]}
+        stations = self._load_stations()
+        if not stations.empty and "StationClass" in stations.columns:
+            pairs = sorted(f"{sid}\t{cls}" for sid, cls in
+                           zip(stations["StationID"].astype(str), stations["StationClass"].astype(str)))
+            inputs["static/stations.json"] = hashlib.sha256(
+                "\n".join(pairs).encode("utf-8")).hexdigest()[:16]
+        path = os.path.join(self.data_dir, "static", "station_structure.csv")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                inputs["static/station_structure.csv"] = hashlib.sha256(f.read()).hexdigest()[:16]
+        return inputs
+
+    def _snapshot_fingerprints(self, data_subdir: str) -> dict:
+        """{資料夾日期: 檔名 + 大小的雜湊}。快照寫入後不再改動，不看 mtime
+        （GitHub Actions 每次 checkout 都會重設 mtime）。"""
+        out = {}
+        for folder, paths in _group_by_folder(self._snapshot_files(data_subdir)).items():
+            h = hashlib.sha256()
+            for p in paths:
+                try:
+                    size = os.path.getsize(p)
+                except OSError:
+                    continue
+                h.update(f"{os.path.basename(p)}:{size}\n".encode("utf-8"))
+            out[os.path.basename(folder)] = h.hexdigest()[:16]
+        return out
+
+    def _timetable_fingerprints(self, dates) -> dict:
+        """{台灣日期: 對應時刻表檔名:大小}（對應規則同 build_research_dataset）。"""
+        out = {}
+        for d, path in self._timetables_for_dates(sorted(dates)).items():
+            try:
+                out[d] = f"{os.path.basename(path)}:{os.path.getsize(path)}"
+            except OSError:
+                pass
+        return out
+
+    def update_research_store(self, store_dir: str, full: bool = False):
+        """
+        把研究資料集寫入 research store（research_store.py），回傳 (manifest, 重建的台灣日期)。
+        manifest 的 watermark 記錄上次匯出時各資料夾的快照指紋、各日期對應的時刻表與其他輸入；
+        之後只重建受影響的 TaiwanDate 分區：
+          - 快照有增減的資料夾 F → 台灣日期 F、F+1（資料夾為 UTC 日期，台灣日期最多晚一天）
+          - 對應時刻表換檔 / 內容改變的日期
+        重建日期 D 需要資料夾 D-1、D 的全部快照；去重複與 PrevDelay 都以資料夾（Date）為單位，
+        因此整個資料夾重算後的結果與整份重建相同。
+        full=True、沒有 watermark、靜態檔或程式版本改變時整份重建。
+        """
+        old = research_store.read_manifest(store_dir)
+        mark = (old or {}).get("watermark")
+        self._timetable_listing = None
+        folders = self._snapshot_fingerprints("station_live")
+        inputs = self._research_inputs()
+
+        if full or not mark or mark.get("inputs") != inputs:
+            df = self.build_research_dataset()
+            if df.empty:
+                return old, []
+            dates = sorted(df["TaiwanDate"].dropna().astype(str).unique())
+            watermark = {"inputs": inputs, "folders": folders,
+                         "timetables": self._timetable_fingerprints(dates)}
+            return research_store.write(df, store_dir, watermark=watermark), dates
+
+        dates = set()
+        for folder in folders.keys() | mark["folders"].keys():
+            if folders.get(folder) != mark["folders"].get(folder):
+                try:
+                    d = datetime.strptime(folder, "%Y-%m-%d")
+                except ValueError:
+                    continue
+                dates |= {folder, (d + timedelta(days=1)).strftime("%Y-%m-%d")}
+        timetables = self._timetable_fingerprints(set(old["partitions"]) | dates)
+        dates |= {d for d, fp in timetables.items() if mark["timetables"].get(d) != fp}
+        if not dates:
+            return old, []
+
+        needed = set()
+        for d in dates:
+            prev = (datetime.strptime(d, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+            needed |= {prev, d} & folders.keys()
+        df = self.build_research_dataset(sorted(needed)) if needed else pd.DataFrame()
+        if df.empty:
+            df = pd.DataFrame(columns=old["columns"])
+        df = df[df["TaiwanDate"].astype(str).isin(dates)]
+        watermark = {"inputs": inputs, "folders": folders,
+                     "timetables": {d: fp for d, fp in timetables.items()
+                                    if d in set(old["partitions"]) | set(df["TaiwanDate"].astype(str))}}
+        return research_store.write(df, store_dir, dates=sorted(dates), watermark=watermark), sorted(dates)
+
+    def _cloud_research_store(self, date_str=None):
+        """雲端模式：從 GITHUB_RAW_BASE/research 讀研究資料集（research_store.py）。
+        指定 date_str（資料夾日期，UTC）時只下載對應的兩個台灣日期分區。
+        尚未有 research store 或讀取失敗時回傳 None，由呼叫端改讀 CSV。"""
+        try:
+            dates = None
+            if date_str:
+                d = datetime.strptime(date_str, "%Y-%m-%d")
+                dates = [date_str, (d + timedelta(days=1)).strftime("%Y-%m-%d")]
+            df = research_store.load(f"{GITHUB_RAW_BASE}/research", dates)
+        except Exception:
+            return None
+        if df is None or df.empty:
+            return None
+        if date_str:
+            df = df[df["Date"].astype(str) == date_str].reset_index(drop=True)
         return df
 
+    def _compact_research(self, df: pd.DataFrame) -> pd.DataFrame:
+        compact = schema.apply(df)
+        self.research_memory_report = schema.memory_report(df, compact)
+        return compact
+
     def export_research_csv(self):
         """
         產生三個分析單位的 CSV，輸出至 data/output/：
@@ -710,9 +1275,9 @@ class DataProcessor:
         # 補入 StationName（從 stations.json）
         if "StationName" not in df.columns:
             try:
-                static_path = os.path.join(self.data_dir, "static", "stations.json")
-                with open(static_path, "r", encoding="utf-8") as f:
-                    raw = json.load(f)
+                static_path = storage.find_payload(
+                    os.path.join(self.data_dir, "static", "stations.json"))
+                raw = storage.load_payload(static_path)
                 stations_list = raw.get("Stations", raw) if isinstance(raw, dict) else raw
                 name_map = {}
                 for s in stations_list:
@@ -743,7 +1308,7 @@ class DataProcessor:
         }
         if "StationName" in df.columns:
             agg_dict["StationName"] = ("StationName", "first")
-        station_df = df.groupby("StationID").agg(**agg_dict).reset_index()
+        station_df = df.groupby("StationID", observed=True).agg(**agg_dict).reset_index()
         out3 = os.path.join(out_dir, "station_level.csv")
         station_df.to_csv(out3, index=False, encoding="utf-8")
         print(f"[3] station_level.csv：{len(station_df)} 站")
@@ -754,29 +1319,23 @@ class DataProcessor:
     # ── 異常通報解析 ─────────────────────────────────────────
 
     def parse_alerts(self, date_str=None):
-        pattern = os.path.join(self.data_dir, "alerts",
-                               date_str if date_str else "*", "*.json")
-        files = glob.glob(pattern)
+        files = self._snapshot_files("alerts", date_str)
         if not files: return pd.DataFrame()
-        records = []
-        for f in files:
-            try:
-                with open(f, "r", encoding="utf-8") as fp:
-                    data = json.load(fp)
-                for r in data.get("Alerts", []):
-                    desc = r.get("Description", "")
-                    cat = "其他"
-                    if any(k in desc for k in ["號誌", "電力", "設備", "故障"]): cat = "設備故障"
-                    elif any(k in desc for k in ["天候", "豪雨", "地震", "颱風"]): cat = "天候災害"
-                    elif any(k in desc for k in ["旅客", "救護"]): cat = "旅客因素"
-                    elif any(k in desc for k in ["調度", "待避", "交會"]): cat = "運轉調度"
-                    elif any(k in desc for k in ["平交道"]): cat = "平交道事故"
-                    elif any(k in desc for k in ["施工", "維修"]): cat = "施工影響"
-                    records.append({
-                        "PublishTime": r.get("PublishTime"),
-                        "Category": cat,
-                        "Description": desc
-                    })
-            except:
-                pass
-        return pd.DataFrame(records).drop_duplicates(subset=["PublishTime", "Description"])
+        frames = []
+        for folder, paths in _group_by_folder(files).items():
+            parts = self._live_store_parts("alerts", paths)
+            if parts is not None:
+                frames.extend(parts)
+                continue
+            records = []
+            for f in paths:
+                try:
+                    data = storage.load_payload(f)
+                except Exception:
+                    continue
+                records.extend(normalize.alert_rows(data.get("Alerts", [])))
+            if records:
+                frames.append(pd.DataFrame(records))
+        if not frames: return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        return df.drop_duplicates(subset=["PublishTime", "Description"])
@@ -0,0 +1,166 @@
+"""
+研究資料集 Parquet 儲存（research store）— export_csv.py 的主要輸出，取代整份 CSV。
+
+結構：<RESEARCH_STORE_DIR>/                       （預設 data/research/，隨 data/ 推上 GitHub）
+        TaiwanDate=YYYY-MM-DD/part-<雜湊>.parquet  Hive 分區；檔內不含 TaiwanDate 欄，由目錄名還原
+        _manifest.json                         各分區的列數、大小、內容雜湊與欄位順序，
+                                               以及增量匯出用的 watermark（見 processor.update_research_store）
+- Parquet 以 zstd 壓縮、寫入欄位統計（min / max / null 數），型別沿用 schema.RESEARCH_SCHEMA
+  （category 存成 dictionary 欄）。
+- 讀取端先讀 _manifest.json，只下載需要的日期；雲端模式從 GITHUB_RAW_BASE 逐檔抓取，
+  URL 帶內容雜湊，檔案沒變時可直接用瀏覽器 / CDN 快取。
+- 分區檔名帶內容雜湊，新檔寫好後才以 os.replace 換上 manifest，最後刪掉不再引用的舊檔；
+  manifest 是唯一的切換點，讀取端看到的永遠是某一次完整匯出的結果。
+pyarrow 僅在實際讀寫時才 import。
+"""
+
+import hashlib
+import io
+import os
+import shutil
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import schema
+from crawlers import jsonio
+
+STORE_VERSION = 1
+MANIFEST_NAME = "_manifest.json"
+PARTITION_COLUMN = "TaiwanDate"
+_PARTITION_PREFIX = f"{PARTITION_COLUMN}="
+
+
+def _is_url(source: str) -> bool:
+    return source.startswith(("http://", "https://"))
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+# ── 寫入 ─────────────────────────────────────────────────────
+
+def _write_partition(store_dir: str, date: str, part: pd.DataFrame) -> dict:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    pdir = os.path.join(store_dir, f"{_PARTITION_PREFIX}{date}")
+    os.makedirs(pdir, exist_ok=True)
+    table = pa.Table.from_pandas(part.drop(columns=[PARTITION_COLUMN]), preserve_index=False)
+    tmp = os.path.join(pdir, f".part.{os.getpid()}.tmp")
+    pq.write_table(table, tmp, compression="zstd", write_statistics=True)
+    with open(tmp, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    rel = f"{_PARTITION_PREFIX}{date}/part-{digest}.parquet"
+    path = os.path.join(store_dir, *rel.split("/"))
+    os.replace(tmp, path)
+    return {"path": rel, "rows": len(part), "bytes": os.path.getsize(path),
+            "sha256": digest, "written_utc": _utc_now()}
+
+
+def _remove_unreferenced(store_dir: str, partitions: dict):
+    """manifest 換上後，刪掉沒有被引用的分區檔 / 分區目錄。"""
+    keep = {p["path"] for p in partitions.values()}
+    for name in os.listdir(store_dir):
+        pdir = os.path.join(store_dir, name)
+        if not (name.startswith(_PARTITION_PREFIX) and os.path.isdir(pdir)):
+            continue
+        if name[len(_PARTITION_PREFIX):] not in partitions:
+            shutil.rmtree(pdir, ignore_errors=True)
+            continue
+        for fname in os.listdir(pdir):
+            if f"{name}/{fname}" not in keep:
+                try:
+                    os.remove(os.path.join(pdir, fname))
+                except OSError:
+                    pass
+
+
+def write(df: pd.DataFrame, store_dir: str, dates=None, watermark=None) -> dict:
+    """把研究資料集寫成依 TaiwanDate 分區的 Parquet，回傳新的 manifest。
+    dates 為 None 時整份重寫（df 中沒有的日期分區一併刪除）；
+    否則只重寫 dates 列出的分區（df 只需含這些日期的列，dates 中沒有列的日期分區刪除），
+    其餘沿用既有 manifest。watermark 原樣記入 manifest。"""
+    if PARTITION_COLUMN not in df.columns:
+        raise ValueError(f"研究資料集缺少分區欄位 {PARTITION_COLUMN}")
+    os.makedirs(store_dir, exist_ok=True)
+    old = read_manifest(store_dir) if dates is not None else None
+    partitions = dict(old["partitions"]) if old else {}
+    dates = sorted(df[PARTITION_COLUMN].dropna().astype(str).unique()) if dates is None else sorted(dates)
+
+    key = df[PARTITION_COLUMN].astype(str)
+    for date in dates:
+        part = df[key == date]
+        if part.empty:
+            partitions.pop(date, None)
+        else:
+            partitions[date] = _write_partition(store_dir, date, part)
+
+    manifest = {
+        "version": STORE_VERSION,
+        "partition_column": PARTITION_COLUMN,
+        "columns": list(df.columns),
+        "rows": sum(p["rows"] for p in partitions.values()),
+        "updated_utc": _utc_now(),
+        "partitions": dict(sorted(partitions.items())),
+    }
+    if watermark is not None:
+        manifest["watermark"] = watermark
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(jsonio.dumpb(manifest))
+    os.replace(tmp, path)
+    _remove_unreferenced(store_dir, manifest["partitions"])
+    return manifest
+
+
+# ── 讀取 ─────────────────────────────────────────────────────
+
+def _fetch(source: str, rel: str, version: str = "") -> bytes:
+    if _is_url(source):
+        import urllib.request
+        url = f"{source.rstrip('/')}/{rel}" + (f"?v={version}" if version else "")
+        with urllib.request.urlopen(url, timeout=30) as resp:
+            return resp.read()
+    with open(os.path.join(source, *rel.split("/")), "rb") as f:
+        return f.read()
+
+
+def read_manifest(source: str):
+    """本機目錄或 URL（例如 GITHUB_RAW_BASE/research）的 manifest；不存在或格式不符時回傳 None。"""
+    try:
+        manifest = jsonio.loads(_fetch(source, MANIFEST_NAME, _utc_now() if _is_url(source) else ""))
+    except Exception:
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != STORE_VERSION:
+        return None
+    return manifest
+
+
+def load(source: str, dates=None, manifest=None) -> pd.DataFrame:
+    """讀回研究資料集；dates 為 None 時讀全部分區，否則只讀列出的日期（不存在的日期略過）。
+    列依 TaiwanDate 排列（同一天內維持寫入時的順序），欄位順序依 manifest，
+    型別依 schema.RESEARCH_SCHEMA。store 不存在時回傳 None。"""
+    import pyarrow.parquet as pq
+    manifest = manifest or read_manifest(source)
+    if manifest is None:
+        return None
+    partitions = manifest["partitions"]
+    wanted = sorted(partitions) if dates is None else sorted(d for d in set(dates) if d in partitions)
+    frames = []
+    for date in wanted:
+        entry = partitions[date]
+        part = pq.read_table(io.BytesIO(_fetch(source, entry["path"], entry["sha256"]))).to_pandas()
+        part[PARTITION_COLUMN] = date
+        frames.append(part)
+    columns = manifest["columns"]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    # 各分區的 category 類別不同，先還原成一般欄位再合併，最後統一套用 schema
+    for part in frames:
+        for col in part.columns:
+            if isinstance(part[col].dtype, pd.CategoricalDtype):
+                part[col] = part[col].astype(part[col].cat.categories.dtype)
+    df = pd.concat(frames, ignore_index=True)
+    return schema.apply(df[[c for c in columns if c in df.columns]])
@@ -0,0 +1,259 @@
+"""
+常駐爬蟲排程：python main.py daemon
+
+取代 launchd / GitHub Actions「每個 tick 啟動一個新 process」的作法：
+單一 process 常駐，.env、OAuth token 與 HTTP 連線池都保持溫熱。
+
+排程（台灣時間，UTC+8，無日光節約）：
+  live      每 10 分鐘（:00 / :10 / ...），僅 06:00–24:00
+  alert     每 60 分鐘（整點）
+  timetable 每日 06:05
+
+- jitter      : 每次執行延後 0～DAEMON_JITTER_SEC 秒，避免整點與其他用戶同時打 API
+- 補跑        : 錯過的 tick（電腦睡眠、process 重啟）合併為一次立即補跑，
+                不會一口氣連跑多次；跳過的次數記在健康檔 missed 欄位。
+                第一次啟動（健康檔沒有該任務）不補跑，從下一個時點開始
+- 協調器      : 各任務經 crawlers.orchestrator.run_crawlers 執行，共用同一個全域速率預算
+                （TDX_RATE_LIMIT），每次執行印出彙整報告
+- 健康檔      : DAEMON_HEALTH_FILE（JSON），記錄各任務上次執行、結果與下次時間；
+                重啟時也用它判斷是否需要補跑
+- 優雅關閉    : SIGTERM / SIGINT 後不再排新任務，等執行中的任務結束才退出
+"""
+
+import json
+import os
+import random
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from config import DAEMON_HEALTH_FILE, DAEMON_JITTER_SEC, TDX_RATE_LIMIT
+from crawlers.orchestrator import run_crawlers
+from http_client import close_session, set_rate_limit
+
+TAIPEI = timezone(timedelta(hours=8))
+
+
+class Job:
+    """單一排程任務：every_minutes（對齊午夜的固定間隔）或 daily_at（"HH:MM"）擇一。"""
+
+    def __init__(self, name: str, func, every_minutes: int = None, daily_at: str = None,
+                 active_hours: tuple = None, jitter: float = DAEMON_JITTER_SEC):
+        if (every_minutes is None) == (daily_at is None):
+            raise ValueError("every_minutes 與 daily_at 必須擇一設定")
+        self.name = name
+        self.func = func
+        self.every_minutes = every_minutes
+        self.daily_at = daily_at
+        self.active_hours = active_hours  # (start_hour, end_hour)，end 不含
+        self.jitter = jitter
+
+    def _active(self, t: datetime) -> bool:
+        if not self.active_hours:
+            return True
+        start, end = self.active_hours
+        return start <= t.hour < end
+
+    def _daily_slot(self, day: datetime) -> datetime:
+        h, m = map(int, self.daily_at.split(":"))
+        return day.replace(hour=h, minute=m, second=0, microsecond=0)
+
+    def prev_slot(self, now: datetime) -> datetime:
+        """now 以前（含）最近一個排程時點。"""
+        if self.daily_at:
+            slot = self._daily_slot(now)
+            return slot if slot <= now else slot - timedelta(days=1)
+        step = timedelta(minutes=self.every_minutes)
+        midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        slot = midnight + step * ((now - midnight) // step)
+        for _ in range(24 * 60 // self.every_minutes + 1):
+            if self._active(slot):
+                return slot
+            slot -= step
+        return slot
+
+    def next_slot(self, now: datetime) -> datetime:
+        """now 之後（不含）下一個排程時點。"""
+        if self.daily_at:
+            slot = self._daily_slot(now)
+            return slot if slot > now else slot + timedelta(days=1)
+        step = timedelta(minutes=self.every_minutes)
+        slot = self.prev_slot(now) + step
+        for _ in range(24 * 60 // self.every_minutes + 1):
+            if self._active(slot):
+                return slot
+            slot += step
+        return slot
+
+    def slots_between(self, start: datetime, end: datetime) -> int:
+        """(start, end] 之間的排程時點數（用於統計錯過的 tick）。"""
+        count, slot = 0, self.next_slot(start)
+        while slot <= end and count < 10000:
+            count += 1
+            slot = self.next_slot(slot)
+        return count
+
+
+class Scheduler:
+    def __init__(self, jobs: list, health_file: str = DAEMON_HEALTH_FILE):
+        self.jobs = {job.name: job for job in jobs}
+        self.health_file = health_file
+        self.stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._state = {}
+        self._started_at = None
+
+    # ── 健康檔 ────────────────────────────────────────────────
+
+    def _load_previous_health(self) -> dict:
+        try:
+            with open(self.health_file, "r", encoding="utf-8") as f:
+                return json.load(f).get("jobs", {})
+        except (OSError, ValueError):
+            return {}
+
+    def _write_health(self, status: str) -> None:
+        with self._lock:
+            jobs = {}
+            for name, st in self._state.items():
+                jobs[name] = {k: (v.isoformat() if isinstance(v, datetime) else v)
+                              for k, v in st.items()}
+            health = {
+                "pid": os.getpid(),
+                "status": status,
+                "started_at": self._started_at.isoformat() if self._started_at else None,
+                "updated_at": datetime.now(TAIPEI).isoformat(),
+                "jobs": jobs,
+            }
+            # 主迴圈與各 worker 都會寫健康檔：寫檔與 replace 也在鎖內，避免互相覆蓋 tmp 檔；
+            # 寫不進去（磁碟滿、權限）只記錄，不讓排程停下
+            try:
+                os.makedirs(os.path.dirname(self.health_file) or ".", exist_ok=True)
+                tmp = self.health_file + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(health, f, ensure_ascii=False, indent=2)
+                os.replace(tmp, self.health_file)
+            except OSError as e:
+                print(f"[{datetime.now()}] daemon health file write failed: {e}")
+
+    # ── 排程 ──────────────────────────────────────────────────
+
+    def _init_state(self, now: datetime) -> None:
+        previous = self._load_previous_health()
+        for name, job in self.jobs.items():
+            prev = previous.get(name, {})
+            last_run = prev.get("last_run")
+            # 第一次啟動沒有紀錄：視為剛執行過，否則所有任務會在啟動瞬間一起補跑
+            last_run = datetime.fromisoformat(last_run) if last_run else now
+            recent = job.prev_slot(now)
+            # 上一個時點尚未執行過（daemon 停機期間錯過）→ 立即補跑一次；
+            # last_run 與 recent 之間其餘的時點合併掉，計入 missed
+            due = recent if last_run < recent else job.next_slot(now)
+            missed = prev.get("missed", 0)
+            if last_run < recent:
+                missed += job.slots_between(last_run, recent) - 1
+            self._state[name] = {
+                "due": due,
+                "run_at": due + timedelta(seconds=random.uniform(0, job.jitter)),
+                "last_run": last_run,
+                "last_ok": prev.get("last_ok"),
+                "last_error": prev.get("last_error"),
+                "last_elapsed": prev.get("last_elapsed"),
+                "runs": prev.get("runs", 0),
+                "failures": prev.get("failures", 0),
+                "missed": missed,
+                "running": False,
+            }
+
+    def _run_job(self, name: str, scheduled: datetime) -> None:
+        job = self.jobs[name]
+        started = datetime.now(TAIPEI)
+        ok, error = False, None
+        try:
+            result = job.func()
+            ok = result.get("ok", True) if isinstance(result, dict) else True
+            error = result.get("error") if isinstance(result, dict) else None
+        except Exception as e:
+            error = str(e)
+            print(f"[{datetime.now()}] daemon job {name} ERROR: {e}")
+        elapsed = (datetime.now(TAIPEI) - started).total_seconds()
+        with self._lock:
+            st = self._state[name]
+            st.update(running=False, last_run=scheduled, last_ok=ok,
+                      last_error=error, last_elapsed=round(elapsed, 3))
+            st["runs"] += 1
+            st["failures"] += 0 if ok else 1
+        self._write_health("running")
+
+    def run(self, max_workers: int = 3) -> None:
+        """主迴圈：直到收到 stop 訊號為止。"""
+        self._started_at = datetime.now(TAIPEI)
+        self._init_state(self._started_at)
+        self._write_health("running")
+        print(f"[{datetime.now()}] daemon started (pid={os.getpid()}): "
+              + ", ".join(f"{n} → {s['run_at']:%m-%d %H:%M:%S}" for n, s in self._state.items()))
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="daemon") as pool:
+            while not self.stop_event.is_set():
+                now = datetime.now(TAIPEI)
+                for name, job in self.jobs.items():
+                    with self._lock:
+                        st = self._state[name]
+                        if st["running"] or now < st["run_at"]:
+                            continue
+                        # 錯過的 tick 合併成這一次；下一次從 now 之後的時點排起
+                        st["missed"] += job.slots_between(st["due"], now)
+                        scheduled = st["due"]
+                        st["running"] = True
+                        st["due"] = job.next_slot(now)
+                        st["run_at"] = st["due"] + timedelta(seconds=random.uniform(0, job.jitter))
+                    pool.submit(self._run_job, name, scheduled)
+                self._write_health("running")
+                with self._lock:
+                    wake = min(st["run_at"] for st in self._state.values())
+                wait = (wake - datetime.now(TAIPEI)).total_seconds()
+                # 最多睡 60 秒：系統睡眠喚醒後能儘快發現錯過的 tick
+                self.stop_event.wait(max(0.5, min(wait, 60)))
+            print(f"[{datetime.now()}] daemon stopping, waiting for running jobs...")
+
+        close_session()
+        self._write_health("stopped")
+        print(f"[{datetime.now()}] daemon stopped")
+
+    def install_signal_handlers(self) -> None:
+        def _handle(signum, _frame):
+            print(f"[{datetime.now()}] daemon received signal {signum}")
+            self.stop_event.set()
+        signal.signal(signal.SIGTERM, _handle)
+        signal.signal(signal.SIGINT, _handle)
+
+
+def default_jobs() -> list:
+    from crawlers.station_live import StationLiveCrawler
+    from crawlers.alert import AlertCrawler
+    from crawlers.daily_timetable import DailyTimetableCrawler
+
+    return [
+        Job("live", _orchestrated(StationLiveCrawler()), every_minutes=10, active_hours=(6, 24)),
+        Job("alert", _orchestrated(AlertCrawler()), every_minutes=60),
+        Job("timetable", _orchestrated(DailyTimetableCrawler()), daily_at="06:05"),
+    ]
+
+
+def _orchestrated(crawler):
+    """經 run_crawlers 執行單支爬蟲（端點併發上限、彙整報告），回傳該爬蟲的 crawl() 結果。
+    速率限制由 run_daemon 設定一次，這裡不重設，同時執行的任務才不會互相清掉。"""
+    def run():
+        return run_crawlers([crawler], rate_limit=None)[0]
+    return run
+
+
+def run_daemon() -> None:
+    scheduler = Scheduler(default_jobs())
+    scheduler.install_signal_handlers()
+    set_rate_limit(TDX_RATE_LIMIT, burst=max(1, int(TDX_RATE_LIMIT)))
+    try:
+        scheduler.run()
+    finally:
+        set_rate_limit(None)
@@ -0,0 +1,122 @@
+"""
+研究資料集欄位型別（processor.DataProcessor.build_research_dataset 產出時套用）。
+
+Streamlit Cloud 記憶體有限，研究資料集的字串欄一律改為 category、小整數改為 int8 / int16：
+  ("category", None)    類別依現有值排序
+  ("category", [...])   固定類別順序（跨日期 / 跨次執行代碼一致）；清單外的值附加在後面，不會變成缺值
+  ("int", "int8")       有缺值時自動改用 nullable 的 Int8 / Int16
+無法無損轉換的欄位（含小數、超出範圍、非數字）維持原型別。CSV 匯出內容不變，
+只有原本存成 float 的整數欄（如 StopSeq、PrevDelay）不再帶 ".0"。
+
+    python schema.py      以目前 data/ 建立研究資料集，列出各欄轉換前後的記憶體
+"""
+
+import numpy as np
+import pandas as pd
+
+PERIODS = ["尖峰", "離峰", "深夜", "未知"]
+HOLIDAY_TYPES = ["平日", "週末", "國定假日", "連假", "未知"]
+TRAIN_TYPES = ["傾斜式自強", "自強", "莒光", "區間快", "區間", "其他"]
+
+RESEARCH_SCHEMA = {
+    "Date":               ("category", None),
+    "TaiwanDate":         ("category", None),
+    "Weekday":            ("int", "int8"),
+    "Month":              ("int", "int8"),
+    "TrainNo":            ("category", None),
+    "TrainType":          ("category", TRAIN_TYPES),
+    "Direction":          ("int", "int8"),
+    "TripLine":           ("int", "int8"),
+    "StationID":          ("category", None),
+    "StationName":        ("category", None),
+    "StopSeq":            ("int", "int16"),
+    "ScheduledArr":       ("category", None),
+    "FirstDep":           ("category", None),
+    "LastArr":            ("category", None),
+    "Period":             ("category", PERIODS),
+    "IsHoliday":          ("int", "int8"),
+    "HolidayType":        ("category", HOLIDAY_TYPES),
+    "IsTerminal":         ("int", "int8"),
+    "RunMin":             ("int", "int16"),
+    "StationClass":       ("category", None),
+    "SideTrackCount":     ("int", "int8"),
+    "IsDouble":           ("int", "int8"),
+    "MixIndex":           ("int", "int8"),
+    "SpeedDiff":          ("int", "int16"),
+    "PrevDelay":          ("int", "int16"),
+    "DelayTime":          ("int", "int16"),
+    "IsDelayed":          ("int", "int8"),
+    "IsDelayed_Research": ("int", "int8"),
+}
+
+
+def _as_category(s: pd.Series, categories) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        s = s.astype(s.cat.categories.dtype)
+    present = pd.unique(s.dropna())
+    if categories is None:
+        try:
+            categories = sorted(present)
+        except TypeError:       # 混合型別（CSV 讀回時偶有）無法排序，依出現順序
+            categories = list(present)
+    else:
+        known = set(categories)
+        categories = list(categories) + [v for v in present if v not in known]
+    return s.astype(pd.CategoricalDtype(categories))
+
+
+def _as_int(s: pd.Series, dtype: str) -> pd.Series:
+    if isinstance(s.dtype, pd.CategoricalDtype) or s.dtype == object or pd.api.types.is_string_dtype(s):
+        return s
+    values = s.to_numpy(dtype="float64", na_value=np.nan)
+    valid = values[~np.isnan(values)]
+    info = np.iinfo(dtype)
+    if (valid.size and ((valid != np.round(valid)).any()
+                        or valid.min() < info.min or valid.max() > info.max)):
+        return s
+    if valid.size < values.size:
+        return s.astype(dtype.capitalize())      # int8 → Int8（nullable）
+    return s.astype(dtype)
+
+
+def apply(df: pd.DataFrame, schema: dict = RESEARCH_SCHEMA) -> pd.DataFrame:
+    """依 schema 轉換 df 中有的欄位（其他欄位不動），回傳新的 DataFrame。"""
+    cols = {}
+    for col, (kind, arg) in schema.items():
+        if col not in df.columns:
+            continue
+        try:
+            cols[col] = _as_category(df[col], arg) if kind == "category" else _as_int(df[col], arg)
+        except (TypeError, ValueError):
+            pass
+    return df.assign(**cols)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """各欄轉換前後的型別與記憶體（bytes，含字串內容），最後一列為合計。"""
+    b = before.memory_usage(deep=True, index=False)
+    a = after.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "Column": list(before.columns),
+        "Before": [str(before[c].dtype) for c in before.columns],
+        "After": [str(after[c].dtype) for c in before.columns],
+        "BeforeBytes": b.values,
+        "AfterBytes": a[list(before.columns)].values,
+    })
+    total = pd.DataFrame([{"Column": "(total)", "Before": "", "After": "",
+                           "BeforeBytes": int(b.sum()), "AfterBytes": int(a.sum())}])
+    report = pd.concat([report, total], ignore_index=True)
+    report["Saved%"] = (100 * (1 - report["AfterBytes"] / report["BeforeBytes"])).round(1)
+    return report
+
+
+if __name__ == "__main__":
+    from config import DATA_DIR
+    from processor import DataProcessor
+
+    dp = DataProcessor(DATA_DIR)
+    dp.build_research_dataset()
+    if dp.research_memory_report is None:
+        print("無資料")
+    else:
+        print(dp.research_memory_report.to_string(index=False))
@@ -30,7 +30,7 @@ cd "$PROJECT"
 echo "$(date '+%Y-%m-%d %H:%M:%S') [1/3] 抓取 alerts..." >> "$LOG"
 "$PYTHON" main.py alert >> "$LOG" 2>&1
 
-# 2. 匯出 CSV（讀取 station_live + alerts + timetable，產生 processed_data.csv 等）
+# 2. 匯出（增量更新 data/research/ 與 train_schedule.csv 等；整份 CSV 需 TRA_EXPORT_CSV=1）
 echo "$(date '+%Y-%m-%d %H:%M:%S') [2/3] 匯出 CSV..." >> "$LOG"
 "$PYTHON" export_csv.py >> "$LOG" 2>&1
 
@@ -47,22 +47,27 @@ cd "$PUSH_DIR"
 git pull --rebase origin main >> "$LOG" 2>&1
 
 # 只複製處理後的 CSV（不含 raw JSON）
-for CSV in processed_data.csv research_dataset.csv stations_coords.csv train_schedule.csv; do
+for CSV in stations_coords.csv train_schedule.csv; do
     SRC="$PROJECT/data/$CSV"
     if [ -f "$SRC" ]; then
         cp "$SRC" "$PUSH_DIR/data/$CSV"
     fi
 done
 
+# research store（Parquet 分區 + manifest；雲端版的資料來源）
+if [ -d "$PROJECT/data/research" ]; then
+    mkdir -p "$PUSH_DIR/data/research"
+    rsync -a --delete "$PROJECT/data/research/" "$PUSH_DIR/data/research/"
+fi
+
 # output/ 資料夾的 CSV
 if [ -d "$PROJECT/data/output" ]; then
     mkdir -p "$PUSH_DIR/data/output"
     cp "$PROJECT/data/output/"*.csv "$PUSH_DIR/data/output/" 2>/dev/null || true
 fi
 
-git add data/processed_data.csv \
-        data/research_dataset.csv \
-        data/stations_coords.csv \
+git add -A data/research/ >> "$LOG" 2>&1 || true
+git add data/stations_coords.csv \
         data/train_schedule.csv \
         data/output/ >> "$LOG" 2>&1
 
@@ -0,0 +1,117 @@
+"""crawlers/delta.py：差分編解碼與鏈還原。"""
+
+import json
+
+from crawlers import delta
+
+ROOT = "StationLiveBoards"
+
+
+def _rec(train, station, delay=0, **extra):
+    r = {"TrainNo": train, "StationID": station, "DelayTime": delay}
+    r.update(extra)
+    return r
+
+
+def _canon(records):
+    """還原結果只保證紀錄集合相同（重複 key 間順序不變），比對前排序。"""
+    return sorted(json.dumps(r, sort_keys=True, ensure_ascii=False) for r in records)
+
+
+def _dup_order(records, train, station):
+    return [r["DelayTime"] for r in records if r.get("TrainNo") == train and r.get("StationID") == station]
+
+
+# ── encode / apply ─────────────────────────────────────────────
+
+def test_round_trip_with_duplicate_keys():
+    prev = [_rec("101", "1000", 0), _rec("101", "1000", 3), _rec("102", "1000", 1)]
+    cur = [_rec("101", "1000", 5), _rec("102", "1000", 1), _rec("101", "1000", 3), _rec("101", "1000", 7)]
+    out = delta.apply(prev, delta.encode(prev, cur))
+    assert _canon(out) == _canon(cur)
+    assert _dup_order(out, "101", "1000") == [5, 3, 7]
+
+
+def test_round_trip_duplicate_removed():
+    prev = [_rec("101", "1000", 0), _rec("101", "1000", 3)]
+    cur = [_rec("101", "1000", 3)]
+    out = delta.apply(prev, delta.encode(prev, cur))
+    assert _canon(out) == _canon(cur)
+
+
+def test_round_trip_with_missing_key_fields_and_unset():
+    prev = [{"TrainNo": "103", "DelayTime": 0}, {"DelayTime": 4},
+            _rec("104", "1100", 2, Note="x")]
+    cur = [{"TrainNo": "103", "DelayTime": 1}, {"DelayTime": 4}, {"DelayTime": 6},
+           _rec("104", "1100", 2)]
+    d = delta.encode(prev, cur)
+    assert any(e.get("Unset") == ["Note"] for e in d["Changed"])
+    assert _canon(delta.apply(prev, d)) == _canon(cur)
+
+
+def test_identical_snapshots_give_empty_delta():
+    recs = [_rec("101", "1000"), _rec("101", "1000", 2)]
+    assert delta.encode(recs, list(recs)) == {"Inserted": [], "Changed": [], "Removed": []}
+
+
+# ── 檔案鏈 ─────────────────────────────────────────────────────
+
+def _chain(snapshots, interval):
+    """模擬 BaseCrawler._delta_payload：每 interval 份存一份 keyframe，其餘存 delta。"""
+    files, prev = {}, None
+    for i, records in enumerate(snapshots):
+        name = f"{i:06d}.json"
+        data = {"UpdateTime": f"t{i}", ROOT: records}
+        if i % interval == 0:
+            files[name] = delta.make_keyframe(data)
+        else:
+            files[name] = delta.make_delta(data, prev, f"{i - 1:06d}.json", ROOT)
+        prev = records
+    return files
+
+
+def _snapshots(n):
+    out = []
+    for i in range(n):
+        recs = [_rec(str(100 + t), "1000", (i * t) % 5) for t in range(4)]
+        if i % 3 == 0:
+            recs.append(_rec("100", "1000", 9))        # 偶爾出現重複 key
+        if i % 4 != 1:
+            recs.append(_rec("200", "1200", i))        # 偶爾消失又出現
+        out.append(recs)
+    return out
+
+
+def test_chain_across_keyframe_boundary():
+    snaps = _snapshots(9)
+    files = _chain(snaps, interval=4)
+    assert [delta.kind(files[n]) for n in sorted(files)].count("keyframe") == 3
+    restored = list(delta.iter_chain(sorted(files), files.__getitem__, ROOT))
+    assert [p for p, _, _ in restored] == sorted(files)
+    for (_, _, records), expected in zip(restored, snaps):
+        assert _canon(records) == _canon(expected)
+
+
+def test_iter_chain_with_pointers_and_deltas():
+    snaps = _snapshots(4)
+    files = _chain(snaps, interval=10)
+    # 在 delta 之間插入指標檔：內容沿用前一份
+    pointer = {"UpdateTime": "p", "_Unchanged": {"SameAs": "000001.json", "ContentHash": "x"}}
+    order = ["000000.json", "000001.json", "000001p.json", "000002.json", "000002p.json", "000003.json"]
+    files["000001p.json"] = files["000002p.json"] = pointer
+    expected = [snaps[0], snaps[1], snaps[1], snaps[2], snaps[2], snaps[3]]
+    kinds = []
+    for (path, payload, records), exp in zip(delta.iter_chain(order, files.__getitem__, ROOT), expected):
+        kinds.append(delta.kind(payload))
+        assert _canon(records) == _canon(exp), path
+    assert kinds == ["keyframe", "delta", "pointer", "delta", "pointer", "delta"]
+
+
+def test_iter_chain_broken_until_next_keyframe():
+    snaps = _snapshots(6)
+    files = _chain(snaps, interval=3)
+    order = [n for n in sorted(files) if n != "000000.json"]    # 開頭 keyframe 缺檔
+    out = {p: r for p, _, r in delta.iter_chain(order, files.__getitem__, ROOT)}
+    assert out["000001.json"] is None and out["000002.json"] is None
+    assert _canon(out["000003.json"]) == _canon(snaps[3])
+    assert _canon(out["000005.json"]) == _canon(snaps[5])
@@ -0,0 +1,49 @@
+"""crawlers/manifest.py：snapshot_paths 與目錄列表比對。"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+from crawlers import manifest
+
+SUBDIR = "station_live"
+
+
+def _write(data_dir, folder, name, record=True):
+    path = os.path.join(data_dir, SUBDIR, folder, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"StationLiveBoards": []}, f)
+    if record:
+        crawl = datetime.strptime(f"{folder} {name[:6]}", "%Y-%m-%d %H%M%S").replace(tzinfo=timezone.utc)
+        manifest.append(data_dir, SUBDIR, manifest.make_entry(data_dir, path, crawl, "written", 0))
+    return path
+
+
+def test_snapshot_paths_matches_manifest(tmp_path):
+    data_dir = str(tmp_path)
+    paths = [_write(data_dir, "2026-03-08", n) for n in ("010000.json", "170000.json")]
+    assert sorted(manifest.snapshot_paths(data_dir, SUBDIR, "2026-03-08")) == sorted(paths)
+
+
+def test_unrecorded_snapshot_is_not_dropped(tmp_path, capsys):
+    data_dir = str(tmp_path)
+    recorded = _write(data_dir, "2026-03-08", "010000.json")
+    copied = _write(data_dir, "2026-03-08", "020000.json", record=False)   # 手動複製 / 清單寫入失敗
+    paths = manifest.snapshot_paths(data_dir, SUBDIR, "2026-03-08")
+    assert sorted(paths) == sorted([recorded, copied])
+    assert "不在爬取清單中" in capsys.readouterr().out
+
+
+def test_deleted_snapshot_is_skipped(tmp_path):
+    data_dir = str(tmp_path)
+    kept = _write(data_dir, "2026-03-08", "010000.json")
+    os.remove(_write(data_dir, "2026-03-08", "020000.json"))
+    assert manifest.snapshot_paths(data_dir, SUBDIR, "2026-03-08") == [kept]
+
+
+def test_full_read_lists_folders(tmp_path):
+    data_dir = str(tmp_path)
+    paths = [_write(data_dir, "2026-03-07", "230000.json"),
+             _write(data_dir, "2026-03-08", "010000.json", record=False)]
+    assert sorted(manifest.snapshot_paths(data_dir, SUBDIR)) == sorted(paths)
@@ -0,0 +1,46 @@
+"""processor.DataProcessor._parse_raw_json：去重時的觀測統計不外流到 parse_* 的輸出。"""
+
+import os
+import shutil
+
+import pytest
+
+from processor import DataProcessor
+
+REPO_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+FOLDER = "2026-03-07"
+
+pytestmark = pytest.mark.skipif(
+    not os.path.isdir(os.path.join(REPO_DATA, "station_live", FOLDER)),
+    reason="需要 data/station_live 範例快照")
+
+OBS_COLUMNS = {"FirstSeenTime", "LastSeenTime", "ObsCount"}
+
+
+@pytest.fixture
+def processor(tmp_path):
+    root = tmp_path / "data"
+    shutil.copytree(os.path.join(REPO_DATA, "static"), root / "static")
+    src = os.path.join(REPO_DATA, "station_live", FOLDER)
+    dst = root / "station_live" / FOLDER
+    dst.mkdir(parents=True)
+    for name in sorted(os.listdir(src))[:20]:
+        shutil.copy2(os.path.join(src, name), dst / name)
+    return DataProcessor(str(root), parse_workers=0,
+                         parse_cache_dir=str(tmp_path / "parse_cache"), feature_cache_dir="")
+
+
+def test_public_outputs_have_no_observation_columns(processor):
+    df = processor.parse_station_live(FOLDER)
+    assert not df.empty
+    assert not OBS_COLUMNS & set(df.columns)
+
+
+def test_observation_columns_on_request(processor):
+    plain = processor._parse_raw_json("station_live", "StationLiveBoards", FOLDER)
+    obs = processor._parse_raw_json("station_live", "StationLiveBoards", FOLDER, observations=True)
+    assert not OBS_COLUMNS & set(plain.columns)
+    assert OBS_COLUMNS <= set(obs.columns)
+    assert obs.drop(columns=list(OBS_COLUMNS)).equals(plain)
+    assert (obs["ObsCount"] >= 1).all()
+    assert (obs["FirstSeenTime"] <= obs["LastSeenTime"]).all()
@@ -0,0 +1,97 @@
+"""processor.DataProcessor.update_research_store：增量更新與整份重建結果一致。"""
+
+import json
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+import research_store
+from processor import DataProcessor
+
+REPO_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+FOLDERS = ("2026-03-07", "2026-03-08", "2026-03-09")
+
+pytestmark = pytest.mark.skipif(
+    not all(os.path.isdir(os.path.join(REPO_DATA, "station_live", f)) for f in FOLDERS),
+    reason="需要 data/station_live 範例快照")
+
+
+def _processor(data_dir, tmp_path):
+    # 快取一律放在 tmp_path，不寫入專案的 .cache/
+    return DataProcessor(str(data_dir), parse_workers=0,
+                         parse_cache_dir=str(tmp_path / "parse_cache"), feature_cache_dir="")
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """範例資料的副本：靜態檔、時刻表，以及 FOLDERS 的即時快照（03-08 後半與 03-09 先保留）。"""
+    root = tmp_path / "data"
+    for sub in ("static", "timetable"):
+        shutil.copytree(os.path.join(REPO_DATA, sub), root / sub)
+    held = tmp_path / "held"
+    for folder in FOLDERS:
+        src = os.path.join(REPO_DATA, "station_live", folder)
+        names = sorted(os.listdir(src))
+        keep = {"2026-03-07": names, "2026-03-08": names[:len(names) // 2]}.get(folder, [])
+        for dst, subset in ((root / "station_live" / folder, keep),
+                            (held / folder, [n for n in names if n not in keep])):
+            dst.mkdir(parents=True, exist_ok=True)
+            for name in subset:
+                shutil.copy2(os.path.join(src, name), dst / name)
+    return root
+
+
+def _release_held(data_dir):
+    held = data_dir.parent / "held"
+    for folder in os.listdir(held):
+        dst = data_dir / "station_live" / folder
+        dst.mkdir(parents=True, exist_ok=True)
+        for name in os.listdir(held / folder):
+            shutil.move(str(held / folder / name), dst / name)
+
+
+def _by_date(df):
+    """build_research_dataset 的列依 TaiwanDate 穩定排序，即 research store 讀回的順序。"""
+    order = df["TaiwanDate"].astype(str).argsort(kind="stable")
+    return df.iloc[order].reset_index(drop=True)
+
+
+def test_incremental_update_matches_full_build(data_dir, tmp_path):
+    store = str(tmp_path / "research")
+    manifest, rebuilt = _processor(data_dir, tmp_path).update_research_store(store)
+    assert rebuilt and manifest["rows"] > 0
+
+    _release_held(data_dir)
+    manifest, rebuilt = _processor(data_dir, tmp_path).update_research_store(store)
+    # 新快照在 03-08、03-09 資料夾 → 只重建台灣日期 03-08 ~ 03-10
+    assert rebuilt and set(rebuilt) <= {"2026-03-08", "2026-03-09", "2026-03-10"}
+    assert "2026-03-07" in manifest["partitions"]
+
+    full_store = str(tmp_path / "full")
+    _processor(data_dir, tmp_path).update_research_store(full_store, full=True)
+    incremental = research_store.load(store)
+    pd.testing.assert_frame_equal(incremental, research_store.load(full_store))
+
+    built = _by_date(_processor(data_dir, tmp_path).build_research_dataset())
+    pd.testing.assert_frame_equal(incremental.astype(str), built[incremental.columns].astype(str))
+
+
+def test_unchanged_inputs_skip_rebuild(data_dir, tmp_path):
+    store = str(tmp_path / "research")
+    _processor(data_dir, tmp_path).update_research_store(store)
+    assert _processor(data_dir, tmp_path).update_research_store(store)[1] == []
+
+    # 靜態爬蟲每次都會更新 stations.json 的 UpdateTime，不應觸發整份重建
+    path = data_dir / "static" / "stations.json"
+    stations = json.loads(path.read_text(encoding="utf-8"))
+    stations["UpdateTime"] = "2099-01-01T00:00:00+08:00"
+    path.write_text(json.dumps(stations, ensure_ascii=False), encoding="utf-8")
+    assert _processor(data_dir, tmp_path).update_research_store(store)[1] == []
+
+    # 研究資料集用到的 StationClass 改變則整份重建
+    stations["Stations"][0]["StationClass"] = "9"
+    path.write_text(json.dumps(stations, ensure_ascii=False), encoding="utf-8")
+    rebuilt = _processor(data_dir, tmp_path).update_research_store(store)[1]
+    assert rebuilt == sorted(research_store.read_manifest(store)["partitions"])
@@ -0,0 +1,56 @@
+"""crawlers/resilience.py：斷路器的失敗分類與跨 process 計數。"""
+
+import json
+import multiprocessing
+
+import pytest
+import requests
+
+from crawlers.resilience import CircuitBreaker, CircuitOpenError, is_endpoint_failure
+
+
+def _http_error(status):
+    resp = requests.Response()
+    resp.status_code = status
+    return requests.HTTPError(response=resp)
+
+
+@pytest.mark.parametrize("exc, counted", [
+    (_http_error(400), False),
+    (_http_error(404), False),
+    (_http_error(429), True),
+    (_http_error(503), True),
+    (requests.ConnectionError(), True),
+    (requests.ReadTimeout(), True),
+    (ValueError("bad json"), False),
+])
+def test_is_endpoint_failure(exc, counted):
+    assert is_endpoint_failure(exc) is counted
+
+
+def test_opens_after_threshold_and_resets_on_success(tmp_path):
+    cb = CircuitBreaker(str(tmp_path / "cb.json"), threshold=2, cooldown=60)
+    cb.record_failure("/x", "e")
+    cb.check("/x")
+    cb.record_failure("/x", "e")
+    with pytest.raises(CircuitOpenError):
+        cb.check("/x")
+    cb.record_success("/x")
+    cb.check("/x")
+
+
+def _hammer(state_file):
+    cb = CircuitBreaker(state_file, threshold=10 ** 9)
+    for _ in range(40):
+        cb.record_failure("/x", "e")
+
+
+def test_concurrent_processes_do_not_lose_updates(tmp_path):
+    state_file = str(tmp_path / "cb.json")
+    procs = [multiprocessing.Process(target=_hammer, args=(state_file,)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    with open(state_file, encoding="utf-8") as f:
+        assert json.load(f)["/x"]["failures"] == 160
@@ -0,0 +1,40 @@
+"""scheduler.Scheduler：啟動時的補跑判斷。"""
+
+import json
+from datetime import datetime, timedelta
+
+from scheduler import TAIPEI, Job, Scheduler
+
+NOW = datetime(2026, 3, 8, 9, 3, 20, tzinfo=TAIPEI)
+
+
+def _jobs():
+    noop = lambda: {"ok": True}
+    return [Job("live", noop, every_minutes=10, active_hours=(6, 24), jitter=0),
+            Job("alert", noop, every_minutes=60, jitter=0),
+            Job("timetable", noop, daily_at="06:05", jitter=0)]
+
+
+def test_first_start_waits_for_next_slot(tmp_path):
+    scheduler = Scheduler(_jobs(), health_file=str(tmp_path / "health.json"))
+    scheduler._init_state(NOW)
+    due = {name: st["due"] for name, st in scheduler._state.items()}
+    assert due == {"live": datetime(2026, 3, 8, 9, 10, tzinfo=TAIPEI),
+                   "alert": datetime(2026, 3, 8, 10, 0, tzinfo=TAIPEI),
+                   "timetable": datetime(2026, 3, 9, 6, 5, tzinfo=TAIPEI)}
+    assert all(st["missed"] == 0 for st in scheduler._state.values())
+
+
+def test_restart_catches_up_once(tmp_path):
+    health = tmp_path / "health.json"
+    last = (NOW - timedelta(minutes=45)).isoformat()
+    health.write_text(json.dumps({"jobs": {"live": {"last_run": last, "missed": 1}}}),
+                      encoding="utf-8")
+    scheduler = Scheduler(_jobs(), health_file=str(health))
+    scheduler._init_state(NOW)
+    live = scheduler._state["live"]
+    # 08:18:20 之後錯過 08:20 … 09:00 共 5 個時點，立即補跑 09:00，其餘 4 個計入 missed
+    assert live["due"] == datetime(2026, 3, 8, 9, 0, tzinfo=TAIPEI)
+    assert live["missed"] == 1 + 4
+    # 健康檔沒有紀錄的任務視為第一次啟動
+    assert scheduler._state["alert"]["due"] > NOW
@@ -0,0 +1,37 @@
+"""crawlers/streaming.py：串流掃描與整份解析算出相同的內容雜湊與筆數。"""
+
+import io
+
+from crawlers import jsonio
+from crawlers.streaming import SnapshotScanner, content_hash
+
+ROOT = "StationLiveBoards"
+DATA = {"UpdateTime": "2026-03-08T10:00:00+08:00", "SrcUpdateTime": "2026-03-08T09:59:30+08:00",
+        ROOT: [{"TrainNo": str(100 + i), "StationID": "1000", "StationName": {"Zh_tw": "臺北"},
+                "DelayTime": i % 3} for i in range(50)]}
+
+
+def _scan(body, chunk):
+    out = io.BytesIO()
+    scanner = SnapshotScanner(out, ROOT, "TrainNo")
+    for i in range(0, len(body), chunk):
+        scanner.write(body[i:i + chunk])
+    return scanner.close(), out.getvalue()
+
+
+def test_stream_hash_matches_content_hash_for_any_chunking():
+    body = jsonio.dumpb(DATA)
+    expected = content_hash(body, ROOT)
+    for chunk in (1, 7, 300, len(body)):
+        meta, written = _scan(body, chunk)
+        assert written == body
+        assert meta["ContentHash"] == expected
+        assert meta["count"] == 50
+        assert meta["SrcUpdateTime"] == DATA["SrcUpdateTime"]
+
+
+def test_hash_ignores_header_fields():
+    other = dict(DATA, UpdateTime="2026-03-08T10:10:00+08:00")
+    assert content_hash(jsonio.dumpb(other), ROOT) == content_hash(jsonio.dumpb(DATA), ROOT)
+    # 重新序列化的紀錄（BaseCrawler.save 未帶原始回應時）與原始回應雜湊相同
+    assert content_hash(jsonio.dumpb({ROOT: DATA[ROOT]}), ROOT) == content_hash(jsonio.dumpb(DATA), ROOT)
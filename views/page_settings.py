@@ -7,20 +7,33 @@ from datetime import datetime
 
 import streamlit as st
 
+from crawlers import manifest, storage
 from processor import CLOUD_MODE
 from views.components import kpi_card, note_card, page_header, section_title, status_badge, story_card
 from views.theme import BLUE, GREEN, RED, TEXT_MUTED, TEXT_SECONDARY, YELLOW
 
 
 def _collect_storage_stats(data_dir: str) -> dict:
+    """快照檔數量與大小：有爬取清單的子目錄直接加總清單，其餘才 os.walk。"""
     total_json = 0
     total_json_mb = 0.0
-    for root, _, files in os.walk(data_dir):
-        for fname in files:
-            if fname.endswith(".json"):
-                full_path = os.path.join(root, fname)
+    for entry in sorted(os.listdir(data_dir)) if os.path.isdir(data_dir) else []:
+        sub_path = os.path.join(data_dir, entry)
+        if not os.path.isdir(sub_path):
+            continue
+        if manifest.available(data_dir, entry):
+            for rel, e in manifest.latest_entries(data_dir, entry).items():
+                if e.get("bytes") is None or not os.path.exists(os.path.join(data_dir, *rel.split("/"))):
+                    continue
                 total_json += 1
-                total_json_mb += os.path.getsize(full_path) / (1024 * 1024)
+                total_json_mb += e["bytes"] / (1024 * 1024)
+            continue
+        for root, _, files in os.walk(sub_path):
+            for fname in files:
+                if storage.is_payload_file(fname):
+                    full_path = os.path.join(root, fname)
+                    total_json += 1
+                    total_json_mb += os.path.getsize(full_path) / (1024 * 1024)
     csv_files = glob.glob(os.path.join(data_dir, "*.csv"))
     csv_size_mb = sum(os.path.getsize(path) for path in csv_files) / (1024 * 1024)
     return {
@@ -32,6 +45,13 @@ def _collect_storage_stats(data_dir: str) -> dict:
     }
 
 
+def _folder_counts(data_dir: str, folder: str) -> dict:
+    """{日期資料夾: 快照檔數}（直接列目錄；逐日讀清單不會比較快）。"""
+    base = os.path.join(data_dir, folder)
+    return {os.path.basename(path): len(storage.glob_payloads(os.path.join(path, "*")))
+            for path in glob.glob(os.path.join(base, "????-??-??"))}
+
+
 def _dir_card_html(title: str, lines: list[str]) -> str:
     body = "".join(lines)
     return f"""
@@ -140,9 +160,12 @@ def _render_manual_actions(
         e1, e2 = st.columns(2)
         with e1:
             if st.button("匯出原始 CSV", use_container_width=True):
-                out = os.path.join(data_dir, "processed_data.csv")
+                # 手動匯出放在 output/，不覆蓋 data/ 下由 export_csv.py 管理的檔案
+                out_dir = os.path.join(data_dir, "output")
+                os.makedirs(out_dir, exist_ok=True)
+                out = os.path.join(out_dir, "raw_export.csv")
                 df.to_csv(out, index=False, encoding="utf-8-sig")
-                st.success(f"已匯出原始資料（{len(df):,} 筆）")
+                st.success(f"已匯出原始資料（{len(df):,} 筆）：{out}")
         with e2:
             if st.button("匯出研究資料集", use_container_width=True):
                 out = processor.export_research_csv()
@@ -179,24 +202,23 @@ def _render_directory_health(data_dir: str) -> None:
                 continue
 
             if daily_pattern:
-                date_dirs = sorted(glob.glob(os.path.join(base, "????-??-??")))
-                total_files = sum(len(glob.glob(os.path.join(path, "*.json"))) for path in date_dirs)
-                today_dir = os.path.join(base, today_str)
-                today_count = len(glob.glob(os.path.join(today_dir, "*.json"))) if os.path.isdir(today_dir) else 0
+                folder_counts = _folder_counts(data_dir, folder)
+                date_dirs = sorted(folder_counts)
+                total_files = sum(folder_counts.values())
+                today_count = folder_counts.get(today_str, 0)
                 color = "green" if today_count > 0 else "red"
                 recent_lines = [
                     f'<div class="label">{status_badge(f"今日 {today_count} 筆", color)}</div>',
                     f'<div class="row"><span class="name">累計檔案</span><span class="val">{total_files:,}</span></div>',
                 ]
-                for path in date_dirs[-3:]:
-                    dname = os.path.basename(path)
-                    count = len(glob.glob(os.path.join(path, "*.json")))
+                for dname in date_dirs[-3:]:
+                    count = folder_counts[dname]
                     recent_lines.append(
                         f'<div class="row"><span class="name">{dname}</span><span class="val">{count}</span></div>'
                     )
                 st.markdown(_dir_card_html(label, recent_lines), unsafe_allow_html=True)
             else:
-                json_files = sorted(glob.glob(os.path.join(base, "*.json")))
+                json_files = sorted(storage.glob_payloads(os.path.join(base, "*")))
                 color = "green" if json_files else "red"
                 lines = [f'<div class="label">{status_badge(f"{len(json_files)} 個檔案", color)}</div>']
                 for path in json_files[-4:]: